@@ -1,10 +1,14 @@
 """
-ASGI config for config project.
+ASGI-точка входа проекта (uvicorn).
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+Запуск в production через gunicorn с процессами uvicorn (по умолчанию,
+см. gunicorn.conf.py):
 
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+    gunicorn -c gunicorn.conf.py
+
+или отдельно uvicorn:
+
+    uvicorn config.asgi:application --lifespan off --workers 4
 """
 
 import os
@@ -12,5 +16,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Каждый запрос ASGI выполняется в своем потоке со своим соединением:
+# постоянные соединения не переиспользуются, а копятся до CONN_MAX_AGE.
+# По умолчанию - закрывать после запроса (при нагрузке - через PgBouncer)
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -0,0 +1,196 @@
+"""
+Чтение из реплик PostgreSQL.
+
+Реплики перечисляются в DATABASE_REPLICAS (см. DB_REPLICA_HOSTS в settings).
+Запись и все чтения по умолчанию идут в основную БД (`default`). На реплику
+отправляются только явно отмеченные чтения:
+
+- представления с ReplicaReadMixin (каталог, история заказов)
+  читают через `queryset.using(self.read_db)`;
+- код вне запроса (например, задача экспорта) - внутри `with read_replica():`,
+  тогда ReplicaRouter направляет на реплику все чтения.
+
+Реплика не используется, если:
+- ее отставание больше REPLICA_MAX_LAG секунд или она недоступна
+  (проверка не чаще раза в REPLICA_LAG_CHECK_INTERVAL секунд на процесс);
+- пользователь недавно что-то изменил (read-your-writes): после успешного
+  изменяющего запроса его чтения REPLICA_STICKY_SECONDS секунд идут
+  в основную БД (ReplicaStickinessMiddleware).
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Реплика для чтений текущего контекста (read_replica)
+_read_alias = ContextVar('read_alias', default=None)
+
+# Результаты проверки отставания реплик: {alias: (время проверки, пригодна)}
+_replica_health = {}
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def get_replica_lag(alias):
+    """Отставание реплики в секундах (для не-PostgreSQL БД - 0)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(REPLICA_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def is_replica_healthy(alias):
+    """Реплика доступна и отстает не больше REPLICA_MAX_LAG секунд."""
+    now = time.monotonic()
+    checked_at, healthy = _replica_health.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return healthy
+    try:
+        lag = get_replica_lag(alias)
+        healthy = lag <= settings.REPLICA_MAX_LAG
+        if not healthy:
+            logger.warning('Реплика %s отстает на %.1f с, чтение из основной БД.', alias, lag)
+    except DatabaseError as e:
+        healthy = False
+        logger.warning('Реплика %s недоступна: %s', alias, e)
+    _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+def get_replica_alias():
+    """Случайная пригодная реплика или None."""
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if is_replica_healthy(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+# --- Read-your-writes ---
+
+def sticky_cache_key(user_id):
+    return f'db:sticky:{user_id}'
+
+
+def mark_recent_write(user):
+    """Следующие REPLICA_STICKY_SECONDS секунд пользователь читает из основной БД."""
+    cache.set(sticky_cache_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def has_recent_write(user):
+    return user.is_authenticated and cache.get(sticky_cache_key(user.pk)) is not None
+
+
+def get_read_database(user):
+    """
+    Алиас БД для чтений пользователя: реплика, если она пригодна
+    и пользователь недавно ничего не менял, иначе основная БД.
+    """
+    if not settings.DATABASE_REPLICAS or has_recent_write(user):
+        return DEFAULT_DB_ALIAS
+    return get_replica_alias() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def read_replica():
+    """Все чтения внутри блока идут на реплику (если есть пригодная)."""
+    alias = get_replica_alias() if settings.DATABASE_REPLICAS else None
+    token = _read_alias.set(alias)
+    try:
+        yield alias or DEFAULT_DB_ALIAS
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Роутер БД: запись - в основную БД, чтение - в основную БД или
+    в реплику, выбранную read_replica().
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаем из той же БД, что и сам объект
+            return instance._state.db
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    После успешного изменяющего запроса (POST, PUT, PATCH, DELETE)
+    аутентифицированного пользователя его чтения на время переводятся
+    в основную БД, чтобы он сразу видел свои изменения.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.process_write(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # request.user может быть ленивым объектом сессии (запрос к БД)
+        await sync_to_async(self.process_write)(request, response)
+        return response
+
+    @staticmethod
+    def process_write(request, response):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        ):
+            # DRF записывает аутентифицированного пользователя в исходный запрос
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                mark_recent_write(user)
+
+
+class ReplicaReadMixin:
+    """
+    Представления, чьи чтения можно отправлять на реплику
+    (с учетом read-your-writes). Используйте `self.read_db`:
+
+        Model.objects.using(self.read_db)
+    """
+    read_db = DEFAULT_DB_ALIAS
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Решение принимается после аутентификации: нужен пользователь
+        self.read_db = get_read_database(request.user)
@@ -0,0 +1,169 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('querycount')
+
+# `IN (%s, %s, ...)` с разным числом параметров - один и тот же запрос
+_IN_LIST_RE = re.compile(r'\((?:%s,\s*)+%s\)')
+_SPACES_RE = re.compile(r'\s+')
+# Служебные запросы транзакций не считаются повторами
+_TRANSACTION_PREFIXES = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryBudgetExceeded(Exception):
+    """Эндпоинт выполнил больше запросов к БД, чем разрешено бюджетом."""
+
+
+def normalize_sql(sql):
+    """
+    Приводит SQL к "форме" запроса. Параметры в шаблоне запроса уже
+    заменены на %s, остается свернуть списки IN и пробелы.
+    """
+    return _SPACES_RE.sub(' ', _IN_LIST_RE.sub('(%s...)', sql)).strip()
+
+
+def get_endpoint_name(view_func, request):
+    """
+    Имя эндпоинта вида `OrderViewSet.list` или `OrderCreateView.post`.
+    Для ViewSet используется действие DRF, для остальных - HTTP-метод.
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class QueryStats:
+    """
+    Обертка выполнения запросов (connection.execute_wrapper):
+    считает запросы, их суммарное время и повторы одинаковых запросов.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if not sql.startswith(_TRANSACTION_PREFIXES):
+                self.shapes[normalize_sql(sql)] += 1
+
+    def repeated(self, threshold):
+        """Запросы, выполненные не меньше `threshold` раз - вероятный N+1."""
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+class QueryCountMiddleware:
+    """
+    Считает запросы к БД и время их выполнения для каждого запроса к API.
+
+    - В режиме DEBUG статистика возвращается в заголовках ответа
+      X-DB-Queries, X-DB-Time-Ms и X-DB-Repeated-Queries.
+    - Повторяющиеся запросы (вероятный N+1) и превышение бюджета
+      пишутся в лог `querycount` в виде JSON.
+    - При QUERY_BUDGET_STRICT (включен в настройках тестов) превышение
+      бюджета из QUERY_BUDGETS вызывает исключение QueryBudgetExceeded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.QUERY_COUNT_ENABLED:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, stats)
+            response = self.get_response(request)
+
+        self.finish(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.QUERY_COUNT_ENABLED:
+            return await self.get_response(request)
+
+        # Под ASGI синхронный код запроса (в том числе асинхронный ORM)
+        # выполняется в отдельном потоке запроса, а соединения с БД
+        # привязаны к потоку: обертки ставятся в том же потоке.
+        stats = QueryStats()
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        self.finish(request, response, stats)
+        return response
+
+    @staticmethod
+    def wrap_connections(stack, stats):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+
+    def finish(self, request, response, stats):
+        endpoint = getattr(request, 'query_count_endpoint', None)
+        if endpoint is not None:
+            self.report(request, response, endpoint, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_count_endpoint = get_endpoint_name(view_func, request)
+
+    @staticmethod
+    def report(request, response, endpoint, stats):
+        repeated = stats.repeated(settings.QUERY_COUNT_REPEAT_THRESHOLD)
+        budget = settings.QUERY_BUDGETS.get(endpoint, settings.QUERY_BUDGET_DEFAULT)
+        over_budget = budget is not None and stats.count > budget
+
+        if settings.DEBUG:
+            response['X-DB-Queries'] = str(stats.count)
+            response['X-DB-Time-Ms'] = f'{stats.duration * 1000:.1f}'
+            response['X-DB-Repeated-Queries'] = str(sum(repeated.values()))
+
+        payload = {
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_time_ms': round(stats.duration * 1000, 1),
+            'budget': budget,
+        }
+        if repeated or over_budget:
+            payload['repeated'] = [
+                {'sql': shape[:500], 'count': count}
+                for shape, count in sorted(repeated.items(), key=lambda item: -item[1])
+            ]
+            logger.warning(json.dumps(payload, ensure_ascii=False))
+        else:
+            logger.debug(json.dumps(payload, ensure_ascii=False))
+
+        if over_budget and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(
+                f'{endpoint}: {stats.count} запросов к БД при бюджете {budget}'
+            )
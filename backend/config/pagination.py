@@ -0,0 +1,66 @@
+"""
+Постраничный вывод больших таблиц без точного COUNT(*).
+
+На больших таблицах (в первую очередь секционированные заказы) точный
+подсчет строк читает всю таблицу. EstimatedCountPaginator берет оценку
+PostgreSQL:
+
+- для списка без фильтров - сумму `pg_class.reltuples` по всем секциям
+  таблицы (статистика, которую обновляют ANALYZE и autovacuum);
+- для списка с фильтрами или поиском - оценку планировщика из EXPLAIN.
+
+Точный COUNT(*) выполняется, только если оценка меньше
+ADMIN_ESTIMATED_COUNT_THRESHOLD: на небольших выборках он быстрый,
+а статистика может быть неточной. Для других БД подсчет всегда точный.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Статистика всех секций таблицы; для обычной таблицы - только ее самой
+TABLE_ROWS_ESTIMATE_SQL = """
+    SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+    FROM pg_partition_tree(%s::regclass) t JOIN pg_class c ON c.oid = t.relid
+    WHERE t.isleaf
+"""
+
+
+def estimate_table_rows(connection, table):
+    """Оценка числа строк таблицы по статистике PostgreSQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(TABLE_ROWS_ESTIMATE_SQL, [connection.ops.quote_name(table)])
+        return cursor.fetchone()[0]
+
+
+def estimate_count(queryset):
+    """
+    Оценка числа строк QuerySet в PostgreSQL (см. описание модуля)
+    или None, если оценить нельзя.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.query
+    if not query.where and not query.distinct and not query.combinator:
+        return estimate_table_rows(connection, queryset.model._meta.db_table)
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который для больших выборок использует оценку числа строк.
+    Последние страницы по оценке могут оказаться пустыми или неполными.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = None
+        if hasattr(self.object_list, 'query'):
+            estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
@@ -33,15 +33,20 @@ INSTALLED_APPS = [
     'drf_spectacular',
     "users.apps.UsersConfig",
     "shop.apps.ShopConfig",
+    "notifications.apps.NotificationsConfig",
+    "metrics.apps.MetricsConfig",
 ]
 
 
 MIDDLEWARE = [
+    "metrics.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.middleware.QueryCountMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.db_routing.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -75,9 +80,44 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        # Постоянные соединения: время жизни соединения в секундах
+        # (0 - закрывать после каждого запроса, как раньше). Под ASGI
+        # соединения не переиспользуются между запросами, и config/asgi.py
+        # меняет значение по умолчанию на 0
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        # Проверять соединение перед повторным использованием в новом запросе
+        "CONN_HEALTH_CHECKS": True,
+        # При работе через пул соединений PgBouncer в режиме transaction
+        # серверные курсоры (QuerySet.iterator()) нужно отключить
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS", "0") == "1",
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
+# Реплики PostgreSQL для чтения каталога и истории заказов (config/db_routing.py)
+# DB_REPLICA_HOSTS=host1,host2:5433 - остальные параметры как у основной БД.
+# В тестах реплики указывают на тестовую основную БД (TEST.MIRROR).
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    replica_host, _, replica_port = replica.strip().partition(":")
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": replica_port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["config.db_routing.ReplicaRouter"]
+# Максимальное отставание реплики (секунды), при большем чтение идет в основную БД
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", 5))
+# Как часто проверять отставание реплики (секунды, на процесс)
+REPLICA_LAG_CHECK_INTERVAL = int(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", 5))
+# Сколько секунд после своих изменений пользователь читает из основной БД
+REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -99,8 +139,20 @@ TIME_ZONE = "Europe/Moscow"
 USE_I18N = True
 USE_TZ = True
 STATIC_URL = "static/"
+# Файловое хранилище для результатов фоновых задач (файлы экспорта)
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", BASE_DIR / "media")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# CACHE SETTINGS
+# Общий кэш в Redis: данные в нем видны и веб-процессам, и воркерам Celery
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{os.getenv('REDIS_HOST')}:{os.getenv('REDIS_PORT')}/1",
+    }
+}
+
 # CELERY SETTINGS
 CELERY_BROKER_URL = (
     f"amqp://{os.getenv('RABBITMQ_DEFAULT_USER')}:"
@@ -113,6 +165,91 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_TIMEZONE = "Europe/Moscow"
 CELERY_ENABLE_UTC = True
 
+# Периодические задачи (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    # Повторная отправка писем, не ушедших с первой попытки
+    "drain-email-queue": {
+        "task": "notifications.tasks.drain_email_queue",
+        "schedule": float(os.getenv("EMAIL_QUEUE_DRAIN_INTERVAL", 60)),
+    },
+    # Удаление устаревших файлов экспорта каталога
+    "cleanup-export-files": {
+        "task": "shop.api_tasks.cleanup_export_files",
+        "schedule": 3600.0,
+    },
+    # Удаление старых записей об удаленных предложениях
+    "cleanup-deleted-offers": {
+        "task": "shop.api_tasks.cleanup_deleted_offers",
+        "schedule": 24 * 3600.0,
+    },
+    # Месячные секции заказов на несколько месяцев вперед
+    "create-order-partitions": {
+        "task": "shop.tasks.create_order_partitions",
+        "schedule": 24 * 3600.0,
+    },
+    # Перенос старых закрытых заказов в архив
+    "archive-closed-orders": {
+        "task": "shop.tasks.archive_closed_orders",
+        "schedule": 24 * 3600.0,
+    },
+    # Учет новых заказов в таблицах продаж поставщиков
+    "update-sales-rollups": {
+        "task": "shop.tasks.update_sales_rollups",
+        "schedule": float(os.getenv("SALES_ROLLUP_INTERVAL", 300)),
+    },
+}
+
+# ЭКСПОРТ КАТАЛОГА
+# Каталог в файловом хранилище (default_storage), куда пишутся файлы экспорта
+EXPORT_STORAGE_DIR = os.getenv("EXPORT_STORAGE_DIR", "exports")
+# Сколько товаров загружается из БД и сериализуется за один раз
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+# Время хранения файлов экспорта, в часах
+EXPORT_FILE_TTL = int(os.getenv("EXPORT_FILE_TTL", 24))
+# Сколько дней хранятся записи об удаленных предложениях для выгрузки изменений.
+# Потребителю, синхронизировавшемуся раньше, нужен полный экспорт
+EXPORT_DELETED_OFFERS_TTL = int(os.getenv("EXPORT_DELETED_OFFERS_TTL", 30))
+# Каталог в файловом хранилище (default_storage) для загруженных прайс-листов.
+# Файл удаляется задачей импорта после чтения
+PRICELIST_STORAGE_DIR = os.getenv("PRICELIST_STORAGE_DIR", "pricelists")
+# Сколько позиций прайс-листа сопоставляется с товарами и предложениями за один запрос
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+
+# ЗАКАЗЫ: СЕКЦИИ И АРХИВ (shop/partitions.py, shop/archive.py)
+# На сколько месяцев вперед создавать секции заказов (PostgreSQL)
+ORDER_PARTITIONS_AHEAD = int(os.getenv("ORDER_PARTITIONS_AHEAD", 3))
+# Доставленные и отмененные заказы старше этого числа месяцев переносятся в архив
+ORDER_ARCHIVE_AFTER_MONTHS = int(os.getenv("ORDER_ARCHIVE_AFTER_MONTHS", 12))
+# Заказов в одной транзакции архивации и максимум за один запуск задачи
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", 500))
+ORDER_ARCHIVE_TASK_LIMIT = int(os.getenv("ORDER_ARCHIVE_TASK_LIMIT", 50000))
+
+# АНАЛИТИКА ПРОДАЖ ПОСТАВЩИКОВ (shop/analytics.py)
+# Заказы моложе этого числа секунд учитываются при следующем запуске
+SALES_ROLLUP_LAG = int(os.getenv("SALES_ROLLUP_LAG", 300))
+# Заказов в одной транзакции и максимум за один запуск задачи
+SALES_ROLLUP_BATCH_SIZE = int(os.getenv("SALES_ROLLUP_BATCH_SIZE", 2000))
+SALES_ROLLUP_TASK_LIMIT = int(os.getenv("SALES_ROLLUP_TASK_LIMIT", 200000))
+# Период отчета по умолчанию и максимальный, в днях
+SALES_REPORT_DEFAULT_DAYS = int(os.getenv("SALES_REPORT_DEFAULT_DAYS", 30))
+SALES_REPORT_MAX_DAYS = int(os.getenv("SALES_REPORT_MAX_DAYS", 366))
+
+# СПРАВОЧНИКИ КАТЕГОРИЙ И ПАРАМЕТРОВ (shop/reference.py)
+# Как часто процесс сверяет версию справочников в памяти с общим кэшем, в секундах
+REFERENCE_CACHE_CHECK_INTERVAL = float(os.getenv("REFERENCE_CACHE_CHECK_INTERVAL", 5))
+# Время хранения снимка справочников в общем кэше, в секундах
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", 86400))
+
+# ИСТОРИЯ ЦЕН (shop.models.PriceHistory)
+# Период ряда цен по умолчанию и максимальный, в днях
+PRICE_HISTORY_DEFAULT_DAYS = int(os.getenv("PRICE_HISTORY_DEFAULT_DAYS", 90))
+PRICE_HISTORY_MAX_DAYS = int(os.getenv("PRICE_HISTORY_MAX_DAYS", 731))
+
+# АДМИНКА
+# Если по статистике PostgreSQL в списке больше строк, чем это значение,
+# админка показывает оценку числа строк вместо точного COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", 50000))
+
 
 # AUTHENTICATION
 AUTH_USER_MODEL = "users.User"
@@ -120,7 +257,8 @@ AUTH_USER_MODEL = "users.User"
 # DJANGO REST FRAMEWORK SETTINGS
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT-аутентификация с кэшированием данных пользователя
+        'users.authentication.CachedJWTAuthentication',
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -175,6 +313,33 @@ else:
 # Email администратора, берется из .env
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'default-admin@example.com')
 
+# Уведомления администратора о новых заказах:
+# 'realtime' - отдельное письмо на каждый заказ,
+# 'digest' - одна сводка раз в ADMIN_ORDER_DIGEST_INTERVAL минут.
+ADMIN_ORDER_NOTIFICATIONS = os.getenv('ADMIN_ORDER_NOTIFICATIONS', 'realtime')
+ADMIN_ORDER_DIGEST_INTERVAL = int(os.getenv('ADMIN_ORDER_DIGEST_INTERVAL', 15))
+
+if ADMIN_ORDER_NOTIFICATIONS == 'digest':
+    CELERY_BEAT_SCHEDULE["send-new-orders-digest"] = {
+        "task": "shop.tasks.send_new_orders_digest_to_admin",
+        "schedule": ADMIN_ORDER_DIGEST_INTERVAL * 60.0,
+    }
+
+# Очередь исходящих писем (приложение notifications)
+# Сколько писем воркер захватывает из очереди за один раз
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', 100))
+# Ограничение скорости отправки на один воркер, писем в секунду (0 - без ограничения)
+EMAIL_QUEUE_RATE_LIMIT = float(os.getenv('EMAIL_QUEUE_RATE_LIMIT', 10))
+# Количество попыток отправки одного письма
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', 5))
+# Задержка перед повторной попыткой (удваивается с каждой попыткой), в секундах
+EMAIL_QUEUE_RETRY_BACKOFF = int(os.getenv('EMAIL_QUEUE_RETRY_BACKOFF', 30))
+EMAIL_QUEUE_RETRY_BACKOFF_MAX = int(os.getenv('EMAIL_QUEUE_RETRY_BACKOFF_MAX', 3600))
+# Через сколько секунд письмо, захваченное упавшим воркером, возвращается в очередь
+EMAIL_QUEUE_LOCK_TIMEOUT = int(os.getenv('EMAIL_QUEUE_LOCK_TIMEOUT', 300))
+# Через сколько секунд простоя SMTP-соединение проверяется (NOOP) перед отправкой
+EMAIL_CONNECTION_IDLE_CHECK = int(os.getenv('EMAIL_CONNECTION_IDLE_CHECK', 30))
+
 
 # DRF-SPECTACULAR SETTINGS (API DOCS)
 SPECTACULAR_SETTINGS = {
@@ -219,4 +384,63 @@ SIMPLE_JWT = {
     # Тип токена
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-}
\ No newline at end of file
+
+    # Сериализатор, добавляющий в токен тип пользователя и ID профилей
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.CustomTokenObtainPairSerializer',
+}
+
+# Ожидание результата задачи на /api/v1/tasks/<task_id>/ (shop/task_events.py)
+# Redis для уведомлений о завершении задач (pub/sub). fakeredis:// - in-memory
+# заглушка для тестов и разработки без Redis (fakeredis из requirements-dev.txt)
+TASK_EVENTS_REDIS_URL = os.getenv(
+    'TASK_EVENTS_REDIS_URL', f"redis://{os.getenv('REDIS_HOST')}:{os.getenv('REDIS_PORT')}/0"
+)
+# Максимальное время ожидания в режиме long-poll (?wait=), в секундах
+TASK_STATUS_MAX_WAIT = int(os.getenv('TASK_STATUS_MAX_WAIT', 30))
+# Максимальная длительность потока Server-Sent Events и интервал keep-alive, в секундах
+TASK_STATUS_STREAM_TIMEOUT = int(os.getenv('TASK_STATUS_STREAM_TIMEOUT', 300))
+TASK_STATUS_HEARTBEAT = int(os.getenv('TASK_STATUS_HEARTBEAT', 15))
+
+# Время жизни данных пользователя в кэше аутентификации, в секундах
+AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv('AUTH_PRINCIPAL_CACHE_TTL', 60))
+
+# Учет запросов к БД (config.middleware.QueryCountMiddleware)
+# В режиме DEBUG количество запросов и их время возвращаются в заголовках
+# X-DB-Queries / X-DB-Time-Ms, повторяющиеся запросы (N+1) пишутся в лог.
+QUERY_COUNT_ENABLED = os.getenv('QUERY_COUNT_ENABLED', '1') == '1'
+# Сколько одинаковых запросов за один запрос к API считать признаком N+1
+QUERY_COUNT_REPEAT_THRESHOLD = int(os.getenv('QUERY_COUNT_REPEAT_THRESHOLD', 3))
+# Бюджеты запросов к БД по эндпоинтам (`<View>.<action или метод>`).
+# Бюджет не зависит от количества объектов в ответе и учитывает
+# промах кэша аутентификации (CachedJWTAuthentication).
+QUERY_BUDGETS = {
+    'ProductViewSet.list': 7,
+    'ProductViewSet.retrieve': 6,
+    'CartViewSet.list': 5,
+    'CartViewSet.create': 8,
+    'CartViewSet.partial_update': 6,
+    'CartViewSet.destroy': 4,
+    'ContactViewSet.list': 3,
+    'OrderCreateView.post': 16,
+    'OrderViewSet.list': 6,
+    'OrderViewSet.retrieve': 5,
+    'ProductExportView.get': 4,
+    'SupplierStatusView.get': 2,
+    'SupplierOrderViewSet.list': 6,
+    'SupplierOrderViewSet.retrieve': 5,
+    'PriceHistoryView.get': 3,
+    'CategoryListView.get': 2,
+}
+# Бюджет для эндпоинтов, которых нет в QUERY_BUDGETS (None - без ограничения)
+QUERY_BUDGET_DEFAULT = None
+# При превышении бюджета выбрасывать исключение (включено в config/settings_test.py)
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', '0') == '1'
+
+
+# Метрики Prometheus (приложение metrics, эндпоинт /metrics)
+# Для gunicorn с несколькими воркерами и Celery prefork нужна переменная
+# окружения PROMETHEUS_MULTIPROC_DIR - общий каталог файлов метрик процессов.
+# Если задан токен, /metrics требует заголовок `Authorization: Bearer <токен>`
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN', '')
+# Порт, на котором воркер Celery отдает свои метрики (0 - не запускать)
+CELERY_METRICS_PORT = int(os.getenv('CELERY_METRICS_PORT', 0))
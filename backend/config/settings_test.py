@@ -0,0 +1,45 @@
+"""
+Настройки для запуска тестов:
+
+    python manage.py test --settings=config.settings_test
+
+База данных - PostgreSQL из переменных окружения, как в основных
+настройках (секционирование заказов и индексы используют его
+возможности). Кэш, брокер Celery и Redis для событий задач заменены
+реализациями в памяти процесса, поэтому кроме PostgreSQL тестам ничего
+не нужно.
+"""
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+
+# Реплика для тестов чтения из реплик (config/db_routing.py): та же
+# тестовая БД через отдельное соединение. Чтения на реплику включаются
+# в тестах через override_settings(DATABASE_REPLICAS=["replica"]); отдельное
+# соединение не видит незафиксированных данных теста в TestCase.
+DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}  # noqa: F405
+
+# Превышение бюджета запросов к БД (QUERY_BUDGETS) - ошибка в тесте
+QUERY_BUDGET_STRICT = True
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Задачи Celery выполняются сразу в процессе теста, результат сохраняется
+CELERY_BROKER_URL = "memory://"
+CELERY_RESULT_BACKEND = "cache+memory://"
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_STORE_EAGER_RESULT = True
+
+# Уведомления о завершении задач - in-memory заглушка Redis (requirements-dev.txt)
+TASK_EVENTS_REDIS_URL = "fakeredis://"
+
+MEDIA_ROOT = Path(tempfile.gettempdir()) / "retail-order-api-tests"
+
+# Быстрое хэширование паролей тестовых пользователей
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
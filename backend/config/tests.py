@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+class ConnMaxAgeTests(SimpleTestCase):
+    """Время жизни соединений с БД по умолчанию зависит от точки входа."""
+
+    def conn_max_age(self, module, **env):
+        # Точка входа загружает настройки при импорте - в отдельном процессе
+        environ = {key: value for key, value in os.environ.items() if key != 'DB_CONN_MAX_AGE'}
+        environ.update(env, DJANGO_SETTINGS_MODULE='config.settings')
+        code = (
+            f'import {module}; from django.conf import settings; '
+            'print(settings.DATABASES["default"]["CONN_MAX_AGE"])'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=environ,
+            capture_output=True, text=True, check=True,
+        )
+        return int(result.stdout)
+
+    def test_defaults(self):
+        self.assertEqual(self.conn_max_age('config.asgi'), 0)
+        self.assertEqual(self.conn_max_age('config.wsgi'), 60)
+
+    def test_explicit(self):
+        self.assertEqual(self.conn_max_age('config.asgi', DB_CONN_MAX_AGE='30'), 30)
@@ -1,11 +1,14 @@
 # backend/config/urls.py
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import include, path
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView,
 )
+from metrics.views import metrics_view
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -44,4 +47,11 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name='schema'),
         name='redoc',
     ),
+
+    # Метрики Prometheus
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+# Статика админки и документации при DEBUG, если проект запущен не через runserver
+if settings.DEBUG:
+    urlpatterns += staticfiles_urlpatterns()
@@ -0,0 +1,11 @@
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    Процесс gunicorn для ASGI-приложения (config.asgi).
+
+    Django не поддерживает протокол lifespan, поэтому он отключен,
+    чтобы uvicorn не писал предупреждение при каждом запуске.
+    """
+    CONFIG_KWARGS = {**BaseUvicornWorker.CONFIG_KWARGS, 'lifespan': 'off'}
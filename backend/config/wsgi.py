@@ -1,10 +1,12 @@
 """
-WSGI config for config project.
+WSGI-точка входа проекта (синхронные процессы gunicorn).
 
-It exposes the WSGI callable as a module-level variable named ``application``.
+Запуск в production (по умолчанию gunicorn.conf.py запускает ASGI):
 
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
+    GUNICORN_APP=config.wsgi:application gunicorn -c gunicorn.conf.py
+
+Параметры сервера (число процессов, потоков, таймауты) задаются
+переменными окружения, см. gunicorn.conf.py.
 """
 
 import os
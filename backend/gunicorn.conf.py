@@ -0,0 +1,70 @@
+"""
+Конфигурация gunicorn для production.
+
+Все параметры задаются переменными окружения. По умолчанию запускается
+ASGI-приложение в процессах uvicorn (асинхронные представления
+shop/async_views.py), WSGI включается переменной GUNICORN_APP:
+
+    gunicorn -c gunicorn.conf.py                                        # ASGI
+    GUNICORN_APP=config.wsgi:application gunicorn -c gunicorn.conf.py   # WSGI
+"""
+import glob
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Количество процессов: по умолчанию 2 * CPU + 1
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Приложение: config.asgi:application или config.wsgi:application
+wsgi_app = os.getenv('GUNICORN_APP', 'config.asgi:application')
+# Тип процесса по умолчанию - по приложению: uvicorn для ASGI, gthread для WSGI
+# (для WSGI также можно указать sync)
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS',
+    'config.uvicorn_worker.UvicornWorker' if wsgi_app.startswith('config.asgi') else 'gthread',
+)
+# Потоков на процесс (для gthread). Каждый поток держит свое соединение с БД
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Перезапуск процесса после N запросов (защита от утечек памяти), 0 - выключено
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Автоперезагрузка при изменении кода (для разработки)
+reload = os.getenv('GUNICORN_RELOAD', '0') == '1'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """
+    Удаляем файлы метрик процессов прошлого запуска
+    (многопроцессный режим prometheus_client).
+    """
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    """Убираем метрики-gauge завершившегося процесса."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Загружаем справочники каталога в память процесса (shop/reference.py)."""
+    from shop.reference import preload_reference_data
+
+    preload_reference_data()
@@ -0,0 +1,20 @@
+import os
+
+from django.apps import AppConfig
+
+
+class MetricsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "metrics"
+
+    verbose_name = 'Метрики'
+
+    def ready(self):
+        """
+        Создаем каталог метрик для многопроцессного режима и подключаем
+        обработчики сигналов Celery (время выполнения задач, ошибки и т.п.).
+        """
+        multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+        from . import signals
@@ -0,0 +1,75 @@
+"""
+Метрики API и задач Celery в формате Prometheus.
+
+Метрики собираются библиотекой prometheus_client. Если задана переменная
+окружения PROMETHEUS_MULTIPROC_DIR, каждый процесс (воркер gunicorn,
+процесс Celery prefork) пишет свои значения в файлы этого каталога,
+а эндпоинт /metrics суммирует их. Без переменной метрики хранятся
+в памяти процесса (runserver, celery --pool=solo).
+"""
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+
+# Границы корзин гистограмм, в секундах
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+# --- API ---
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds',
+    'Время обработки запроса к API',
+    ['endpoint', 'method'],
+    buckets=REQUEST_BUCKETS,
+)
+REQUESTS = Counter(
+    'api_requests_total',
+    'Количество запросов к API по кодам ответа',
+    ['endpoint', 'method', 'status'],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'api_requests_in_progress',
+    'Запросы к API, обрабатываемые в данный момент',
+    ['endpoint', 'method'],
+    multiprocess_mode='livesum',
+)
+
+# --- Celery ---
+
+TASK_RUNTIME = Histogram(
+    'celery_task_runtime_seconds',
+    'Время выполнения задачи Celery',
+    ['task'],
+    buckets=TASK_BUCKETS,
+)
+TASK_QUEUE_WAIT = Histogram(
+    'celery_task_queue_wait_seconds',
+    'Время ожидания задачи в очереди (от отправки до начала выполнения)',
+    ['task'],
+    buckets=TASK_BUCKETS,
+)
+TASKS = Counter(
+    'celery_tasks_total',
+    'Количество выполненных задач Celery по результату',
+    ['task', 'state'],
+)
+
+
+def get_registry():
+    """
+    Реестр для выдачи метрик: в многопроцессном режиме - сводка
+    по файлам всех процессов, иначе - реестр текущего процесса.
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
@@ -0,0 +1,122 @@
+import json
+import statistics
+import threading
+import time
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку (ближайший ранг)."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест HTTP-эндпоинта: N параллельных клиентов в течение '
+        'заданного времени. Выводит запросы в секунду и перцентили задержки. '
+        'Используется для сравнения runserver, gunicorn (WSGI) и uvicorn (ASGI). '
+        'Можно указать несколько значений -c, чтобы увидеть рост задержки '
+        'с числом соединений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Например, http://127.0.0.1:8000/api/v1/products/')
+        parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[10])
+        parser.add_argument('-d', '--duration', type=float, default=10, help='Секунды.')
+        parser.add_argument(
+            '-H', '--header', action='append', default=[],
+            help='Заголовок "Имя: значение", можно указать несколько раз.',
+        )
+        parser.add_argument(
+            '--no-keepalive', action='store_true',
+            help='Новое TCP-соединение на каждый запрос.',
+        )
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+        headers = dict(
+            (part.strip() for part in header.split(':', 1)) for header in options['header']
+        )
+        results = [
+            self.run(url, path, headers, concurrency, options)
+            for concurrency in options['concurrency']
+        ]
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False))
+            return
+        for result in results:
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"-c {result['concurrency']}: {result['requests']} запросов, "
+                f"{result['rps']} запросов/с, ошибок: {result['errors']}; "
+                f"задержка, мс: среднее {latency['mean']}, p50 {latency['p50']}, "
+                f"p95 {latency['p95']}, p99 {latency['p99']}"
+            )
+
+    def run(self, url, path, headers, concurrency, options):
+        """Один прогон с `concurrency` параллельными клиентами."""
+        connection_class = HTTPSConnection if url.scheme == 'https' else HTTPConnection
+        deadline = time.perf_counter() + options['duration']
+
+        latencies, errors, lock = [], [], threading.Lock()
+
+        def client():
+            connection = None
+            local_latencies, local_errors = [], []
+            while time.perf_counter() < deadline:
+                if connection is None:
+                    connection = connection_class(url.hostname, url.port, timeout=30)
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                except Exception as e:
+                    local_errors.append(type(e).__name__)
+                    connection.close()
+                    connection = None
+                    continue
+                local_latencies.append(time.perf_counter() - started)
+                if response.status >= 400:
+                    local_errors.append(str(response.status))
+                if options['no_keepalive'] or response.will_close:
+                    connection.close()
+                    connection = None
+            if connection is not None:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.extend(local_errors)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'url': options['url'],
+            'concurrency': concurrency,
+            'requests': len(latencies),
+            'errors': len(errors),
+            'rps': round(len(latencies) / elapsed, 1),
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+                'p50': round(percentile(latencies, 50) * 1000, 2),
+                'p95': round(percentile(latencies, 95) * 1000, 2),
+                'p99': round(percentile(latencies, 99) * 1000, 2),
+            },
+        }
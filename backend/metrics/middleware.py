@@ -0,0 +1,64 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from config.middleware import get_endpoint_name
+
+from .collectors import REQUEST_LATENCY, REQUESTS, REQUESTS_IN_PROGRESS
+
+# Метка для запросов, не дошедших до представления (404 по адресу и т.п.)
+UNMATCHED_ENDPOINT = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Время обработки, коды ответов и число одновременных запросов
+    по эндпоинтам API (`<View>.<action или метод>`).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish_in_progress(request)
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish_in_progress(request)
+        self.observe(request, response, started)
+        return response
+
+    @staticmethod
+    def finish_in_progress(request):
+        in_progress = getattr(request, 'metrics_in_progress', None)
+        if in_progress is not None:
+            in_progress.dec()
+
+    @staticmethod
+    def observe(request, response, started):
+        endpoint = getattr(request, 'metrics_endpoint', UNMATCHED_ENDPOINT)
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_endpoint = get_endpoint_name(view_func, request)
+        request.metrics_in_progress = REQUESTS_IN_PROGRESS.labels(
+            request.metrics_endpoint, request.method
+        )
+        request.metrics_in_progress.inc()
@@ -0,0 +1,89 @@
+import glob
+import os
+import time
+
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_shutdown,
+    worker_ready,
+)
+from django.conf import settings
+from prometheus_client import multiprocess, start_http_server
+
+from .collectors import TASK_QUEUE_WAIT, TASK_RUNTIME, TASKS, get_registry
+
+# Заголовок сообщения с временем отправки задачи (для времени ожидания в очереди)
+SENT_AT_HEADER = 'metrics_sent_at'
+
+TASK_STATES = {
+    'SUCCESS': 'succeeded',
+    'FAILURE': 'failed',
+    'RETRY': 'retried',
+}
+
+# Задачи проекта сообщают об ошибке результатом, а не исключением:
+# строкой "Ошибка..." или словарем {'error': ...} (экспорт каталога)
+TASK_ERROR_PREFIX = 'Ошибка'
+
+# Время начала выполнения задач текущего процесса по task_id
+_started = {}
+
+
+def is_error_result(retval):
+    """Результат задачи означает ошибку (см. TASK_ERROR_PREFIX)."""
+    if isinstance(retval, str):
+        return retval.startswith(TASK_ERROR_PREFIX)
+    return isinstance(retval, dict) and 'error' in retval
+
+
+@before_task_publish.connect
+def add_sent_at_header(headers=None, **kwargs):
+    if headers is not None:
+        headers[SENT_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+    sent_at = getattr(task.request, SENT_AT_HEADER, None)
+    if sent_at is not None:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(time.time() - sent_at, 0))
+
+
+@task_postrun.connect
+def stop_task_timer(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.labels(task.name).observe(time.perf_counter() - started)
+    if state == 'SUCCESS' and is_error_result(retval):
+        state = 'FAILURE'
+    TASKS.labels(task.name, TASK_STATES.get(state, 'other')).inc()
+
+
+@worker_init.connect
+def clear_multiprocess_dir(**kwargs):
+    """
+    При запуске воркера удаляем файлы метрик процессов прошлого запуска.
+    """
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+            os.remove(path)
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """
+    Метрики воркера отдаются его главным процессом на CELERY_METRICS_PORT.
+    """
+    if settings.CELERY_METRICS_PORT:
+        start_http_server(settings.CELERY_METRICS_PORT, registry=get_registry())
+
+
+@worker_process_shutdown.connect
+def mark_process_dead(pid=None, **kwargs):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
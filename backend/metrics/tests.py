@@ -0,0 +1,32 @@
+from django.test import TestCase
+from prometheus_client import REGISTRY
+
+from shop.tasks import process_pricelist_upload, send_order_confirmation_email
+
+from .signals import is_error_result
+
+
+def task_count(task, state):
+    return REGISTRY.get_sample_value('celery_tasks_total', {'task': task.name, 'state': state}) or 0
+
+
+class TaskResultMetricsTests(TestCase):
+
+    def test_is_error_result(self):
+        self.assertTrue(is_error_result('Ошибка: Заказ №1 не найден.'))
+        self.assertTrue(is_error_result({'error': 'Не удалось выполнить экспорт товаров.'}))
+        self.assertFalse(is_error_result('Письмо о заказе №1 поставлено в очередь.'))
+        self.assertFalse(is_error_result({'file': 'exports/products.json'}))
+        self.assertFalse(is_error_result(None))
+
+    def test_error_result_counted_as_failed(self):
+        for task, args in (
+            (send_order_confirmation_email, (0, 'client@example.com')),
+            (process_pricelist_upload, ('goods: [', 0)),
+        ):
+            with self.subTest(task=task.name):
+                failed, succeeded = task_count(task, 'failed'), task_count(task, 'succeeded')
+                result = task.apply(args=args)
+                self.assertTrue(result.get().startswith('Ошибка'))
+                self.assertEqual(task_count(task, 'failed'), failed + 1)
+                self.assertEqual(task_count(task, 'succeeded'), succeeded)
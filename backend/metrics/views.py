@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from .collectors import get_registry
+
+
+def metrics_view(request):
+    """
+    Метрики в текстовом формате Prometheus.
+
+    Если задан METRICS_AUTH_TOKEN, запрос должен содержать заголовок
+    `Authorization: Bearer <токен>`.
+    """
+    token = settings.METRICS_AUTH_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=403)
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,29 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """
+    Админка для очереди исходящих писем.
+    """
+    list_display = ('id', 'subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('created_at', 'sent_at', 'locked_at', 'last_error')
+
+    actions = ['retry_now']
+
+    @admin.action(description='Отправить повторно')
+    def retry_now(self, request, queryset):
+        from .services import schedule_drain
+
+        queryset.exclude(status=OutgoingEmail.Status.SENT).update(
+            status=OutgoingEmail.Status.PENDING,
+            attempts=0,
+            locked_at=None,
+            next_attempt_at=timezone.now(),
+        )
+        schedule_drain()
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "notifications"
+
+    verbose_name = 'Уведомления'
+
+    def ready(self):
+        """
+        Подключаем обработчики сигналов Celery (закрытие SMTP-соединения воркера).
+        """
+        from . import signals
@@ -0,0 +1,89 @@
+import time
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from notifications.models import OutgoingEmail
+from notifications.services import EmailDispatcher
+from notifications.sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость отправки писем: отдельное соединение на каждое письмо '
+        '(send_mail) и очередь с одним переиспользуемым соединением.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--count', type=int, default=500, help='Количество писем.')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--connect-delay',
+            type=float,
+            default=0.05,
+            help='Имитация стоимости соединения (TLS) в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        sink = SMTPSink(connect_delay=options['connect_delay'])
+        sink.start_in_thread()
+
+        smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=sink.port,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_QUEUE_RATE_LIMIT=0,
+        )
+        try:
+            with smtp_settings:
+                self._report('send_mail', sink, count, lambda: self._send_direct(count))
+                self._report(
+                    'очередь', sink, count, lambda: self._send_queued(count, options['batch_size'])
+                )
+        finally:
+            sink.shutdown()
+            sink.server_close()
+
+    def _report(self, label, sink, count, run):
+        messages, connections = sink.messages, sink.connections
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label:>10}: {count} писем за {elapsed:.2f} с '
+            f'({count / elapsed:.1f} писем/с), '
+            f'принято {sink.messages - messages}, '
+            f'соединений {sink.connections - connections}'
+        )
+
+    @staticmethod
+    def _send_direct(count):
+        for i in range(count):
+            send_mail(f'bench {i}', 'body', 'bench@example.com', ['to@example.com'])
+
+    @staticmethod
+    def _send_queued(count, batch_size):
+        # Создаем письма напрямую, без запуска задачи Celery:
+        # очередь разбирается синхронно в этом процессе.
+        emails = OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject=f'bench {i}',
+                body='body',
+                from_email='bench@example.com',
+                to=['to@example.com'],
+            )
+            for i in range(count)
+        )
+        bench_emails = OutgoingEmail.objects.filter(id__in=[email.id for email in emails])
+        dispatcher = EmailDispatcher()
+        try:
+            dispatcher.drain(batch_size=batch_size, queryset=bench_emails)
+        finally:
+            dispatcher.close()
+            bench_emails.delete()
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = 'Запускает локальный SMTP-приемник и выводит скорость приема писем.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument(
+            '--connect-delay',
+            type=float,
+            default=0.0,
+            help='Задержка на каждое новое соединение в секундах (имитация TLS).',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0, help='Интервал вывода статистики в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options['host'], options['port'], options['connect_delay'])
+        sink.start_in_thread()
+        self.stdout.write(f'SMTP-приемник слушает {options["host"]}:{sink.port}')
+
+        last_messages = 0
+        try:
+            while True:
+                time.sleep(options['interval'])
+                received = sink.messages - last_messages
+                last_messages = sink.messages
+                self.stdout.write(
+                    f'писем: {sink.messages}, соединений: {sink.connections}, '
+                    f'скорость: {received / options["interval"]:.1f} писем/с'
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.shutdown()
+            sink.server_close()
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Тема')),
+                ('body', models.TextField(verbose_name='Текст письма')),
+                ('html_body', models.TextField(blank=True, verbose_name='HTML-версия')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Отправитель')),
+                ('to', models.JSONField(default=list, verbose_name='Получатели')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Захвачено')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки')),
+            ],
+            options={
+                'verbose_name': 'Исходящее письмо',
+                'verbose_name_plural': 'Исходящие письма',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outgoing_email_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+
+    Письма не отправляются сразу: они складываются в эту таблицу и
+    отправляются пачками задачей `drain_email_queue` через одно
+    переиспользуемое SMTP-соединение воркера.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает отправки"
+        SENDING = "sending", "Отправляется"
+        SENT = "sent", "Отправлено"
+        FAILED = "failed", "Ошибка"
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст письма")
+    html_body = models.TextField(blank=True, verbose_name="HTML-версия")
+    from_email = models.CharField(max_length=254, blank=True, verbose_name="Отправитель")
+    to = models.JSONField(default=list, verbose_name="Получатели")
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток отправки")
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Следующая попытка"
+    )
+    # Время захвата письма воркером, нужно для возврата "зависших" писем в очередь
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Захвачено")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        ordering = ("-created_at",)
+        indexes = [
+            # Выборка очередной пачки: WHERE status = ... AND next_attempt_at <= now()
+            models.Index(fields=("status", "next_attempt_at"), name="outgoing_email_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)}'
@@ -0,0 +1,272 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых письмо повторяется через новое соединение:
+# сервер закрыл простаивавшее соединение или связь оборвалась
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def enqueue_email(subject, body, to, html_body='', from_email=None):
+    """
+    Ставит письмо в очередь на отправку и возвращает созданную запись.
+
+    Отправка запускается после фиксации текущей транзакции, чтобы воркер
+    не начал разбирать очередь раньше, чем письмо станет видно в БД.
+    """
+    if isinstance(to, str):
+        to = [to]
+    email = OutgoingEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.EMAIL_HOST_USER or '',
+        to=list(to),
+    )
+    schedule_drain()
+    return email
+
+
+def schedule_drain():
+    """
+    Запускает разбор очереди после коммита текущей транзакции.
+
+    Несколько писем в одной транзакции (уведомления поставщикам по заказу)
+    запускают одну задачу: воркер все равно разбирает всю очередь.
+    """
+    if connection.in_atomic_block and any(func is _start_drain for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(_start_drain)
+
+
+def _start_drain():
+    from .tasks import drain_email_queue
+
+    drain_email_queue.delay()
+
+
+class RateLimiter:
+    """
+    Простейший ограничитель скорости: не больше `rate` писем в секунду.
+
+    `rate` <= 0 отключает ограничение.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_allowed = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self._next_allowed:
+            time.sleep(self._next_allowed - now)
+            now = self._next_allowed
+        self._next_allowed = now + self.interval
+
+
+class EmailDispatcher:
+    """
+    Отправляет письма из очереди через одно SMTP-соединение.
+
+    Соединение открывается один раз на процесс воркера и переиспользуется
+    всеми последующими пачками, поэтому TLS-рукопожатие выполняется
+    только при первом письме или после обрыва связи.
+
+    Соединение проверяется командой NOOP только после простоя дольше
+    EMAIL_CONNECTION_IDLE_CHECK секунд: пока письма идут подряд, лишних
+    обменов с сервером нет. Если отправка все же упала из-за разрыва
+    соединения, письмо отправляется еще раз через новое соединение.
+    """
+
+    def __init__(self):
+        self._connection = None
+        # Время последнего обмена с сервером (time.monotonic)
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.rate_limiter = RateLimiter(settings.EMAIL_QUEUE_RATE_LIMIT)
+
+    # --- Соединение ---
+
+    def get_connection(self):
+        if self._connection is not None and (
+            time.monotonic() - self._last_used > settings.EMAIL_CONNECTION_IDLE_CHECK
+            and not self._is_alive(self._connection)
+        ):
+            self.close()
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+            self._last_used = time.monotonic()
+        return self._connection
+
+    @staticmethod
+    def _is_alive(connection):
+        # У SMTP-бэкенда есть открытый smtplib.SMTP в `.connection`,
+        # у консольного/locmem бэкендов проверять нечего.
+        smtp = getattr(connection, 'connection', None)
+        if smtp is None:
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    # --- Очередь ---
+
+    @staticmethod
+    def claim_batch(batch_size, queryset=None):
+        """
+        Захватывает пачку писем, готовых к отправке.
+
+        Строки блокируются с SKIP LOCKED, поэтому несколько воркеров
+        разбирают очередь параллельно, не мешая друг другу. Письма,
+        захваченные упавшим воркером, возвращаются в работу по таймауту.
+        `queryset` позволяет ограничить выборку частью очереди.
+        """
+        if queryset is None:
+            queryset = OutgoingEmail.objects.all()
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.EMAIL_QUEUE_LOCK_TIMEOUT)
+        with transaction.atomic():
+            ids = list(
+                queryset.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=OutgoingEmail.Status.PENDING, next_attempt_at__lte=now)
+                    | Q(status=OutgoingEmail.Status.SENDING, locked_at__lt=stale)
+                )
+                .order_by('next_attempt_at')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            OutgoingEmail.objects.filter(id__in=ids).update(
+                status=OutgoingEmail.Status.SENDING, locked_at=now
+            )
+        return list(OutgoingEmail.objects.filter(id__in=ids).order_by('next_attempt_at'))
+
+    def send_batch(self, emails):
+        """
+        Отправляет захваченную пачку. Возвращает (отправлено, с ошибкой).
+
+        Каждое письмо отправляется отдельно, чтобы ошибка одного адресата
+        не откатывала всю пачку; успешные письма помечаются одним UPDATE.
+        """
+        sent_ids = []
+        failed = 0
+        with self._lock:
+            for email in emails:
+                self.rate_limiter.wait()
+                try:
+                    try:
+                        self._send(email)
+                    except CONNECTION_ERRORS as e:
+                        logger.info('SMTP-соединение разорвано (%s), повтор письма %s', e, email.id)
+                        self.close()
+                        self._send(email)
+                except Exception as e:
+                    # После ошибки SMTP соединение может быть в неопределенном
+                    # состоянии: закрываем его, следующее письмо откроет новое.
+                    self.close()
+                    self._mark_failed(email, e)
+                    failed += 1
+                else:
+                    sent_ids.append(email.id)
+
+        if sent_ids:
+            OutgoingEmail.objects.filter(id__in=sent_ids).update(
+                status=OutgoingEmail.Status.SENT,
+                sent_at=timezone.now(),
+                locked_at=None,
+                last_error='',
+            )
+        return len(sent_ids), failed
+
+    def _send(self, email):
+        connection = self.get_connection()
+        connection.send_messages([self._build_message(email, connection)])
+        self._last_used = time.monotonic()
+
+    def drain(self, batch_size=None, max_batches=None, queryset=None):
+        """
+        Разбирает очередь пачками, пока в ней есть готовые к отправке письма.
+        """
+        batch_size = batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+        total_sent = total_failed = batches = 0
+        while max_batches is None or batches < max_batches:
+            emails = self.claim_batch(batch_size, queryset)
+            if not emails:
+                break
+            sent, failed = self.send_batch(emails)
+            total_sent += sent
+            total_failed += failed
+            batches += 1
+        return total_sent, total_failed
+
+    @staticmethod
+    def _build_message(email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email or None,
+            to=email.to,
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+
+    @staticmethod
+    def _mark_failed(email, error):
+        """
+        Планирует повторную попытку с экспоненциальной задержкой
+        или окончательно помечает письмо как неотправленное.
+        """
+        email.attempts += 1
+        email.last_error = str(error)
+        email.locked_at = None
+        if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+            email.status = OutgoingEmail.Status.FAILED
+            logger.error(
+                'Письмо %s не отправлено после %s попыток: %s',
+                email.id, email.attempts, error,
+            )
+        else:
+            delay = min(
+                settings.EMAIL_QUEUE_RETRY_BACKOFF * 2 ** (email.attempts - 1),
+                settings.EMAIL_QUEUE_RETRY_BACKOFF_MAX,
+            )
+            email.status = OutgoingEmail.Status.PENDING
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            logger.warning(
+                'Ошибка отправки письма %s (попытка %s), повтор через %s с: %s',
+                email.id, email.attempts, delay, error,
+            )
+        email.save(
+            update_fields=['attempts', 'last_error', 'locked_at', 'status', 'next_attempt_at']
+        )
+
+
+# Один диспетчер (и одно SMTP-соединение) на процесс воркера
+dispatcher = EmailDispatcher()
@@ -0,0 +1,11 @@
+from celery.signals import worker_process_shutdown
+
+from .services import dispatcher
+
+
+@worker_process_shutdown.connect
+def close_smtp_connection(**kwargs):
+    """
+    При остановке процесса воркера закрываем его SMTP-соединение.
+    """
+    dispatcher.close()
@@ -0,0 +1,79 @@
+"""
+Локальный SMTP-приемник для нагрузочного тестирования отправки писем.
+
+Принимает письма по SMTP и никуда их не пересылает, только считает.
+Задержка `connect_delay` имитирует стоимость установки соединения
+(TCP + TLS-рукопожатие + авторизация) у реального почтового сервера.
+"""
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        if server.connect_delay:
+            time.sleep(server.connect_delay)
+        server.count_connection()
+        self._reply('220 retail-smtp-sink ready')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip().upper()
+
+            if command.startswith(('EHLO', 'HELO')):
+                self._reply('250 retail-smtp-sink')
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                server.count_message()
+                self._reply('250 OK: queued')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Многопоточный SMTP-сервер, подсчитывающий принятые письма и соединения.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, connect_delay=0.0):
+        super().__init__((host, port), _SMTPHandler)
+        self.connect_delay = connect_delay
+        self.messages = 0
+        self.connections = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count_message(self):
+        with self._counter_lock:
+            self.messages += 1
+
+    def count_connection(self):
+        with self._counter_lock:
+            self.connections += 1
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
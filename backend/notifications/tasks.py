@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from .services import dispatcher
+
+
+@shared_task
+def drain_email_queue():
+    """
+    Асинхронная задача для отправки писем из очереди.
+
+    Запускается после постановки письма в очередь и периодически через
+    Celery beat (для повторных попыток после ошибок).
+    """
+    sent, failed = dispatcher.drain()
+    return f"Отправлено писем: {sent}, с ошибкой: {failed}."
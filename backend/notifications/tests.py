@@ -0,0 +1,101 @@
+import smtplib
+import socket
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from .models import OutgoingEmail
+from .services import EmailDispatcher, enqueue_email
+from .sink import SMTPSink
+
+
+class EnqueueEmailTests(TestCase):
+    """Запуск разбора очереди после постановки писем."""
+
+    def setUp(self):
+        delay = mock.patch('notifications.tasks.drain_email_queue.delay')
+        self.delay = delay.start()
+        self.addCleanup(delay.stop)
+
+    def test_one_drain_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for number in range(3):
+                enqueue_email('Тест', 'Текст', f'client{number}@example.com')
+        self.assertEqual(len(callbacks), 1)
+        self.delay.assert_called_once_with()
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+
+    def test_drain_after_savepoint_rollback(self):
+        # Запуск из отмененной точки сохранения не выполнится - нужен новый
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    enqueue_email('Тест', 'Текст', 'client@example.com')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            enqueue_email('Тест', 'Текст', 'client@example.com')
+        self.delay.assert_called_once_with()
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+
+class EmailDispatcherConnectionTests(TestCase):
+    """Переиспользование SMTP-соединения (через локальный приемник smtp_sink)."""
+
+    def setUp(self):
+        self.sink = SMTPSink()
+        self.sink.start_in_thread()
+        self.addCleanup(self.sink.server_close)
+        self.addCleanup(self.sink.shutdown)
+
+        smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.sink.port,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_QUEUE_RATE_LIMIT=0,
+        )
+        smtp_settings.enable()
+        self.addCleanup(smtp_settings.disable)
+
+        self.dispatcher = EmailDispatcher()
+        self.addCleanup(self.dispatcher.close)
+        noop = mock.patch.object(smtplib.SMTP, 'noop', autospec=True, side_effect=smtplib.SMTP.noop)
+        self.noop = noop.start()
+        self.addCleanup(noop.stop)
+
+    def send(self, count):
+        emails = [
+            OutgoingEmail.objects.create(subject='Тест', body='Текст', to=[f'client{number}@example.com'])
+            for number in range(count)
+        ]
+        result = self.dispatcher.send_batch(emails)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.Status.SENT).exists())
+        return result
+
+    def test_no_noop_while_sending(self):
+        self.assertEqual(self.send(5), (5, 0))
+        self.assertEqual(self.send(5), (5, 0))
+        self.assertEqual(self.sink.connections, 1)
+        self.noop.assert_not_called()
+
+    @override_settings(EMAIL_CONNECTION_IDLE_CHECK=0)
+    def test_noop_after_idle(self):
+        self.assertEqual(self.send(3), (3, 0))
+        # Первое письмо - по новому соединению, перед остальными проверка
+        self.assertEqual(self.noop.call_count, 2)
+        self.assertEqual(self.sink.connections, 1)
+
+    def test_reconnect_after_disconnect(self):
+        self.send(1)
+        # Сервер закрыл соединение, а проверки до простоя не было
+        self.dispatcher._connection.connection.sock.shutdown(socket.SHUT_RDWR)
+        with self.assertLogs('notifications.services', 'INFO'):
+            self.assertEqual(self.send(2), (2, 0))
+        self.assertEqual(self.sink.connections, 2)
+        self.assertEqual(self.sink.messages, 3)
+        self.noop.assert_not_called()
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 
+from config.pagination import EstimatedCountPaginator
+
 from .models import Order, OrderItem
 
 
@@ -12,6 +14,12 @@ class OrderItemAdmin(admin.ModelAdmin):
     Обычно не используется напрямую, а как часть OrderAdmin.
     """
     list_display = ('order', 'product_info', 'quantity')
+    # Связанные объекты, которые выводятся в списке, загружаются одним запросом
+    list_select_related = ('order', 'product_info__product', 'product_info__supplier')
+    raw_id_fields = ('order', 'product_info')
+    # Позиций очень много: вместо COUNT(*) - оценка по статистике PostgreSQL
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class OrderItemInline(admin.TabularInline):
@@ -37,25 +45,63 @@ class OrderAdmin(admin.ModelAdmin):
     )
     # Поля, по которым можно будет кликнуть для перехода к редактированию
     list_display_links = ('id',)
-    
+    # Клиент, пользователь и контакт загружаются вместе с заказами одним запросом
+    list_select_related = ('client__user', 'contact')
+    list_per_page = 50
+
+    # Заказов очень много: вместо COUNT(*) - оценка по статистике PostgreSQL
+    # (config/pagination.py); общее число заказов без фильтров не считается
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Переход по годам, месяцам и дням. Фильтр - диапазон по индексу
+    # order_created_idx, читаются только секции выбранного периода; список
+    # периодов строит тег indexed_date_hierarchy (templates/admin/shop/order)
+    date_hierarchy = 'created_at'
+
     # Фильтрация по статусу и дате создания
     list_filter = ('status', 'created_at')
-    
-    # Поиск по имени клиента и email
-    search_fields = ('client__user__first_name', 'client__user__last_name', 'client__user__email')
-    
+
+    # Поиск по email клиента или номеру заказа, см. get_search_results
+    search_fields = ('client__user__email',)
+    search_help_text = (
+        'Начало email клиента, *часть email (например, *@example.com) или номер заказа'
+    )
+
+    raw_id_fields = ('client', 'contact')
+
     # Включаем inline-модель с позициями заказа
     inlines = [OrderItemInline]
 
     # Добавляем кастомное действие для смены статуса
     actions = ['set_status_processing', 'set_status_shipped', 'set_status_delivered']
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Поиск только по индексируемым условиям (users/migrations/0002):
+
+        - число - номер заказа (первичный ключ);
+        - строка со звездочкой в начале - часть email (индекс pg_trgm);
+        - иначе - начало email (B-tree индекс по UPPER(email)).
+
+        Стандартный поиск админки объединяет через OR несколько полей с
+        icontains, и ни один индекс не помогает - читаются все заказы.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(id=int(term)), False
+        if term.startswith('*'):
+            return queryset.filter(client__user__email__icontains=term.lstrip('*')), False
+        return queryset.filter(client__user__email__istartswith=term), False
+
     def client_link(self, obj):
         """
         Создает кликабельную ссылку на профиль клиента в админке.
         """
         # Получаем URL для страницы редактирования пользователя
-        url = reverse("admin:users_user_change", args=[obj.client.user.id])
+        url = reverse("admin:users_user_change", args=[obj.client.user_id])
         # Формируем HTML-ссылку
         return format_html('<a href="{}">{}</a>', url, obj.client.user.get_full_name())
     
@@ -0,0 +1,188 @@
+"""
+Аналитика продаж поставщиков.
+
+Отчеты (GET /api/v1/supplier/sales/) не группируют позиции заказов на лету:
+они читают предрасчитанные таблицы продаж за день - по поставщику
+(SupplierDailySales), по товару (SupplierProductSales) и по категории
+(SupplierCategorySales). Стоимость отчета зависит от числа дней в
+периоде, а не от числа позиций заказов.
+
+Таблицы обновляет периодическая задача `update_sales_rollups`. Учитываются
+только новые заказы: отметка уровня (SalesRollupState) хранит номер
+последнего учтенного заказа, каждая порция заказов учитывается в одной
+транзакции с переносом отметки. Заказы моложе SALES_ROLLUP_LAG секунд
+не учитываются, пока не станут старше: транзакция оформления заказа могла
+получить номер, но еще не завершиться. Отмена заказа после учета продажи
+не уменьшает: в отчете - оформленные заказы.
+
+Дни считаются в часовом поясе TIME_ZONE.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Order, OrderItem, SalesRollupState, SupplierCategorySales, SupplierDailySales,
+    SupplierProductSales,
+)
+
+ROLLUP_NAME = 'supplier_sales'
+
+# Таблица продаж и поля ее ключа (кроме поставщика и дня)
+ROLLUPS = (
+    (SupplierDailySales, ()),
+    (SupplierProductSales, ('product_id',)),
+    (SupplierCategorySales, ('category_id',)),
+)
+
+
+def aggregate_items(items, *fields):
+    """Выручка, единицы и число заказов по позициям, сгруппированным по `fields`."""
+    return items.values(*fields).annotate(
+        revenue=Sum(F('quantity') * F('price_per_item')),
+        units=Sum('quantity'),
+        orders=Count('order_id', distinct=True),
+    ).order_by()
+
+
+def merge_rollup(model, key_fields, rows):
+    """
+    Прибавляет строки `rows` (словари с полями ключа и показателями)
+    к таблице продаж `model`.
+    """
+    if not rows:
+        return
+    key_fields = ('supplier_id', 'day', *key_fields)
+    existing = {
+        tuple(getattr(obj, field) for field in key_fields): obj
+        for obj in model.objects.filter(
+            supplier_id__in={row['supplier_id'] for row in rows},
+            day__in={row['day'] for row in rows},
+        )
+    }
+    changed, created = [], []
+    for row in rows:
+        obj = existing.get(tuple(row[field] for field in key_fields))
+        if obj is None:
+            created.append(model(**row))
+            continue
+        obj.revenue += row['revenue']
+        obj.units += row['units']
+        obj.orders += row['orders']
+        changed.append(obj)
+    model.objects.bulk_update(changed, ['revenue', 'units', 'orders'])
+    model.objects.bulk_create(created)
+
+
+def rollup_order_batch(batch_size, lag):
+    """
+    Учитывает одну порцию новых заказов (не больше `batch_size`).
+    Возвращает число учтенных заказов.
+    """
+    cutoff = timezone.now() - timedelta(seconds=lag)
+    with transaction.atomic():
+        state, _ = SalesRollupState.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+        # Поиск по первичному ключу (id, created_at) - короткий просмотр
+        # индекса в каждой секции заказов
+        orders = Order.objects.filter(id__gt=state.last_order_id)
+
+        # Заказы берутся строго по порядку номеров: порция заканчивается
+        # перед первым заказом моложе `cutoff`, иначе он был бы пропущен
+        first_fresh = orders.filter(created_at__gte=cutoff).aggregate(id=Min('id'))['id']
+        if first_fresh is not None:
+            orders = orders.filter(id__lt=first_fresh)
+        batch = list(orders.order_by('id').values_list('id', 'created_at')[:batch_size])
+        if not batch:
+            return 0
+        last_id = batch[-1][0]
+        first_created_at = min(created_at for _, created_at in batch)
+        last_created_at = max(created_at for _, created_at in batch)
+
+        # Границы по дате заказа: позиции читаются только из секций порции
+        items = OrderItem.objects.filter(
+            order_id__gt=state.last_order_id,
+            order_id__lte=last_id,
+            order_created_at__gte=first_created_at,
+            order_created_at__lte=last_created_at,
+        ).annotate(
+            supplier_id=F('product_info__supplier_id'),
+            day=TruncDate('order_created_at'),
+            product_id=F('product_info__product_id'),
+            category_id=F('product_info__product__category_id'),
+        )
+        for model, key_fields in ROLLUPS:
+            rows = list(aggregate_items(items, 'supplier_id', 'day', *key_fields))
+            merge_rollup(model, key_fields, rows)
+
+        state.last_order_id = last_id
+        state.last_order_created_at = max(
+            last_created_at, state.last_order_created_at or last_created_at
+        )
+        state.save()
+    return len(batch)
+
+
+def update_sales_rollups(batch_size=None, lag=None, limit=None):
+    """
+    Учитывает новые заказы в таблицах продаж порциями по `batch_size`,
+    не больше `limit` заказов за вызов (если задан). Возвращает число
+    учтенных заказов.
+    """
+    batch_size = batch_size or settings.SALES_ROLLUP_BATCH_SIZE
+    lag = settings.SALES_ROLLUP_LAG if lag is None else lag
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        processed = rollup_order_batch(size, lag)
+        if not processed:
+            break
+        total += processed
+    return total
+
+
+def rebuild_sales_rollups():
+    """Удаляет рассчитанные продажи и сбрасывает отметку уровня."""
+    with transaction.atomic():
+        SalesRollupState.objects.select_for_update().filter(name=ROLLUP_NAME).delete()
+        for model, _ in ROLLUPS:
+            model.objects.all().delete()
+
+
+# Группировки отчета: таблица, поле группировки и название группы
+REPORT_GROUPS = {
+    'day': (SupplierDailySales, 'day', None),
+    'product': (SupplierProductSales, 'product_id', 'product__name'),
+    'category': (SupplierCategorySales, 'category_id', 'category__name'),
+}
+
+
+def sales_report(supplier_id, group_by, date_from, date_to, using=DEFAULT_DB_ALIAS):
+    """
+    Отчет о продажах поставщика за период (включая обе даты): итоги,
+    строки отчета по группировке `group_by` (day, product, category) и
+    момент, до которого учтены заказы.
+    """
+    model, field, name_field = REPORT_GROUPS[group_by]
+    period = {'supplier_id': supplier_id, 'day__gte': date_from, 'day__lte': date_to}
+    figures = {
+        'revenue': Sum('revenue', default=0),
+        'units': Sum('units', default=0),
+        'orders': Sum('orders', default=0),
+    }
+
+    rows = model.objects.using(using).filter(**period)
+    if name_field is None:
+        rows = rows.values(field).annotate(**figures).order_by(field)
+    else:
+        rows = rows.values(field, name=F(name_field)).annotate(**figures).order_by('-revenue', field)
+    totals = SupplierDailySales.objects.using(using).filter(**period).aggregate(**figures)
+    state = SalesRollupState.objects.using(using).filter(name=ROLLUP_NAME).first()
+    return {
+        'totals': totals,
+        'results': list(rows),
+        'up_to': state.last_order_created_at if state else None,
+    }
@@ -1,23 +1,151 @@
+import hashlib
 import json
-from celery import shared_task
-from .models import Product
-from .serializers import ProductSerializer
+import logging
+import tempfile
+import uuid
+from datetime import timedelta
 
-@shared_task
-def export_products_to_json():
+from celery import shared_task, states
+from celery.result import AsyncResult
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from config.db_routing import read_replica
+from .catalog import get_catalog_version
+from .exporters import get_offers_queryset, write_export
+from .models import DeletedOffer
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def export_products(
+    self, supplier_id=None, category_id=None, changed_since=None, export_format='json'
+):
     """
-    Асинхронная задача для экспорта всех товаров в JSON.
+    Асинхронная задача для экспорта товаров.
+
+    Товары выгружаются порциями во временный файл, который затем
+    сохраняется в файловое хранилище (default_storage). Результатом задачи
+    является только ссылка на файл, а не его содержимое.
+
+    Args:
+        supplier_id (int): выгрузить только предложения этого поставщика.
+        category_id (int): выгрузить только товары этой категории.
+        changed_since (str): дата в формате ISO 8601; выгрузить только
+            предложения, измененные начиная с этой даты.
+        export_format (str): формат файла (json, ndjson, csv, yaml).
     """
     try:
-        products = Product.objects.all().prefetch_related(
-            'product_infos__supplier', 
-            'product_infos__parameters__parameter'
-        )
-        serializer = ProductSerializer(products, many=True)
-        json_data = json.dumps(serializer.data, indent=4, ensure_ascii=False)
-        return json_data
+        # Экспорт читает каталог из реплики БД, если она настроена
+        with read_replica(), tempfile.TemporaryFile() as tmp:
+            offers = get_offers_queryset(supplier_id, category_id, changed_since)
+            writer = write_export(tmp, export_format, offers, settings.EXPORT_CHUNK_SIZE)
+            size = tmp.tell()
+            tmp.seek(0)
+            name = default_storage.save(
+                f'{settings.EXPORT_STORAGE_DIR}/products-{self.request.id}.{writer.extension}',
+                File(tmp),
+            )
+        return {
+            'file': name,
+            'filename': f'products.{writer.extension}',
+            'content_type': writer.content_type,
+            'products': writer.count,
+            'size': size,
+            'params': {
+                'supplier': supplier_id,
+                'category': category_id,
+                'changed_since': changed_since,
+                'format': export_format,
+            },
+        }
     except Exception as e:
-        print(f"Ошибка при экспорте товаров в JSON: {e}")
-        return json.dumps(
-            {'error': 'Не удалось выполнить экспорт товаров.', 'details': str(e)}
-        )
\ No newline at end of file
+        logger.exception('Ошибка при экспорте товаров (%s)', export_format)
+        return {'error': 'Не удалось выполнить экспорт товаров.', 'details': str(e)}
+
+
+def _export_cache_key(params):
+    """Ключ экспорта: параметры выгрузки плюс текущая версия каталога."""
+    payload = json.dumps(params, sort_keys=True) + get_catalog_version()
+    return 'export:' + hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _is_reusable(task_id):
+    """
+    Можно ли вернуть клиенту уже запущенную задачу экспорта: она еще
+    выполняется или успешно завершилась и ее файл не удален.
+    """
+    task_result = AsyncResult(task_id)
+    if task_result.state in (states.PENDING, states.RECEIVED, states.STARTED, states.RETRY):
+        return True
+    if task_result.successful():
+        result = task_result.result
+        return (
+            isinstance(result, dict)
+            and 'file' in result
+            and default_storage.exists(result['file'])
+        )
+    return False
+
+
+def start_export(**params):
+    """
+    Запускает экспорт или возвращает уже существующий с теми же параметрами.
+
+    Повторный запрос с теми же параметрами при неизменном каталоге
+    присоединяется к выполняющейся задаче или получает готовый файл,
+    не нагружая воркеры одинаковой работой. Возвращает (task_id, reused).
+    """
+    key = _export_cache_key(params)
+    timeout = settings.EXPORT_FILE_TTL * 3600
+
+    task_id = cache.get(key)
+    if task_id and _is_reusable(task_id):
+        return task_id, True
+
+    new_task_id = str(uuid.uuid4())
+    if task_id:
+        # Прежняя задача упала или ее файл удален: заменяем ее новой.
+        cache.set(key, new_task_id, timeout)
+    elif not cache.add(key, new_task_id, timeout):
+        # Параллельный запрос успел запустить такой же экспорт.
+        concurrent_task_id = cache.get(key)
+        if concurrent_task_id:
+            return concurrent_task_id, True
+        cache.set(key, new_task_id, timeout)
+
+    export_products.apply_async(kwargs=params, task_id=new_task_id)
+    return new_task_id, False
+
+
+@shared_task
+def cleanup_export_files():
+    """
+    Периодическая задача: удаляет файлы экспорта старше EXPORT_FILE_TTL часов.
+    """
+    if not default_storage.exists(settings.EXPORT_STORAGE_DIR):
+        return "Файлов экспорта нет."
+    expire_before = timezone.now() - timedelta(hours=settings.EXPORT_FILE_TTL)
+    _, files = default_storage.listdir(settings.EXPORT_STORAGE_DIR)
+    removed = 0
+    for filename in files:
+        name = f'{settings.EXPORT_STORAGE_DIR}/{filename}'
+        if default_storage.get_modified_time(name) < expire_before:
+            default_storage.delete(name)
+            removed += 1
+    return f"Удалено файлов экспорта: {removed}."
+
+
+@shared_task
+def cleanup_deleted_offers():
+    """
+    Периодическая задача: удаляет записи об удаленных предложениях
+    старше EXPORT_DELETED_OFFERS_TTL дней.
+    """
+    expire_before = timezone.now() - timedelta(days=settings.EXPORT_DELETED_OFFERS_TTL)
+    removed, _ = DeletedOffer.objects.filter(deleted_at__lt=expire_before).delete()
+    return f"Удалено записей об удаленных предложениях: {removed}."
@@ -0,0 +1,93 @@
+"""
+Архивация закрытых заказов.
+
+Доставленные и отмененные заказы старше ORDER_ARCHIVE_AFTER_MONTHS месяцев
+переносятся из секционированных таблиц заказов в таблицу ArchivedOrder:
+заказ с позициями сохраняется одной сжатой записью в том виде, в каком его
+отдает API. Клиент по-прежнему видит такие заказы: GET /api/v1/orders/
+с параметром `archived=true` и GET /api/v1/orders/{id}/.
+
+Опустевшие старые секции удаляются отдельно (shop.partitions.drop_empty_partitions).
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import ArchivedOrder, Order, OrderItem
+from .partitions import add_months, month_bound, month_start
+
+CLOSED_STATUSES = (Order.OrderStatus.DELIVERED, Order.OrderStatus.CANCELED)
+
+
+def get_archive_cutoff(months=None, today=None):
+    """
+    Заказы, созданные раньше этого момента, архивируются. Граница - начало
+    месяца, чтобы старые секции освобождались целиком.
+    """
+    if months is None:
+        months = settings.ORDER_ARCHIVE_AFTER_MONTHS
+    current = month_start(today or datetime.now(timezone.utc))
+    return month_bound(add_months(current, -months))
+
+
+def archive_order_batch(cutoff, batch_size):
+    """
+    Архивирует одну порцию закрытых заказов старше `cutoff` в одной
+    транзакции. Возвращает число перенесенных заказов.
+    """
+    from .serializers import OrderSerializer
+
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(status__in=CLOSED_STATUSES, created_at__lt=cutoff)
+            .order_by('created_at')[:batch_size]
+        )
+        if not orders:
+            return 0
+        order_ids = [order.id for order in orders]
+        items = OrderItem.objects.filter(order_created_at__lt=cutoff).select_related(
+            'product_info__product'
+        )
+        # Позиции читаются только из секций до `cutoff`
+        orders = list(
+            Order.objects.filter(id__in=order_ids, created_at__lt=cutoff)
+            .prefetch_related(Prefetch('items', queryset=items))
+            .order_by('created_at')
+        )
+
+        archived = []
+        for order in orders:
+            archived_order = ArchivedOrder(
+                id=order.id,
+                client_id=order.client_id,
+                status=order.status,
+                created_at=order.created_at,
+            )
+            archived_order.set_data(OrderSerializer(order).data)
+            archived.append(archived_order)
+        ArchivedOrder.objects.bulk_create(archived, ignore_conflicts=True)
+
+        OrderItem.objects.filter(order_id__in=order_ids, order_created_at__lt=cutoff).delete()
+        Order.objects.filter(id__in=order_ids, created_at__lt=cutoff).delete()
+    return len(orders)
+
+
+def archive_closed_orders(months=None, batch_size=None, limit=None):
+    """
+    Архивирует закрытые заказы старше `months` месяцев порциями по
+    `batch_size`, не больше `limit` заказов за вызов (если задан).
+    Возвращает число перенесенных заказов.
+    """
+    cutoff = get_archive_cutoff(months)
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        archived = archive_order_batch(cutoff, size)
+        if not archived:
+            break
+        total += archived
+    return total
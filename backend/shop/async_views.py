@@ -0,0 +1,127 @@
+"""
+Асинхронные представления DRF.
+
+DRF 3.14 не поддерживает async-обработчики, поэтому здесь переопределен
+`dispatch`: аутентификация и проверка прав выполняются синхронно
+(через sync_to_async), а сами обработчики (`async def get`, `list`,
+`retrieve`) используют асинхронный ORM Django. Под ASGI (config.asgi)
+такой обработчик не занимает поток на время ожидания БД или Redis.
+
+Сериализация выполняется в цикле событий, поэтому все связанные объекты
+должны быть загружены заранее (select_related / prefetch_related):
+обращение к незагруженной связи вызовет SynchronousOnlyOperation.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.viewsets import GenericViewSet
+
+
+class AsyncDispatchMixin:
+    """Асинхронный `dispatch` для APIView и ViewSet."""
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super().as_view(*args, **initkwargs)
+        # Django вызывает представление как корутину только с этой пометкой
+        return markcoroutinefunction(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Аутентификация (кэш, БД), права доступа и ограничения частоты
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if iscoroutinefunction(handler):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncDispatchMixin, APIView):
+    """APIView с асинхронными обработчиками (`async def get` и т.д.)."""
+
+
+class AsyncReadOnlyModelViewSet(AsyncDispatchMixin, GenericViewSet):
+    """
+    Асинхронный аналог ReadOnlyModelViewSet: действия `list` и `retrieve`.
+
+    Фильтры (filter_backends) должны только строить запрос, не обращаясь
+    к БД: они вызываются в цикле событий.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    async def aget_object(self):
+        """Асинхронный get_object()."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """
+        Асинхронный аналог PageNumberPagination.paginate_queryset():
+        количество и страница объектов загружаются асинхронным ORM.
+        """
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        page_size = paginator.get_page_size(self.request)
+        if not page_size:
+            return None
+
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        # Paginator.count - cached_property, заполняем его заранее
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(self.request, django_paginator)
+        try:
+            page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                paginator.invalid_page_message.format(page_number=page_number, message=str(exc))
+            )
+        page.object_list = [obj async for obj in page.object_list]
+
+        paginator.page = page
+        paginator.request = self.request
+        if django_paginator.num_pages > 1 and paginator.template is not None:
+            paginator.display_page_controls = True
+        return page.object_list
@@ -0,0 +1,456 @@
+"""
+Генератор синтетических данных для бенчмарков (команда `bench_data`).
+
+Создает поставщиков, клиентов (с контактом и корзиной), категории,
+параметры, товары с предложениями нескольких поставщиков, их параметры
+и историю цен, а также историю заказов за последние `days` дней с
+частями заказов по поставщикам. Все записи создаются через bulk_create
+порциями по BATCH_SIZE, каждая порция - в своей транзакции; товары и
+заказы генерируются порциями, поэтому память не растет с размером набора.
+
+Набор данных помечается меткой (`tag`): пользователи получают email
+вида bench-<метка>-supplier-<n>@example.com, по нему сценарии бенчмарка
+(shop/bench_scenarios.py) находят свой набор. Генерация детерминирована
+при одинаковом `seed`.
+
+Здесь же - генератор прайс-листов во всех форматах загрузки
+(shop/importers.py) для команд `bench_pricelist`, `bench_import` и
+`bench_parse`.
+"""
+import csv
+import io
+import json
+import random
+from contextlib import contextmanager
+from itertools import islice
+from datetime import timedelta
+from decimal import Decimal
+
+import yaml
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from shop.catalog import bump_catalog_version
+from shop.importers import PRICELIST_COLUMNS
+from shop.models import (
+    Cart, Category, Order, OrderItem, Parameter, PriceHistory, Product, ProductInfo,
+    ProductParameter, SupplierOrder, normalize_product_name,
+)
+from shop.reference import bump_reference_version
+from users.models import Client, Contact, Supplier, User
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow - необязательная зависимость
+    pyarrow = None
+
+BATCH_SIZE = 1000
+# Пароль всех пользователей набора данных
+BENCH_PASSWORD = 'bench-password'
+
+KINDS = (
+    'Смартфон', 'Ноутбук', 'Телевизор', 'Наушники', 'Планшет', 'Монитор', 'Часы',
+    'Колонка', 'Фотоаппарат', 'Роутер', 'Клавиатура', 'Мышь', 'Принтер', 'Пылесос',
+)
+BRANDS = (
+    'Apple', 'Samsung', 'Xiaomi', 'Sony', 'LG', 'Huawei', 'Lenovo', 'Asus', 'Acer',
+    'Philips', 'Canon', 'Logitech', 'HP', 'Dyson',
+)
+PARAMETER_NAMES = (
+    'Цвет', 'Вес', 'Материал', 'Гарантия', 'Память', 'Диагональ', 'Разрешение',
+    'Процессор', 'Объем аккумулятора', 'Страна производства', 'Интерфейс', 'Мощность',
+)
+COLORS = ('черный', 'белый', 'серый', 'синий', 'красный', 'зеленый', 'золотой')
+
+# Статусы заказов и их доли в истории заказов
+ORDER_STATUSES = (
+    (Order.OrderStatus.DELIVERED, 70),
+    (Order.OrderStatus.CANCELED, 8),
+    (Order.OrderStatus.SHIPPED, 8),
+    (Order.OrderStatus.PROCESSING, 7),
+    (Order.OrderStatus.NEW, 7),
+)
+
+# id категорий в генерируемых прайс-листах. Импорт переименовывает
+# категорию с id из файла, поэтому id не пересекаются с id каталога
+PRICELIST_CATEGORY_ID_START = 900_000
+# Сериализатор libyaml, если PyYAML собран с ним (в несколько раз быстрее)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def user_email(tag, role, number):
+    return f'bench-{tag}-{role}-{number}@example.com'
+
+
+def user_email_prefix(tag, role):
+    return f'bench-{tag}-{role}-'
+
+
+def batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@contextmanager
+def explicit_created_at(model):
+    """
+    Позволяет задать `created_at` при bulk_create: поле с auto_now_add
+    иначе получает текущее время.
+    """
+    field = model._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def random_price(rng):
+    """Цена с логнормальным распределением (медиана около 3000)."""
+    return Decimal(min(rng.lognormvariate(8, 1), 9_999_999)).quantize(Decimal('0.01'))
+
+
+def parameter_value(rng, name):
+    if name == 'Цвет':
+        return rng.choice(COLORS)
+    return str(rng.randint(1, 500))
+
+
+def parameter_names(count):
+    return [
+        PARAMETER_NAMES[number] if number < len(PARAMETER_NAMES) else f'Параметр {number}'
+        for number in range(count)
+    ]
+
+
+def create_users(tag, role, count, password):
+    """Создает пользователей роли `role`. Возвращает список пользователей."""
+    users = []
+    for numbers in batches(range(1, count + 1)):
+        with transaction.atomic():
+            users += User.objects.bulk_create([
+                User(
+                    email=user_email(tag, role, number),
+                    username=user_email(tag, role, number),
+                    password=password,
+                    user_type=role,
+                    first_name=role.capitalize(),
+                    last_name=str(number),
+                )
+                for number in numbers
+            ])
+    return users
+
+
+def generate_dataset(
+    tag, suppliers=20, products=5000, parameters=50, categories=20, offers_per_product=3,
+    parameters_per_offer=5, clients=200, orders=20000, items_per_order=3, days=365, seed=1,
+    log=None,
+):
+    """
+    Создает набор данных с меткой `tag` (см. описание модуля).
+    `log` - функция для вывода хода генерации. Возвращает количество
+    созданных записей по моделям.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    now = timezone.now()
+    counts = {}
+    password = make_password(BENCH_PASSWORD)
+
+    # 1. Поставщики и клиенты (профили, контакты, корзины)
+    supplier_users = create_users(tag, User.UserType.SUPPLIER, suppliers, password)
+    client_users = create_users(tag, User.UserType.CLIENT, clients, password)
+    supplier_ids, client_contacts = [], []
+    for users in batches(supplier_users):
+        with transaction.atomic():
+            supplier_ids += [
+                supplier.id for supplier in Supplier.objects.bulk_create([
+                    Supplier(user=user, name=f'Bench {tag} {user.last_name}') for user in users
+                ])
+            ]
+    for users in batches(client_users):
+        with transaction.atomic():
+            profiles = Client.objects.bulk_create([Client(user=user) for user in users])
+            Cart.objects.bulk_create([Cart(client=profile) for profile in profiles])
+            contacts = Contact.objects.bulk_create([
+                Contact(
+                    client=profile,
+                    first_name=user.first_name,
+                    last_name=user.last_name,
+                    email=user.email,
+                    phone_number=f'+7900{rng.randint(1000000, 9999999)}',
+                    address='Бенчмарк',
+                    city=rng.choice(('Москва', 'Казань', 'Пермь', 'Самара')),
+                    street='Тестовая',
+                    house=str(rng.randint(1, 200)),
+                )
+                for profile, user in zip(profiles, users)
+            ])
+            client_contacts += [(contact.client_id, contact.id) for contact in contacts]
+    counts['suppliers'] = len(supplier_ids)
+    counts['clients'] = len(client_contacts)
+    log(f'Поставщики: {suppliers}, клиенты: {clients}')
+
+    # 2. Справочники
+    with transaction.atomic():
+        category_ids = [
+            category.id for category in Category.objects.bulk_create([
+                Category(name=f'{KINDS[number % len(KINDS)]} {tag} {number}')
+                for number in range(categories)
+            ])
+        ]
+        parameter_objs = Parameter.objects.bulk_create([
+            Parameter(name=name) for name in parameter_names(parameters)
+        ])
+    counts['categories'] = len(category_ids)
+    counts['parameters'] = len(parameter_objs)
+
+    # 3. Товары, предложения, их параметры и история цен
+    offers = []  # (id, supplier_id, цена) - для позиций заказов
+    external_ids = dict.fromkeys(supplier_ids, 0)
+    counts.update(products=0, offers=0, product_parameters=0)
+    for numbers in batches(range(1, products + 1)):
+        with transaction.atomic():
+            names = [f'{rng.choice(KINDS)} {rng.choice(BRANDS)} {tag.upper()}-{number}' for number in numbers]
+            batch = Product.objects.bulk_create([
+                Product(name=name, name_key=normalize_product_name(name), category_id=rng.choice(category_ids))
+                for name in names
+            ])
+            product_infos = []
+            for product in batch:
+                for supplier_id in rng.sample(supplier_ids, min(offers_per_product, len(supplier_ids))):
+                    external_ids[supplier_id] += 1
+                    product_infos.append(ProductInfo(
+                        product=product,
+                        supplier_id=supplier_id,
+                        external_id=external_ids[supplier_id],
+                        price=random_price(rng),
+                        quantity=rng.randint(0, 500),
+                    ))
+            ProductInfo.objects.bulk_create(product_infos)
+            product_parameters = [
+                ProductParameter(
+                    product_info=product_info,
+                    parameter=parameter,
+                    value=parameter_value(rng, parameter.name),
+                )
+                for product_info in product_infos
+                for parameter in rng.sample(parameter_objs, min(parameters_per_offer, len(parameter_objs)))
+            ]
+            ProductParameter.objects.bulk_create(product_parameters, batch_size=BATCH_SIZE)
+            PriceHistory.objects.bulk_create([
+                PriceHistory(
+                    recorded_at=now - timedelta(days=days),
+                    product_info=product_info,
+                    quantity=product_info.quantity,
+                    price=product_info.price,
+                )
+                for product_info in product_infos
+            ], batch_size=BATCH_SIZE)
+        offers += [(offer.id, offer.supplier_id, offer.price) for offer in product_infos]
+        counts['products'] += len(batch)
+        counts['offers'] += len(product_infos)
+        counts['product_parameters'] += len(product_parameters)
+        log(f'Товары: {counts["products"]} из {products}')
+
+    # 4. История заказов: по времени, чтобы номера заказов росли вместе с датой
+    statuses, weights = zip(*ORDER_STATUSES)
+    moments = sorted(now - timedelta(seconds=rng.uniform(0, days * 86400)) for _ in range(orders))
+    counts.update(orders=0, supplier_orders=0, order_items=0)
+    for batch_moments in batches(moments):
+        with transaction.atomic(), explicit_created_at(Order):
+            contacts = [rng.choice(client_contacts) for _ in batch_moments]
+            batch = Order.objects.bulk_create([
+                Order(
+                    client_id=client_id,
+                    contact_id=contact_id,
+                    created_at=created_at,
+                    status=rng.choices(statuses, weights)[0],
+                    admin_notified_at=created_at,
+                )
+                for created_at, (client_id, contact_id) in zip(batch_moments, contacts)
+            ])
+            order_lines = {
+                order: rng.sample(offers, rng.randint(1, min(items_per_order, len(offers))))
+                for order in batch
+            }
+            supplier_orders = SupplierOrder.objects.bulk_create([
+                SupplierOrder(
+                    order=order,
+                    order_created_at=order.created_at,
+                    supplier_id=supplier_id,
+                    status=order.status,
+                    notified_at=order.created_at,
+                )
+                for order, lines in order_lines.items()
+                for supplier_id in sorted({supplier_id for _, supplier_id, _ in lines})
+            ])
+            by_key = {
+                (supplier_order.order_id, supplier_order.supplier_id): supplier_order
+                for supplier_order in supplier_orders
+            }
+            items = OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    order_created_at=order.created_at,
+                    supplier_order=by_key[order.id, supplier_id],
+                    product_info_id=offer_id,
+                    quantity=rng.randint(1, 3),
+                    price_per_item=price,
+                )
+                for order, lines in order_lines.items()
+                for offer_id, supplier_id, price in lines
+            ])
+        counts['orders'] += len(batch)
+        counts['supplier_orders'] += len(supplier_orders)
+        counts['order_items'] += len(items)
+        log(f'Заказы: {counts["orders"]} из {orders}')
+
+    # bulk_create не отправляет сигналы post_save
+    bump_catalog_version()
+    bump_reference_version()
+    return counts
+
+
+def pricelist_goods(goods, parameters_per_item=5, parameters=50, categories=20, changes=(), seed=1):
+    """
+    Товары прайс-листа (генератор). Название, категория и параметры
+    товара зависят только от его номера и `seed`; `changes` - доли товаров
+    с новой ценой и остатком в каждой следующей загрузке. Так версия файла
+    создается без предыдущей версии в памяти, а товары двух соседних
+    версий отличаются в доле `changes[-1]` товаров.
+    """
+    names = parameter_names(parameters)
+    for number in range(1, goods + 1):
+        rng = random.Random(f'{seed}:{number}')
+        item = {
+            'id': number,
+            'category': PRICELIST_CATEGORY_ID_START + rng.randrange(categories),
+            'name': f'{rng.choice(KINDS)} {rng.choice(BRANDS)} PL-{number}',
+            'price': float(random_price(rng)),
+            'quantity': rng.randint(0, 500),
+            'parameters': {
+                name: parameter_value(rng, name)
+                for name in rng.sample(names, min(parameters_per_item, len(names)))
+            },
+        }
+        for step, ratio in enumerate(changes, start=1):
+            step_rng = random.Random(f'{seed}:{number}:{step}')
+            if step_rng.random() < ratio:
+                item['price'] = float(random_price(step_rng))
+                item['quantity'] = step_rng.randint(0, 500)
+        yield item
+
+
+def pricelist_category_name(category_id):
+    number = category_id - PRICELIST_CATEGORY_ID_START
+    return f'{KINDS[number % len(KINDS)]} PL-{number}'
+
+
+def pricelist_rows(goods):
+    """Строки табличного прайс-листа (колонки PRICELIST_COLUMNS) для товаров."""
+    for item in goods:
+        yield {**item, 'category_name': pricelist_category_name(item['category'])}
+
+
+def write_yaml_pricelist(fileobj, shop_name, goods, categories=20):
+    """
+    Пишет YAML-прайс-лист (shop / categories / goods) порциями по
+    BATCH_SIZE товаров из итератора `goods`. Возвращает число товаров.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8')
+
+    def dump(data):
+        text.write(yaml.dump(
+            data, Dumper=YAML_DUMPER, allow_unicode=True, sort_keys=False, default_flow_style=False
+        ))
+
+    dump({'shop': shop_name})
+    dump({'categories': [
+        {'id': category_id, 'name': pricelist_category_name(category_id)}
+        for category_id in range(PRICELIST_CATEGORY_ID_START, PRICELIST_CATEGORY_ID_START + categories)
+    ]})
+    text.write('goods:\n')
+    count = 0
+    goods = iter(goods)
+    while chunk := list(islice(goods, BATCH_SIZE)):
+        dump(chunk)
+        count += len(chunk)
+    if not count:
+        text.write('[]\n')
+    text.detach()
+    return count
+
+
+def write_csv_pricelist(fileobj, shop_name, goods, categories=20):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(PRICELIST_COLUMNS)
+    count = 0
+    for row in pricelist_rows(goods):
+        writer.writerow([
+            json.dumps(row[column], ensure_ascii=False) if column == 'parameters' else row[column]
+            for column in PRICELIST_COLUMNS
+        ])
+        count += 1
+    text.detach()
+    return count
+
+
+def write_ndjson_pricelist(fileobj, shop_name, goods, categories=20):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8')
+    count = 0
+    for row in pricelist_rows(goods):
+        text.write(json.dumps(row, ensure_ascii=False) + '\n')
+        count += 1
+    text.detach()
+    return count
+
+
+def pricelist_arrow_schema():
+    return pyarrow.schema([
+        ('id', pyarrow.int64()),
+        ('category', pyarrow.int64()),
+        ('category_name', pyarrow.string()),
+        ('name', pyarrow.string()),
+        ('price', pyarrow.float64()),
+        ('quantity', pyarrow.int64()),
+        ('parameters', pyarrow.map_(pyarrow.string(), pyarrow.string())),
+    ])
+
+
+def _write_arrow_batches(writer, schema, goods):
+    count = 0
+    rows = pricelist_rows(goods)
+    while chunk := list(islice(rows, BATCH_SIZE)):
+        for row in chunk:
+            row['parameters'] = list(row['parameters'].items())
+        writer.write_batch(pyarrow.RecordBatch.from_pylist(chunk, schema=schema))
+        count += len(chunk)
+    return count
+
+
+def write_arrow_pricelist(fileobj, shop_name, goods, categories=20):
+    schema = pricelist_arrow_schema()
+    with pyarrow.ipc.new_file(fileobj, schema) as writer:
+        return _write_arrow_batches(writer, schema, goods)
+
+
+def write_parquet_pricelist(fileobj, shop_name, goods, categories=20):
+    schema = pricelist_arrow_schema()
+    with pyarrow.parquet.ParquetWriter(fileobj, schema) as writer:
+        return _write_arrow_batches(writer, schema, goods)
+
+
+# Писатели прайс-листов по форматам загрузки: (файл, магазин, товары, категории)
+PRICELIST_WRITERS = {
+    'yaml': write_yaml_pricelist,
+    'csv': write_csv_pricelist,
+    'ndjson': write_ndjson_pricelist,
+}
+if pyarrow is not None:
+    PRICELIST_WRITERS.update(arrow=write_arrow_pricelist, parquet=write_parquet_pricelist)
@@ -0,0 +1,303 @@
+"""
+Сценарии бенчмарка (команда `bench`).
+
+Сценарий выполняет одну операцию API или фоновой задачи на наборе
+данных, созданном командой `bench_data` (shop/bench_data.py). Запросы
+к API выполняются в том же процессе через тестовый клиент DRF, без
+сети и сервера приложений: замеряется код представлений, сериализаторов
+и запросов к БД. Параллельную нагрузку по HTTP замеряет команда `loadtest`.
+
+У сценария три шага:
+
+- `setup` - один раз перед прогоном (выбор поставщика, загрузка id);
+- `prepare` - перед каждой итерацией, не замеряется (наполнение
+  корзины перед оформлением заказа, изменение цен в прайс-листе);
+- `run` - замеряемая операция, возвращает True при успехе.
+
+По каждому сценарию считаются перцентили задержки, число запросов к БД
+(по всем подключениям) и пропускная способность.
+"""
+import random
+import statistics
+import tempfile
+import time
+from contextlib import ExitStack
+
+import yaml
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from metrics.management.commands.loadtest import percentile
+from users.models import Contact, Supplier, User
+from users.serializers import CustomTokenObtainPairSerializer
+
+from .bench_data import BRANDS, KINDS, user_email_prefix
+from .exporters import get_offers_queryset, write_export
+from .models import CartItem, Category, Product, ProductInfo
+from .tasks import process_pricelist_upload
+
+API_PREFIX = '/api/v1/'
+
+SCENARIOS = {}
+
+
+def register_scenario(scenario_class):
+    """Регистрирует сценарий под его именем."""
+    SCENARIOS[scenario_class.name] = scenario_class
+    return scenario_class
+
+
+class BenchContext:
+    """
+    Набор данных с меткой `tag`: поставщики, клиенты с контактами и
+    предложения активных поставщиков. Выдает API-клиентов с JWT.
+    """
+
+    def __init__(self, tag, seed=1):
+        self.tag = tag
+        self.rng = random.Random(seed)
+        self.supplier_users = list(
+            User.objects.filter(email__startswith=user_email_prefix(tag, User.UserType.SUPPLIER))
+            .select_related('supplier_profile')
+            .order_by('id')
+        )
+        self.client_users = list(
+            User.objects.filter(email__startswith=user_email_prefix(tag, User.UserType.CLIENT))
+            .select_related('client_profile')
+            .order_by('id')
+        )
+        contacts = Contact.objects.filter(client__user__in=self.client_users).values_list('client_id', 'id')
+        self.contacts = dict(contacts)
+        self.offer_ids = list(
+            ProductInfo.objects.filter(
+                supplier__user__in=self.supplier_users, supplier__is_active=True, quantity__gt=0
+            ).order_by('id').values_list('id', flat=True)
+        )
+        self._api_clients = {}
+
+    @property
+    def is_empty(self):
+        return not (self.supplier_users and self.client_users and self.offer_ids)
+
+    def api_client(self, user=None):
+        """API-клиент анонимного пользователя или `user` (с access-токеном)."""
+        key = user.id if user is not None else None
+        if key not in self._api_clients:
+            api_client = APIClient()
+            if user is not None:
+                token = CustomTokenObtainPairSerializer.get_token(user).access_token
+                api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self._api_clients[key] = api_client
+        return self._api_clients[key]
+
+    def random_client(self):
+        return self.rng.choice(self.client_users)
+
+    def active_supplier_user(self):
+        """Первый активный поставщик набора данных."""
+        for user in self.supplier_users:
+            if Supplier.objects.filter(id=user.supplier_profile.id, is_active=True).exists():
+                return user
+        return None
+
+
+class Scenario:
+    name = None
+    description = ''
+
+    def setup(self, context):
+        pass
+
+    def prepare(self, context):
+        pass
+
+    def run(self, context):
+        raise NotImplementedError
+
+
+class APIScenario(Scenario):
+    """Сценарий из одного запроса к API; успех - ответ с кодом 2xx."""
+
+    def request(self, context):
+        """Возвращает ответ API."""
+        raise NotImplementedError
+
+    def run(self, context):
+        return 200 <= self.request(context).status_code < 300
+
+
+@register_scenario
+class ProductListScenario(APIScenario):
+    name = 'products.list'
+    description = 'Каталог: случайная страница списка товаров'
+
+    def setup(self, context):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        self.pages = max(1, -(-Product.objects.count() // page_size))
+
+    def request(self, context):
+        page = context.rng.randint(1, self.pages)
+        return context.api_client().get(f'{API_PREFIX}products/', {'page': page})
+
+
+@register_scenario
+class ProductSearchScenario(APIScenario):
+    name = 'products.search'
+    description = 'Каталог: поиск по названию (вид товара или бренд)'
+
+    def request(self, context):
+        query = context.rng.choice((context.rng.choice(KINDS), context.rng.choice(BRANDS)))
+        return context.api_client().get(f'{API_PREFIX}products/', {'search': query})
+
+
+@register_scenario
+class ProductCategoryScenario(APIScenario):
+    name = 'products.category'
+    description = 'Каталог: товары случайной категории'
+
+    def setup(self, context):
+        self.category_ids = list(Category.objects.values_list('id', flat=True))
+
+    def request(self, context):
+        category_id = context.rng.choice(self.category_ids)
+        return context.api_client().get(f'{API_PREFIX}products/', {'category': category_id})
+
+
+@register_scenario
+class ProductRetrieveScenario(APIScenario):
+    name = 'products.retrieve'
+    description = 'Каталог: карточка случайного товара'
+
+    def setup(self, context):
+        self.product_ids = list(
+            ProductInfo.objects.filter(id__in=context.offer_ids).values_list('product_id', flat=True).distinct()
+        )
+
+    def request(self, context):
+        product_id = context.rng.choice(self.product_ids)
+        return context.api_client().get(f'{API_PREFIX}products/{product_id}/')
+
+
+@register_scenario
+class CartAddScenario(APIScenario):
+    name = 'cart.add'
+    description = 'Корзина: добавление товара в пустую корзину'
+
+    def prepare(self, context):
+        self.user = context.random_client()
+        CartItem.objects.filter(cart__client=self.user.client_profile).delete()
+
+    def request(self, context):
+        return context.api_client(self.user).post(
+            f'{API_PREFIX}cart/',
+            {'product_info': context.rng.choice(context.offer_ids), 'quantity': 1},
+            format='json',
+        )
+
+
+@register_scenario
+class CheckoutScenario(APIScenario):
+    name = 'checkout'
+    description = 'Оформление заказа из корзины с тремя товарами'
+    items = 3
+
+    def prepare(self, context):
+        self.user = context.random_client()
+        cart = self.user.client_profile.cart
+        cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_info_id=offer_id, quantity=context.rng.randint(1, 3))
+            for offer_id in context.rng.sample(context.offer_ids, min(self.items, len(context.offer_ids)))
+        ])
+
+    def request(self, context):
+        return context.api_client(self.user).post(
+            f'{API_PREFIX}order/',
+            {'contact_id': context.contacts[self.user.client_profile.id]},
+            format='json',
+        )
+
+
+@register_scenario
+class PriceListImportScenario(Scenario):
+    name = 'pricelist.import'
+    description = 'Импорт прайс-листа поставщика, изменены цены 10% товаров'
+    changed_share = 0.1
+
+    def setup(self, context):
+        self.user = context.active_supplier_user()
+        offers = get_offers_queryset(supplier_id=self.user.supplier_profile.id)
+        with tempfile.TemporaryFile() as tmp:
+            write_export(tmp, 'yaml', offers, settings.EXPORT_CHUNK_SIZE)
+            tmp.seek(0)
+            self.content = yaml.safe_load(tmp)
+
+    def prepare(self, context):
+        goods = self.content['goods']
+        for item in context.rng.sample(goods, max(1, int(len(goods) * self.changed_share))):
+            item['price'] = float(item['price']) + context.rng.choice((-1, 1))
+        self.data = yaml.safe_dump(self.content, allow_unicode=True, sort_keys=False)
+
+    def run(self, context):
+        # Задача выполняется в текущем процессе, без брокера
+        result = process_pricelist_upload(self.data, self.user.id)
+        return not result.startswith('Ошибка')
+
+
+@register_scenario
+class ExportScenario(Scenario):
+    name = 'export'
+    description = 'Экспорт предложений поставщика в JSON'
+
+    def setup(self, context):
+        self.offers = get_offers_queryset(supplier_id=context.supplier_users[0].supplier_profile.id)
+
+    def run(self, context):
+        with tempfile.TemporaryFile() as tmp:
+            writer = write_export(tmp, 'json', self.offers, settings.EXPORT_CHUNK_SIZE)
+        return writer.count > 0
+
+
+def run_scenario(scenario, context, iterations, warmup):
+    """
+    Прогон сценария: `warmup` итераций без учета, затем `iterations`
+    замеряемых. Возвращает словарь с результатами.
+    """
+    scenario.setup(context)
+    latencies, query_counts, errors = [], [], 0
+    for number in range(warmup + iterations):
+        scenario.prepare(context)
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()
+            ]
+            started = time.perf_counter()
+            ok = scenario.run(context)
+            elapsed = time.perf_counter() - started
+        if number < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        query_counts.append(sum(len(queries) for queries in captured))
+        errors += not ok
+    latencies.sort()
+    total_seconds = sum(latencies) / 1000
+    return {
+        'scenario': scenario.name,
+        'description': scenario.description,
+        'iterations': iterations,
+        'errors': errors,
+        'throughput_per_sec': round(iterations / total_seconds, 1) if total_seconds else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies), 2) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0.0,
+        },
+        'queries': {
+            'mean': round(statistics.mean(query_counts), 1) if query_counts else 0.0,
+            'max': max(query_counts, default=0),
+        },
+    }
@@ -0,0 +1,48 @@
+"""
+Версия каталога товаров.
+
+Версия хранится в общем кэше (Redis) и меняется при любом изменении
+товаров, предложений, параметров, категорий или поставщиков. По ней
+определяется, можно ли переиспользовать ранее построенные результаты
+(например, файлы экспорта).
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def get_catalog_version():
+    """
+    Возвращает текущую версию каталога.
+
+    Версия - случайная строка, а не счетчик: если ключ будет вытеснен
+    из кэша, новая версия гарантированно не совпадет ни с одной прежней.
+    """
+    return cache.get_or_set(CATALOG_VERSION_KEY, _new_version, timeout=None)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _set_new_version():
+    cache.set(CATALOG_VERSION_KEY, _new_version(), timeout=None)
+
+
+def bump_catalog_version():
+    """
+    Меняет версию каталога после фиксации текущей транзакции.
+
+    Внутри транзакции обновление регистрируется один раз, сколько бы
+    строк ни было изменено (импорт прайс-листа меняет тысячи строк).
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _set_new_version()
+        return
+    if any(func is _set_new_version for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(_set_new_version)
@@ -0,0 +1,343 @@
+"""
+Экспорт каталога в разные форматы.
+
+Все форматы читают данные из БД через один общий генератор
+`iter_offer_chunks`: он выбирает предложения поставщиков порциями через
+`.values()` (без создания экземпляров моделей) и подгружает их параметры
+одним запросом на порцию. Форматы реализуются классами-писателями,
+зарегистрированными через `register_writer`.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+import yaml
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .importers import PRICELIST_COLUMNS
+from .models import Category, DeletedOffer, ProductInfo, ProductParameter
+from .reference import category_name, parameter_name
+
+# Поля предложения, выбираемые из БД
+OFFER_FIELDS = {
+    'id': 'id',
+    'external_id': 'external_id',
+    'product_id': 'product_id',
+    'name': 'product__name',
+    'category': 'product__category_id',
+    'supplier_id': 'supplier_id',
+    'supplier': 'supplier__name',
+    'price': 'price',
+    'quantity': 'quantity',
+}
+
+# Колонки CSV и NDJSON: сначала колонки табличного прайс-листа загрузки
+# (shop/importers.py, `id` - внешний ID предложения у поставщика), затем
+# ID предложения, товара и поставщика в каталоге
+TABULAR_COLUMNS = PRICELIST_COLUMNS + ('offer_id', 'product_id', 'supplier_id', 'supplier')
+
+
+def get_offers_queryset(supplier_id=None, category_id=None, changed_since=None):
+    """
+    Выборка предложений для экспорта с учетом фильтров.
+
+    Выборка изменений опирается на индексы по `updated_at`, поэтому ее
+    стоимость пропорциональна числу изменений, а не размеру каталога.
+    """
+    offers = ProductInfo.objects.all()
+    if supplier_id is not None:
+        offers = offers.filter(supplier_id=supplier_id)
+    if category_id is not None:
+        offers = offers.filter(product__category_id=category_id)
+    if changed_since is not None:
+        since = parse_datetime(changed_since)
+        offers = offers.filter(
+            Q(updated_at__gte=since)
+            | Q(id__in=ProductParameter.objects.filter(
+                updated_at__gte=since
+            ).values('product_info_id'))
+        )
+    return offers
+
+
+def get_deleted_offers_queryset(changed_since, supplier_id=None, category_id=None):
+    """
+    Предложения, удаленные начиная с `changed_since` (DeletedOffer), с теми
+    же фильтрами, что и выгрузка изменений. Вместе с get_offers_queryset
+    дает полный набор изменений каталога с этого момента.
+    """
+    deleted = DeletedOffer.objects.filter(deleted_at__gte=changed_since)
+    if supplier_id is not None:
+        deleted = deleted.filter(supplier_id=supplier_id)
+    if category_id is not None:
+        deleted = deleted.filter(category_id=category_id)
+    return deleted
+
+
+def touch_offers(offers):
+    """
+    Отмечает предложения измененными одним UPDATE `updated_at`.
+
+    Нужна, когда выгружаемые данные предложения меняются без записи в его
+    строку: переименован товар, категория или параметр, товар перенесен в
+    другую категорию, удален параметр предложения. Иначе такие изменения
+    не попали бы в выгрузку изменений.
+    """
+    return offers.update(updated_at=timezone.now())
+
+
+def iter_offer_chunks(offers, chunk_size):
+    """
+    Читает предложения порциями по `chunk_size` в виде словарей.
+
+    Предложения упорядочены по товару, чтобы писатели могли группировать
+    их по товарам без загрузки всего каталога. У каждого предложения
+    есть ключ `parameters` - словарь {название: значение}.
+    """
+    rows = (
+        offers.order_by('product_id', 'id')
+        .values(*OFFER_FIELDS.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    while raw_chunk := list(islice(rows, chunk_size)):
+        chunk = [
+            {key: row[field] for key, field in OFFER_FIELDS.items()}
+            for row in raw_chunk
+        ]
+        parameters = {offer['id']: {} for offer in chunk}
+        # Названия параметров - из справочника в памяти, без JOIN с Parameter
+        for product_info_id, parameter_id, value in (
+            ProductParameter.objects.filter(product_info_id__in=parameters.keys())
+            .order_by('product_info_id', 'id')
+            .values_list('product_info_id', 'parameter_id', 'value')
+        ):
+            parameters[product_info_id][parameter_name(parameter_id)] = value
+        for offer in chunk:
+            offer['parameters'] = parameters[offer['id']]
+        yield chunk
+
+
+# --- Писатели ---
+
+EXPORT_WRITERS = {}
+
+
+def register_writer(writer_class):
+    """Регистрирует писателя под именем его формата."""
+    EXPORT_WRITERS[writer_class.format] = writer_class
+    return writer_class
+
+
+class ExportWriter:
+    """
+    Базовый писатель: получает порции предложений и пишет байты в файл.
+    """
+    format = None
+    extension = None
+    content_type = 'application/octet-stream'
+    # Формат - полный прайс-лист одного поставщика: нужен фильтр по
+    # поставщику, фильтры по категории и дате изменения недопустимы
+    # (при загрузке файла предложения, которых в нем нет, удаляются)
+    requires_supplier = False
+
+    def __init__(self, fileobj, offers):
+        self.fileobj = fileobj
+        self.offers = offers
+        # Количество выгруженных записей (товаров или предложений)
+        self.count = 0
+
+    @staticmethod
+    def tabular_row(offer):
+        """Предложение в виде строки табличного формата (TABULAR_COLUMNS)."""
+        return {
+            'id': offer['external_id'],
+            'category': offer['category'],
+            'category_name': category_name(offer['category']) or '',
+            'name': offer['name'],
+            'price': str(offer['price']),
+            'quantity': offer['quantity'],
+            'parameters': offer['parameters'],
+            'offer_id': offer['id'],
+            'product_id': offer['product_id'],
+            'supplier_id': offer['supplier_id'],
+            'supplier': offer['supplier'],
+        }
+
+    def write_text(self, text):
+        self.fileobj.write(text.encode('utf-8'))
+
+    def begin(self):
+        pass
+
+    def write_chunk(self, chunk):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+
+@register_writer
+class JSONWriter(ExportWriter):
+    """
+    JSON-массив товаров с вложенными предложениями.
+
+    Формат совпадает с ответом `ProductSerializer`. Товар может
+    оказаться на границе порций, поэтому последний товар порции
+    дописывается только после прихода следующей порции.
+    """
+    format = 'json'
+    extension = 'json'
+    content_type = 'application/json; charset=utf-8'
+
+    def begin(self):
+        self._product = None
+        self.write_text('[')
+
+    def write_chunk(self, chunk):
+        for offer in chunk:
+            if self._product is None or self._product['id'] != offer['product_id']:
+                self._flush_product()
+                self._product = {
+                    'id': offer['product_id'],
+                    'name': offer['name'],
+                    'category': offer['category'],
+                    'product_infos': [],
+                }
+            self._product['product_infos'].append({
+                'id': offer['id'],
+                'supplier_name': offer['supplier'],
+                'price': str(offer['price']),
+                'quantity': offer['quantity'],
+                'parameters': [
+                    {'parameter': {'name': name}, 'value': value}
+                    for name, value in offer['parameters'].items()
+                ],
+            })
+
+    def _flush_product(self):
+        if self._product is None:
+            return
+        self.write_text(',\n' if self.count else '\n')
+        self.write_text(json.dumps(self._product, ensure_ascii=False))
+        self.count += 1
+
+    def end(self):
+        self._flush_product()
+        self.write_text('\n]\n')
+
+
+@register_writer
+class NDJSONWriter(ExportWriter):
+    """
+    Одно предложение на строку (newline-delimited JSON) с ключами
+    TABULAR_COLUMNS. Файл одного поставщика можно загрузить как прайс-лист.
+    """
+    format = 'ndjson'
+    extension = 'ndjson'
+    content_type = 'application/x-ndjson; charset=utf-8'
+
+    def write_chunk(self, chunk):
+        lines = [json.dumps(self.tabular_row(offer), ensure_ascii=False) for offer in chunk]
+        self.write_text('\n'.join(lines) + '\n')
+        self.count += len(chunk)
+
+
+@register_writer
+class CSVWriter(ExportWriter):
+    """
+    CSV с колонками TABULAR_COLUMNS. Параметры предложения записываются
+    в колонку `parameters` в виде JSON-объекта. Файл одного поставщика
+    можно загрузить как прайс-лист.
+    """
+    format = 'csv'
+    extension = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+    columns = TABULAR_COLUMNS
+
+    def begin(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(self.columns)
+        self._flush()
+
+    def write_chunk(self, chunk):
+        for offer in chunk:
+            row = self.tabular_row(offer)
+            row['parameters'] = json.dumps(row['parameters'], ensure_ascii=False)
+            self._writer.writerow([row[column] for column in self.columns])
+        self._flush()
+        self.count += len(chunk)
+
+    def _flush(self):
+        self.write_text(self._buffer.getvalue())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+
+@register_writer
+class YAMLWriter(ExportWriter):
+    """
+    Прайс-лист поставщика в формате загрузки (`process_pricelist_upload`):
+    shop / categories / goods / parameters. Выгруженный файл можно
+    загрузить обратно без изменений, поэтому выгружается весь прайс-лист
+    поставщика (`requires_supplier`).
+    """
+    format = 'yaml'
+    extension = 'yaml'
+    content_type = 'application/x-yaml; charset=utf-8'
+    requires_supplier = True
+
+    def begin(self):
+        supplier = self.offers.values_list('supplier__name', flat=True).first()
+        categories = (
+            Category.objects.filter(products__product_infos__in=self.offers)
+            .distinct()
+            .order_by('id')
+            .values('id', 'name')
+        )
+        self._dump({'shop': supplier or ''})
+        self._dump({'categories': list(categories)})
+
+    def write_chunk(self, chunk):
+        goods = [
+            {
+                'id': offer['external_id'],
+                'category': offer['category'],
+                'name': offer['name'],
+                'price': float(offer['price']),
+                'quantity': offer['quantity'],
+                'parameters': offer['parameters'],
+            }
+            for offer in chunk
+        ]
+        if not self.count:
+            self.write_text('goods:\n')
+        self._dump(goods)
+        self.count += len(chunk)
+
+    def end(self):
+        if not self.count:
+            # Без предложений список пишется в одну строку: блочный
+            # список из нуля элементов в YAML не записать
+            self._dump({'goods': []})
+
+    def _dump(self, data):
+        self.write_text(
+            yaml.safe_dump(data, allow_unicode=True, sort_keys=False, default_flow_style=False)
+        )
+
+
+def write_export(fileobj, export_format, offers, chunk_size):
+    """
+    Выгружает предложения в файл в указанном формате.
+    Возвращает писателя (в нем количество записей и тип содержимого).
+    """
+    writer = EXPORT_WRITERS[export_format](fileobj, offers)
+    writer.begin()
+    for chunk in iter_offer_chunks(offers, chunk_size):
+        writer.write_chunk(chunk)
+    writer.end()
+    return writer
@@ -0,0 +1,272 @@
+"""
+Чтение загруженных прайс-листов в разных форматах.
+
+Все форматы приводятся к содержимому YAML-прайс-листа - словарю с
+ключами `shop`, `categories` и `goods`, который обрабатывает импорт
+(`import_pricelist` в shop/tasks.py). Форматы реализуются классами-
+читателями, зарегистрированными через `register_reader`; формат файла
+определяется по расширению или типу содержимого (`detect_format`).
+
+Табличные форматы описывают одно предложение на строку с фиксированным
+набором колонок PRICELIST_COLUMNS:
+
+- id - id предложения у поставщика;
+- category, category_name - id категории и ее название (может быть
+  пустым: категория не переименовывается);
+- name, price, quantity;
+- parameters - JSON-объект {название: значение} (в Arrow и Parquet также
+  тип map<string, string>).
+
+Табличные файлы читаются потоком - по строке (CSV, NDJSON) или порциями
+(Arrow IPC, Parquet), без загрузки файла в память целиком: `goods` в их
+содержимом - итератор, импорт забирает из него позиции порциями, пока
+файл открыт. Ошибки формата в строках поэтому возникают во время импорта.
+Названия категорий передаются в позициях (`category_name`), названия
+магазина в табличных файлах нет: название поставщика не меняется. Arrow
+и Parquet доступны, если установлен pyarrow.
+
+YAML-документ разбирается целиком (`goods` - список).
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+import yaml
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow - необязательная зависимость
+    pyarrow = None
+
+# Разборщик libyaml, если PyYAML собран с ним (в несколько раз быстрее)
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+PRICELIST_COLUMNS = ('id', 'category', 'category_name', 'name', 'price', 'quantity', 'parameters')
+# Колонки, которые можно не указывать
+OPTIONAL_COLUMNS = {'category_name', 'parameters'}
+
+# Строк в порции при чтении колоночных форматов
+ARROW_BATCH_SIZE = 10000
+
+
+class PriceListFormatError(ValueError):
+    """Файл не соответствует своему формату или схеме колонок."""
+
+
+IMPORT_READERS = {}
+
+
+def register_reader(reader_class):
+    """Регистрирует читателя под именем его формата."""
+    IMPORT_READERS[reader_class.format] = reader_class
+    return reader_class
+
+
+class PriceListReader:
+    """
+    Базовый читатель: получает двоичный файл и возвращает содержимое
+    прайс-листа (`read`).
+    """
+    format = None
+    extensions = ()
+    content_types = ()
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def read(self):
+        raise NotImplementedError
+
+
+@register_reader
+class YAMLReader(PriceListReader):
+    """Прайс-лист в формате YAML: shop / categories / goods."""
+    format = 'yaml'
+    extensions = ('yaml', 'yml')
+    content_types = ('application/x-yaml', 'application/yaml', 'text/yaml', 'text/x-yaml')
+
+    def read(self):
+        try:
+            content = yaml.load(self.fileobj, Loader=YAML_LOADER)
+        except yaml.YAMLError as e:
+            raise PriceListFormatError(f'Неверный формат YAML: {e}') from e
+        if not isinstance(content, dict):
+            raise PriceListFormatError('Ожидается YAML-документ с разделами shop, categories и goods.')
+        return content
+
+
+class TabularReader(PriceListReader):
+    """
+    Табличный формат: строки с колонками PRICELIST_COLUMNS. Наследники
+    реализуют `iter_rows` - генератор словарей {колонка: значение}.
+    """
+
+    def iter_rows(self):
+        raise NotImplementedError
+
+    def read(self):
+        # Позиции читаются по мере обработки импортом; названия категорий
+        # передаются в самих позициях (`category_name`)
+        return {'categories': [], 'goods': self.iter_goods()}
+
+    def iter_goods(self):
+        rows = self.iter_rows()
+        try:
+            for line, row in enumerate(rows, start=1):
+                try:
+                    item = {
+                        'id': int(row['id']),
+                        'category': int(row['category']),
+                        'name': str(row['name']),
+                        'price': Decimal(str(row['price'])),
+                        'quantity': int(row['quantity']),
+                        'parameters': self.parse_parameters(row.get('parameters')),
+                    }
+                except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+                    raise PriceListFormatError(f'Строка {line}: {e!r}') from e
+                if row.get('category_name'):
+                    item['category_name'] = str(row['category_name'])
+                yield item
+        finally:
+            # Незавершенное чтение закрывается, пока файл еще открыт
+            rows.close()
+
+    @staticmethod
+    def parse_parameters(value):
+        if not value:
+            return {}
+        if isinstance(value, str):
+            value = json.loads(value)
+        # map<string, string> в Arrow читается как список пар
+        parameters = dict(value)
+        return {str(name): str(parameter) for name, parameter in parameters.items()}
+
+    @staticmethod
+    def check_columns(columns):
+        missing = set(PRICELIST_COLUMNS) - OPTIONAL_COLUMNS - set(columns)
+        if missing:
+            raise PriceListFormatError(f'Нет обязательных колонок: {", ".join(sorted(missing))}')
+
+    def lines(self):
+        """Строки текста файла. Сам файл после чтения не закрывается."""
+        # utf-8-sig: Excel сохраняет CSV с BOM
+        text = io.TextIOWrapper(self.fileobj, encoding='utf-8-sig', newline='')
+        try:
+            # Не yield from: при закрытии генератора он закрыл бы и файл
+            for line in text:
+                yield line
+        except UnicodeDecodeError as e:
+            raise PriceListFormatError(f'Файл не в кодировке UTF-8: {e}') from e
+        finally:
+            text.detach()
+
+
+@register_reader
+class CSVReader(TabularReader):
+    """CSV с заголовком; параметры - JSON-объект в колонке `parameters`."""
+    format = 'csv'
+    extensions = ('csv',)
+    content_types = ('text/csv', 'application/csv')
+
+    def iter_rows(self):
+        lines = self.lines()
+        try:
+            reader = csv.DictReader(lines)
+            self.check_columns(reader.fieldnames or ())
+            yield from reader
+        except csv.Error as e:
+            raise PriceListFormatError(f'Неверный формат CSV: {e}') from e
+        finally:
+            lines.close()
+
+
+@register_reader
+class NDJSONReader(TabularReader):
+    """Одно предложение на строку (newline-delimited JSON)."""
+    format = 'ndjson'
+    extensions = ('ndjson', 'jsonl')
+    content_types = ('application/x-ndjson', 'application/jsonl', 'application/json-lines')
+
+    def iter_rows(self):
+        for line in self.lines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:  # в т.ч. json.JSONDecodeError
+                raise PriceListFormatError(f'Неверный JSON: {e}') from e
+            if not isinstance(row, dict):
+                raise PriceListFormatError('Каждая строка должна быть JSON-объектом.')
+            yield row
+
+
+class ArrowTableReader(TabularReader):
+    """Колоночный формат pyarrow: строки читаются порциями (record batches)."""
+
+    def iter_batches(self):
+        raise NotImplementedError
+
+    def iter_rows(self):
+        try:
+            for batch in self.iter_batches():
+                self.check_columns(batch.schema.names)
+                yield from batch.to_pylist()
+        except pyarrow.ArrowException as e:
+            raise PriceListFormatError(f'Неверный формат {self.format}: {e}') from e
+
+
+if pyarrow is not None:
+
+    @register_reader
+    class ArrowReader(ArrowTableReader):
+        """Arrow IPC: файловый формат (Feather v2) или потоковый."""
+        format = 'arrow'
+        extensions = ('arrow', 'feather', 'arrows', 'ipc')
+        content_types = ('application/vnd.apache.arrow.file', 'application/vnd.apache.arrow.stream')
+
+        def iter_batches(self):
+            try:
+                reader = pyarrow.ipc.open_file(self.fileobj)
+            except pyarrow.ArrowInvalid:
+                self.fileobj.seek(0)
+                yield from pyarrow.ipc.open_stream(self.fileobj)
+                return
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index)
+
+    @register_reader
+    class ParquetReader(ArrowTableReader):
+        """Parquet: читается по группам строк, порциями по ARROW_BATCH_SIZE."""
+        format = 'parquet'
+        extensions = ('parquet',)
+        content_types = ('application/vnd.apache.parquet', 'application/x-parquet')
+
+        def iter_batches(self):
+            return pyarrow.parquet.ParquetFile(self.fileobj).iter_batches(batch_size=ARROW_BATCH_SIZE)
+
+
+def detect_format(filename, content_type=None):
+    """
+    Формат файла по расширению, а без расширения - по типу содержимого.
+    Файл без расширения и с неизвестным типом считается YAML (прежний
+    единственный формат загрузки). Неизвестное расширение - None.
+    """
+    extension = filename.rpartition('.')[2].lower() if '.' in (filename or '') else ''
+    if extension:
+        for reader_class in IMPORT_READERS.values():
+            if extension in reader_class.extensions:
+                return reader_class.format
+        return None
+    media_type = (content_type or '').partition(';')[0].strip().lower()
+    for reader_class in IMPORT_READERS.values():
+        if media_type in reader_class.content_types:
+            return reader_class.format
+    return YAMLReader.format
+
+
+def read_pricelist(fileobj, file_format):
+    """Читает прайс-лист из двоичного файла. Возвращает содержимое (см. описание модуля)."""
+    return IMPORT_READERS[file_format](fileobj).read()
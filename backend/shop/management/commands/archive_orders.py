@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shop.archive import archive_closed_orders, get_archive_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит доставленные и отмененные заказы старше заданного числа '
+        'месяцев в архив (ArchivedOrder).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=settings.ORDER_ARCHIVE_AFTER_MONTHS,
+            help='Архивировать заказы старше этого числа месяцев.',
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.ORDER_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--limit', type=int, help='Не больше этого числа заказов.')
+
+    def handle(self, *args, **options):
+        cutoff = get_archive_cutoff(options['months'])
+        self.stdout.write(f'Архивация закрытых заказов, созданных до {cutoff:%Y-%m-%d}')
+        archived = archive_closed_orders(
+            months=options['months'], batch_size=options['batch_size'], limit=options['limit']
+        )
+        self.stdout.write(f'В архив перенесено заказов: {archived}')
@@ -0,0 +1,123 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from shop.bench_scenarios import SCENARIOS, BenchContext, run_scenario
+
+
+def git_commit():
+    """Текущий коммит репозитория (None, если git недоступен)."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def change(old, new):
+    """Изменение в процентах ('+12.5%'), None - если сравнивать не с чем."""
+    if not old:
+        return None
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк каталога, корзины, оформления заказа, импорта и экспорта '
+        'прайс-листов на наборе данных команды bench_data. Запросы выполняются '
+        'в текущем процессе; для каждого сценария выводятся перцентили задержки, '
+        'число запросов к БД и пропускная способность. Результат в JSON '
+        '(--output) можно сравнить с результатом другого коммита (--compare).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tag', default='bench', help='Метка набора данных.')
+        parser.add_argument(
+            '--scenarios',
+            default=','.join(SCENARIOS),
+            help='Сценарии через запятую (по умолчанию все).',
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5, help='Итерации без учета в результате.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Сохранить результат в JSON-файл.')
+        parser.add_argument('--compare', help='JSON-файл предыдущего результата для сравнения.')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON.')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as fileobj:
+                previous = json.load(fileobj)
+
+        context = BenchContext(options['tag'], seed=options['seed'])
+        if context.is_empty:
+            raise CommandError(
+                f'Набор данных "{options["tag"]}" не найден или в нем нет активных поставщиков. '
+                f'Создайте его командой bench_data.'
+            )
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'started_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'tag': options['tag'],
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+                'dataset': {
+                    'suppliers': len(context.supplier_users),
+                    'clients': len(context.client_users),
+                    'active_offers': len(context.offer_ids),
+                },
+            },
+            'scenarios': {},
+        }
+        # Тестовый клиент DRF обращается к хосту testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name in names:
+                if not options['json']:
+                    self.stdout.write(f'{name}...')
+                report['scenarios'][name] = run_scenario(
+                    SCENARIOS[name](), context, options['iterations'], options['warmup']
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fileobj:
+                json.dump(report, fileobj, ensure_ascii=False, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for name, result in report['scenarios'].items():
+            self.stdout.write(self.format_result(result, (previous or {}).get('scenarios', {}).get(name)))
+
+    @staticmethod
+    def format_result(result, previous=None):
+        latency = result['latency_ms']
+        line = (
+            f"{result['scenario']:>18}: задержка, мс: p50 {latency['p50']}, p95 {latency['p95']}, "
+            f"p99 {latency['p99']}; запросов к БД {result['queries']['mean']}, "
+            f"{result['throughput_per_sec']} оп/с, ошибок: {result['errors']}"
+        )
+        if previous:
+            deltas = {
+                'p50': change(previous['latency_ms']['p50'], latency['p50']),
+                'p95': change(previous['latency_ms']['p95'], latency['p95']),
+                'запросы': change(previous['queries']['mean'], result['queries']['mean']),
+            }
+            deltas = [f'{key} {value}' for key, value in deltas.items() if value]
+            if deltas:
+                line += f" ({', '.join(deltas)})"
+        return line
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from shop.bench_data import generate_dataset, user_email_prefix
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает синтетический набор данных для бенчмарка (команда bench): '
+        'поставщиков, клиентов, категории, параметры, товары с предложениями '
+        'и историю заказов. Записи создаются пакетными вставками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tag', default='bench',
+            help='Метка набора данных, по ней его находит команда bench.',
+        )
+        parser.add_argument('--suppliers', type=int, default=20)
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--parameters', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--offers-per-product', type=int, default=3)
+        parser.add_argument('--parameters-per-offer', type=int, default=5)
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--days', type=int, default=365, help='Период истории заказов.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        tag = options['tag']
+        prefixes = Q()
+        for role in User.UserType.values:
+            prefixes |= Q(email__startswith=user_email_prefix(tag, role))
+        if User.objects.filter(prefixes).exists():
+            raise CommandError(f'Набор данных с меткой "{tag}" уже существует.')
+        if min(options['suppliers'], options['clients'], options['products'], options['categories']) < 1:
+            raise CommandError('Нужны хотя бы один поставщик, клиент, товар и категория.')
+
+        started = time.perf_counter()
+        counts = generate_dataset(
+            tag,
+            suppliers=options['suppliers'],
+            products=options['products'],
+            parameters=options['parameters'],
+            categories=options['categories'],
+            offers_per_product=options['offers_per_product'],
+            parameters_per_offer=options['parameters_per_offer'],
+            clients=options['clients'],
+            orders=options['orders'],
+            items_per_order=options['items_per_order'],
+            days=options['days'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(', '.join(f'{name}: {count}' for name, count in counts.items()))
+        self.stdout.write(f'Набор данных "{tag}" создан за {elapsed:.1f} с')
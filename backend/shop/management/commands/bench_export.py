@@ -0,0 +1,77 @@
+import json
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from shop.exporters import EXPORT_WRITERS, get_offers_queryset, write_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость и пиковое потребление памяти экспорта каталога '
+        'для каждого формата на текущей базе данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--formats',
+            default=','.join(sorted(EXPORT_WRITERS)),
+            help='Форматы через запятую (по умолчанию все).',
+        )
+        parser.add_argument('--supplier', type=int, help='ID поставщика (обязателен для yaml).')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON.')
+
+    def handle(self, *args, **options):
+        formats = [name.strip() for name in options['formats'].split(',') if name.strip()]
+        unknown = set(formats) - set(EXPORT_WRITERS)
+        if unknown:
+            raise CommandError(f'Неизвестные форматы: {", ".join(sorted(unknown))}')
+
+        offers = get_offers_queryset(supplier_id=options['supplier'])
+        results = []
+        for export_format in formats:
+            if EXPORT_WRITERS[export_format].requires_supplier and not options['supplier']:
+                self.stderr.write(f'{export_format}: пропущен, нужен --supplier')
+                continue
+            results.append(self._run(export_format, offers, options['chunk_size']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f'{result["format"]:>7}: {result["rows"]} записей за {result["seconds"]:.2f} с '
+                f'({result["rows_per_sec"]:.0f} зап/с), {result["bytes"] / 1024:.0f} КБ, '
+                f'запросов {result["queries"]}, '
+                f'пик памяти Python {result["peak_python_mb"]:.1f} МБ, '
+                f'RSS процесса {result["max_rss_mb"]:.1f} МБ'
+            )
+
+    @staticmethod
+    def _run(export_format, offers, chunk_size):
+        reset_queries()
+        tracemalloc.start()
+        started = time.perf_counter()
+        with tempfile.TemporaryFile() as tmp, CaptureQueriesContext(connection) as queries:
+            writer = write_export(tmp, export_format, offers, chunk_size)
+            size = tmp.tell()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'format': export_format,
+            'rows': writer.count,
+            'seconds': elapsed,
+            'rows_per_sec': writer.count / elapsed if elapsed else 0,
+            'bytes': size,
+            'queries': len(queries),
+            'peak_python_mb': peak / 1024 / 1024,
+            # ru_maxrss в Linux - в килобайтах; это максимум за все время процесса
+            'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
@@ -0,0 +1,118 @@
+import json
+import os
+import resource
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from config.middleware import QueryStats
+from shop.bench_data import BENCH_PASSWORD, user_email
+from shop.importers import detect_format
+from shop.models import ProductInfo
+from shop.tasks import process_pricelist_file
+from users.models import Supplier, User
+
+
+def max_rss_mb():
+    # ru_maxrss в Linux - в килобайтах; это максимум за все время процесса
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк импорта прайс-листов: загружает файлы по очереди от имени '
+        'одного поставщика, выполняя задачу process_pricelist_file в текущем '
+        'процессе на текущей БД. Формат файла определяется по расширению. Для '
+        'каждого файла выводит время (чтение и импорт), число запросов к БД, '
+        'пиковый RSS процесса и скорость в товарах в секунду. Файлы создает '
+        'команда bench_pricelist.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Файлы в порядке загрузки.')
+        parser.add_argument(
+            '--tag', default='import',
+            help='Метка поставщика бенчмарка (создается, если его нет).',
+        )
+        parser.add_argument(
+            '--keep-offers', action='store_true',
+            help='Не удалять предложения поставщика перед первой загрузкой.',
+        )
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON.')
+
+    def handle(self, *args, **options):
+        missing = [path for path in options['files'] if not os.path.isfile(path)]
+        if missing:
+            raise CommandError(f'Файлы не найдены: {", ".join(missing)}')
+        unknown = [path for path in options['files'] if detect_format(path) is None]
+        if unknown:
+            raise CommandError(f'Неподдерживаемый формат файлов: {", ".join(unknown)}')
+
+        user = self.get_supplier_user(options['tag'])
+        if not options['keep_offers']:
+            ProductInfo.objects.filter(supplier=user.supplier_profile).delete()
+
+        results = [self._run(path, user) for path in options['files']]
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f'{result["file"]}: {result["offers"]} предложений за {result["seconds"]:.2f} с '
+                f'({result["rows_per_sec"]:.0f} тов/с), запросов {result["queries"]} '
+                f'({result["db_seconds"]:.2f} с в БД), RSS процесса {result["max_rss_mb"]:.1f} МБ'
+                + ('' if result['ok'] else f'; {result["result"]}')
+            )
+
+    @staticmethod
+    def get_supplier_user(tag):
+        email = user_email(tag, User.UserType.SUPPLIER, 1)
+        user, created = User.objects.get_or_create(
+            email=email,
+            defaults={
+                'username': email,
+                'password': make_password(BENCH_PASSWORD),
+                'user_type': User.UserType.SUPPLIER,
+            },
+        )
+        if created:
+            Supplier.objects.create(user=user, name=f'Bench {tag}')
+        return user
+
+    @staticmethod
+    def _run(path, user):
+        file_format = detect_format(path)
+        # Файл кладется в хранилище, как при загрузке через API; задача его удалит
+        with open(path, 'rb') as fileobj:
+            name = default_storage.save(
+                f'{settings.PRICELIST_STORAGE_DIR}/bench-{uuid.uuid4().hex}.{file_format}', File(fileobj)
+            )
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            # Задача выполняется в текущем процессе, как в воркере (с сигналами Celery)
+            result = process_pricelist_file.apply(args=(name, user.id, file_format)).result
+        elapsed = time.perf_counter() - started
+        offers = ProductInfo.objects.filter(supplier=user.supplier_profile).count()
+        return {
+            'file': path,
+            'format': file_format,
+            'size_mb': round(os.path.getsize(path) / 1024 / 1024, 2),
+            'ok': not result.startswith('Ошибка'),
+            'result': result,
+            'offers': offers,
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(offers / elapsed, 1) if elapsed else 0.0,
+            'queries': stats.count,
+            'db_seconds': round(stats.duration, 3),
+            'max_rss_mb': round(max_rss_mb(), 1),
+        }
@@ -0,0 +1,84 @@
+import json
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.bench_data import PRICELIST_WRITERS, pricelist_goods
+from shop.importers import IMPORT_READERS, read_pricelist
+
+
+def count_goods(content):
+    """Дочитывает позиции: табличные форматы отдают их итератором."""
+    return sum(1 for _ in content['goods'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость чтения прайс-листа в каждом формате загрузки '
+        '(без записи в БД): один и тот же набор товаров записывается во все '
+        'форматы и читается читателями shop/importers.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--goods', type=int, default=10000)
+        parser.add_argument('--parameters-per-item', type=int, default=5)
+        parser.add_argument(
+            '--formats',
+            default=','.join(format for format in IMPORT_READERS if format in PRICELIST_WRITERS),
+            help='Форматы через запятую (по умолчанию все доступные).',
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Берется лучшее время из повторов.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON.')
+
+    def handle(self, *args, **options):
+        formats = [name.strip() for name in options['formats'].split(',') if name.strip()]
+        unknown = set(formats) - (IMPORT_READERS.keys() & PRICELIST_WRITERS.keys())
+        if unknown:
+            raise CommandError(
+                f'Неизвестные или недоступные форматы: {", ".join(sorted(unknown))} '
+                f'(arrow и parquet требуют pyarrow)'
+            )
+
+        results = [self._run(file_format, options) for file_format in formats]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f'{result["format"]:>7}: {result["goods"]} товаров за {result["seconds"]:.3f} с '
+                f'({result["rows_per_sec"]:.0f} тов/с), {result["bytes"] / 1024:.0f} КБ, '
+                f'пик памяти Python {result["peak_python_mb"]:.1f} МБ'
+            )
+
+    @staticmethod
+    def _run(file_format, options):
+        goods = pricelist_goods(
+            options['goods'], parameters_per_item=options['parameters_per_item'], seed=options['seed']
+        )
+        with tempfile.TemporaryFile() as tmp:
+            PRICELIST_WRITERS[file_format](tmp, 'Бенчмарк', goods)
+            size = tmp.tell()
+            timings = []
+            for _ in range(max(options['repeat'], 1)):
+                tmp.seek(0)
+                started = time.perf_counter()
+                count = count_goods(read_pricelist(tmp, file_format))
+                timings.append(time.perf_counter() - started)
+            # Память - отдельным прогоном: tracemalloc замедляет чтение
+            tmp.seek(0)
+            tracemalloc.start()
+            count_goods(read_pricelist(tmp, file_format))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        seconds = min(timings)
+        return {
+            'format': file_format,
+            'goods': count,
+            'bytes': size,
+            'seconds': seconds,
+            'rows_per_sec': count / seconds if seconds else 0,
+            'peak_python_mb': peak / 1024 / 1024,
+        }
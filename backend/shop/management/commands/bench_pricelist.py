@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.bench_data import PRICELIST_WRITERS, pricelist_goods
+from shop.importers import IMPORT_READERS
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает прайс-листы в форматах загрузки для бенчмарка импорта '
+        '(команда bench_import): для каждого размера - первую загрузку и '
+        'следующие версии, в которых изменены цены и остатки доли товаров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Каталог для файлов.')
+        parser.add_argument(
+            '--goods', type=int, nargs='+', default=[1000],
+            help='Число товаров (можно несколько размеров).',
+        )
+        parser.add_argument(
+            '--changes', type=float, nargs='*', default=[0.1],
+            help='Доли измененных товаров в следующих версиях файла, например 0.01 0.1 0.5.',
+        )
+        parser.add_argument(
+            '--formats', nargs='+', default=['yaml'], choices=sorted(PRICELIST_WRITERS),
+            help='Форматы файлов (arrow и parquet - если установлен pyarrow).',
+        )
+        parser.add_argument('--parameters-per-item', type=int, default=5)
+        parser.add_argument('--parameters', type=int, default=50, help='Число разных параметров.')
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--shop', default='Бенчмарк импорта', help='Название магазина в файле.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if any(not 0 <= ratio <= 1 for ratio in options['changes']):
+            raise CommandError('Доля измененных товаров должна быть от 0 до 1.')
+        if options['categories'] < 1:
+            raise CommandError('Нужна хотя бы одна категория.')
+        os.makedirs(options['output_dir'], exist_ok=True)
+
+        for goods in options['goods']:
+            for version in range(len(options['changes']) + 1):
+                for file_format in options['formats']:
+                    self.write_file(goods, version, file_format, options)
+
+    def write_file(self, goods, version, file_format, options):
+        extension = IMPORT_READERS[file_format].extensions[0]
+        path = os.path.join(options['output_dir'], f'pricelist-{goods}-v{version}.{extension}')
+        started = time.perf_counter()
+        items = pricelist_goods(
+            goods,
+            parameters_per_item=options['parameters_per_item'],
+            parameters=options['parameters'],
+            categories=options['categories'],
+            changes=options['changes'][:version],
+            seed=options['seed'],
+        )
+        with open(path, 'wb') as fileobj:
+            PRICELIST_WRITERS[file_format](fileobj, options['shop'], items, categories=options['categories'])
+        changed = f', изменено {options["changes"][version - 1]:.0%} товаров' if version else ''
+        self.stdout.write(
+            f'{path}: {goods} товаров{changed}, {os.path.getsize(path) / 1024 / 1024:.1f} МБ '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,195 @@
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from shop.exporters import get_offers_queryset
+from shop.models import (
+    Cart, CartItem, Order, OrderItem, PriceHistory, Product, ProductInfo, ProductParameter,
+    SupplierDailySales, SupplierProductSales,
+)
+from users.models import Contact
+
+# Полное чтение таблицы в EXPLAIN QUERY PLAN SQLite: "SCAN shop_product"
+# (но не "SCAN shop_order USING INDEX ..." - обход индекса)
+_SQLITE_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?:\s+AS\s+\w+)?$', re.MULTILINE)
+
+
+def get_hot_queries():
+    """
+    Каталог "горячих" запросов приложения: (имя, QuerySet).
+
+    Значения параметров условные - план запроса от них почти не зависит.
+    Запросы prefetch_related перечислены отдельно, так как EXPLAIN
+    показывает только основной запрос.
+    """
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+    return [
+        # Каталог товаров (ProductViewSet) и его prefetch
+        (
+            'catalog.by_category',
+            Product.objects.filter(
+                Exists(ProductInfo.objects.filter(product=OuterRef('pk'), supplier__is_active=True)),
+                category_id=1,
+            ).order_by('id'),
+        ),
+        ('catalog.offers', ProductInfo.objects.filter(product_id__in=[1, 2, 3])),
+        ('catalog.parameters', ProductParameter.objects.filter(product_info_id__in=[1, 2, 3])),
+        # Импорт прайс-листа (shop.tasks.import_pricelist: resolve_products,
+        # sync_offers - по порциям из IMPORT_BATCH_SIZE позиций)
+        ('import.products_by_key', Product.objects.filter(name_key__in=['товар 1', 'товар 2'])),
+        ('import.offers', ProductInfo.objects.filter(supplier_id=1, external_id__in=[1, 2, 3])),
+        (
+            'import.stale_offers',
+            ProductInfo.objects.filter(supplier_id=1).exclude(external_id__in=[1, 2, 3]),
+        ),
+        (
+            'import.offer_parameters',
+            ProductParameter.objects.filter(product_info_id__in=[1, 2, 3]).values_list(
+                'product_info_id', 'parameter_id', 'value'
+            ),
+        ),
+        # Корзина, контакты и заказы клиента
+        ('cart.by_user', Cart.objects.filter(client__user_id=1)),
+        ('cart.items_by_user', CartItem.objects.filter(cart__client__user_id=1)),
+        ('contacts.by_user', Contact.objects.filter(client__user_id=1)),
+        ('orders.by_user', Order.objects.filter(client__user_id=1).order_by('-created_at')),
+        ('orders.items', OrderItem.objects.filter(order_id__in=[1, 2, 3])),
+        ('orders.admin_pending', Order.objects.filter(admin_notified_at__isnull=True)),
+        # Аналитика продаж: новые заказы и отчет поставщика
+        ('analytics.new_orders', Order.objects.filter(id__gt=1).order_by('id')),
+        (
+            'analytics.daily',
+            SupplierDailySales.objects.filter(supplier_id=1, day__gte=since[:10]),
+        ),
+        (
+            'analytics.products',
+            SupplierProductSales.objects.filter(supplier_id=1, day__gte=since[:10]),
+        ),
+        # История цен предложения (PriceHistoryView)
+        (
+            'price_history.series',
+            PriceHistory.objects.filter(product_info_id=1, recorded_at__gte=since).order_by('recorded_at'),
+        ),
+        (
+            'price_history.initial',
+            PriceHistory.objects.filter(product_info_id=1, recorded_at__lt=since).order_by('-recorded_at')[:1],
+        ),
+        # Экспорт каталога
+        ('export.supplier', get_offers_queryset(supplier_id=1).order_by('product_id', 'id')),
+        ('export.changed_since', get_offers_queryset(changed_since=since)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для горячих запросов приложения и отмечает '
+        'последовательное сканирование (Seq Scan) больших таблиц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Алиас БД (по умолчанию default).')
+        parser.add_argument(
+            '--min-rows', type=int, default=10000,
+            help='Сканирование таблиц меньше этого числа строк не считается проблемой.',
+        )
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help=(
+                'PostgreSQL: запретить Seq Scan (enable_seqscan = off). Оставшееся '
+                'сканирование означает, что подходящего индекса нет, независимо '
+                'от размера таблицы. Удобно на небольшой базе разработки.'
+            ),
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='PostgreSQL: EXPLAIN ANALYZE (запросы выполняются).',
+        )
+        parser.add_argument('--only', help='Только запросы, имя которых начинается с этой строки.')
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемные запросы (для CI).',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'БД {connection.vendor} не поддерживается.')
+        if options['analyze'] and connection.vendor != 'postgresql':
+            raise CommandError('--analyze поддерживается только для PostgreSQL.')
+
+        queries = [
+            (name, queryset.using(options['database']))
+            for name, queryset in get_hot_queries()
+            if not options['only'] or name.startswith(options['only'])
+        ]
+        table_rows = {}
+        flagged = []
+        for name, queryset in queries:
+            plan, scanned = self._explain(connection, queryset, options)
+            problems = []
+            for table in scanned:
+                if table not in table_rows:
+                    table_rows[table] = self._table_rows(connection, table)
+                if options['force_index'] or table_rows[table] >= options['min_rows']:
+                    problems.append(f'{table} (~{table_rows[table]} строк)')
+
+            if problems:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(
+                    f'SEQ SCAN {name}: {", ".join(problems)}'
+                ))
+            else:
+                self.stdout.write(f'OK       {name}')
+            if options['verbosity'] >= 2 or problems:
+                self.stdout.write(f'    {queryset.query}')
+            if options['verbosity'] >= 2:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        self.stdout.write(
+            f'Проверено запросов: {len(queries)}, с последовательным сканированием: {len(flagged)}'
+        )
+        if flagged and options['fail']:
+            raise CommandError(f'Последовательное сканирование: {", ".join(flagged)}')
+
+    @staticmethod
+    def _explain(connection, queryset, options):
+        """Текст плана и список таблиц, которые читаются целиком."""
+        if connection.vendor == 'sqlite':
+            plan = queryset.explain()
+            return plan, sorted(set(_SQLITE_SCAN_RE.findall(plan)))
+
+        explain_options = {'format': 'json'}
+        if options['analyze']:
+            explain_options.update(analyze=True, buffers=True)
+        with transaction.atomic(using=connection.alias):
+            if options['force_index']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = json.loads(queryset.explain(**explain_options))
+
+        scanned = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node['Node Type'] == 'Seq Scan':
+                scanned.add(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return json.dumps(plan, indent=2, ensure_ascii=False), sorted(scanned)
+
+    @staticmethod
+    def _table_rows(connection, table):
+        """Оценка числа строк таблицы (в PostgreSQL - из статистики)."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(table)],
+                )
+            else:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
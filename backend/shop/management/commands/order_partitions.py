@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from shop.archive import get_archive_cutoff
+from shop.partitions import (
+    PARTITIONED_TABLES, drop_empty_partitions, ensure_order_partitions, get_partitions,
+    is_partitioned, month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает месячные секции заказов и позиций заказов на несколько месяцев '
+        'вперед и удаляет старые опустевшие секции (только PostgreSQL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=settings.ORDER_PARTITIONS_AHEAD,
+            help='На сколько месяцев вперед создавать секции.',
+        )
+        parser.add_argument(
+            '--drop-empty', action='store_true',
+            help=(
+                'Удалить пустые секции старше срока архивации '
+                '(ORDER_ARCHIVE_AFTER_MONTHS).'
+            ),
+        )
+        parser.add_argument('--list', action='store_true', help='Показать секции и число строк.')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if not is_partitioned(connection, PARTITIONED_TABLES[0][0]):
+            raise CommandError('Таблицы заказов не секционированы (нужен PostgreSQL).')
+
+        for name in ensure_order_partitions(options['ahead'], using=using):
+            self.stdout.write(f'Создана секция {name}')
+        if options['drop_empty']:
+            before = month_start(get_archive_cutoff())
+            for name in drop_empty_partitions(before, using=using):
+                self.stdout.write(f'Удалена секция {name}')
+
+        if options['list']:
+            qn = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                for table, _ in PARTITIONED_TABLES:
+                    for name, lower, upper in get_partitions(connection, table):
+                        cursor.execute(f'SELECT COUNT(*) FROM {qn(name)}')
+                        self.stdout.write(
+                            f'{name}: {lower or "-"} .. {upper or "-"}, строк: {cursor.fetchone()[0]}'
+                        )
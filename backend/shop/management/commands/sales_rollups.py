@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shop.analytics import rebuild_sales_rollups, update_sales_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Учитывает новые заказы в таблицах продаж поставщиков. С --rebuild '
+        'таблицы продаж пересчитываются по всем заказам заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Удалить рассчитанные продажи и учесть все заказы заново.',
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.SALES_ROLLUP_BATCH_SIZE)
+        parser.add_argument(
+            '--lag', type=int, default=settings.SALES_ROLLUP_LAG,
+            help='Не учитывать заказы моложе этого числа секунд.',
+        )
+        parser.add_argument('--limit', type=int, help='Не больше этого числа заказов.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_sales_rollups()
+            self.stdout.write('Рассчитанные продажи удалены.')
+        processed = update_sales_rollups(
+            batch_size=options['batch_size'], lag=options['lag'], limit=options['limit']
+        )
+        self.stdout.write(f'Учтено заказов: {processed}')
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:54
+
+from django.db import migrations, models
+
+
+def mark_existing_orders_notified(apps, schema_editor):
+    # Заказы, созданные до появления сводки, уже были отправлены администратору
+    # отдельными письмами и не должны попасть в первую сводку.
+    Order = apps.get_model('shop', 'Order')
+    Order.objects.update(admin_notified_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='admin_notified_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Администратор уведомлен'),
+        ),
+        migrations.RunPython(mark_existing_orders_notified, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('admin_notified_at__isnull', True)), fields=['created_at'], name='order_admin_pending_idx'),
+        ),
+    ]
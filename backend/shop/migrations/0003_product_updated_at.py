@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_order_admin_notified_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinfo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='productparameter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='productinfo',
+            index=models.Index(fields=['updated_at'], name='productinfo_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productinfo',
+            index=models.Index(fields=['supplier', 'updated_at'], name='productinfo_supplier_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productparameter',
+            index=models.Index(fields=['updated_at'], name='productparameter_updated_idx'),
+        ),
+        migrations.CreateModel(
+            name='DeletedOffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offer_id', models.BigIntegerField(verbose_name='ID предложения')),
+                ('external_id', models.PositiveIntegerField(verbose_name='Внешний ID')),
+                ('supplier_id', models.BigIntegerField(verbose_name='ID поставщика')),
+                ('product_id', models.BigIntegerField(verbose_name='ID товара')),
+                ('category_id', models.BigIntegerField(null=True, verbose_name='ID категории')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаленное предложение',
+                'verbose_name_plural': 'Удаленные предложения',
+                'indexes': [models.Index(fields=['deleted_at'], name='deletedoffer_deleted_idx'), models.Index(fields=['supplier_id', 'deleted_at'], name='deletedoffer_supplier_del_idx')],
+            },
+        ),
+    ]
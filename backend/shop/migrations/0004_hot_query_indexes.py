@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client', '-created_at'], name='order_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name'], name='product_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productparameter',
+            index=models.Index(fields=['updated_at'], include=('product_info',), name='productparam_updated_cover_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='productparameter',
+            name='productparameter_updated_idx',
+        ),
+    ]
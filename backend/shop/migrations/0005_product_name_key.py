@@ -0,0 +1,69 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def normalize_product_name(name):
+    # Копия shop.models.normalize_product_name на момент миграции
+    return ' '.join(str(name).split()).casefold()
+
+
+def fill_name_key_and_merge_duplicates(apps, schema_editor):
+    """
+    Заполняет ключ товара и объединяет товары с одинаковым ключом:
+    остается товар с наименьшим id, предложения поставщиков остальных
+    переносятся на него.
+    """
+    Product = apps.get_model('shop', 'Product')
+    ProductInfo = apps.get_model('shop', 'ProductInfo')
+    db_alias = schema_editor.connection.alias
+
+    keepers = {}
+    duplicates = {}
+    batch = []
+    for product in Product.objects.using(db_alias).only('id', 'name').order_by('id').iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        key = normalize_product_name(product.name)
+        if key in keepers:
+            duplicates[product.id] = keepers[key]
+            continue
+        keepers[key] = product.id
+        product.name_key = key
+        batch.append(product)
+        if len(batch) >= BATCH_SIZE:
+            Product.objects.using(db_alias).bulk_update(batch, ['name_key'])
+            batch = []
+    Product.objects.using(db_alias).bulk_update(batch, ['name_key'])
+
+    for duplicate_id, keeper_id in duplicates.items():
+        ProductInfo.objects.using(db_alias).filter(product_id=duplicate_id).update(
+            product_id=keeper_id
+        )
+    duplicate_ids = list(duplicates)
+    for start in range(0, len(duplicate_ids), BATCH_SIZE):
+        Product.objects.using(db_alias).filter(
+            id__in=duplicate_ids[start:start + BATCH_SIZE]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='name_key',
+            field=models.CharField(
+                editable=False,
+                max_length=255,
+                null=True,
+                verbose_name='Ключ товара',
+                help_text='Нормализованное название, заполняется автоматически.',
+            ),
+        ),
+        migrations.RunPython(fill_name_key_and_merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Уникальность - отдельной миграцией: в PostgreSQL нельзя менять таблицу
+    # в транзакции, где остались отложенные проверки внешних ключей
+    # после объединения дубликатов в 0005.
+
+    dependencies = [
+        ('shop', '0005_product_name_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='name_key',
+            field=models.CharField(
+                editable=False,
+                max_length=255,
+                unique=True,
+                verbose_name='Ключ товара',
+                help_text='Нормализованное название, заполняется автоматически.',
+            ),
+        ),
+        # Поиск по точному названию заменен уникальным индексом name_key
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_name_idx',
+        ),
+    ]
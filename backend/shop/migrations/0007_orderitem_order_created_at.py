@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+def fill_order_created_at(apps, schema_editor):
+    OrderItem = apps.get_model('shop', 'OrderItem')
+    Order = apps.get_model('shop', 'Order')
+    OrderItem.objects.using(schema_editor.connection.alias).update(
+        order_created_at=models.Subquery(
+            Order.objects.filter(id=models.OuterRef('order_id')).values('created_at')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_product_name_key_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='order_created_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата заказа'),
+        ),
+        migrations.RunPython(fill_order_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,146 @@
+"""
+Секционирование заказов и позиций заказов по месяцам (только PostgreSQL).
+
+Существующая таблица не переписывается: она переименовывается
+в <таблица>_legacy и подключается к новой секционированной таблице как
+секция для всех дат до начала следующего месяца. Дальше создаются
+месячные секции на PARTITIONS_AHEAD месяцев вперед и секция по умолчанию.
+Остальные секции создает shop.partitions.ensure_order_partitions.
+
+Первичный ключ и уникальные ограничения секционированной таблицы
+включают ключ секционирования, поэтому внешний ключ позиций на заказ
+составной: (order_id, order_created_at) -> shop_order (id, created_at).
+"""
+from datetime import date, datetime, timezone
+
+from django.db import migrations, models
+
+PARTITIONED_TABLES = (
+    ('shop_order', 'created_at'),
+    ('shop_orderitem', 'order_created_at'),
+)
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def as_bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_table(cursor, connection, table, key, boundary):
+    qn = connection.ops.quote_name
+    legacy = f'{table}_legacy'
+
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid), conindid
+        FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+        """,
+        [table],
+    )
+    constraints = cursor.fetchall()
+    constraint_indexes = {index_oid for _, _, _, index_oid in constraints}
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_indexdef(c.oid), c.oid
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+        """,
+        [table],
+    )
+    # Индексы, не связанные с ограничениями; их определения ссылаются
+    # на имя таблицы и будут выполнены уже для секционированной таблицы
+    indexes = [(name, sql) for name, sql, oid in cursor.fetchall() if oid not in constraint_indexes]
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {qn(table)}')
+    max_id = cursor.fetchone()[0]
+
+    # Освобождаем имена ограничений, индексов и последовательности
+    cursor.execute(f'ALTER TABLE {qn(table)} ALTER COLUMN id DROP IDENTITY')
+    for name, kind, _, _ in constraints:
+        if kind in ('p', 'f'):
+            cursor.execute(f'ALTER TABLE {qn(table)} DROP CONSTRAINT {qn(name)}')
+        else:
+            cursor.execute(f'ALTER INDEX {qn(name)} RENAME TO {qn(name[:56] + "_legacy")}')
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX {qn(name)} RENAME TO {qn(name[:56] + "_legacy")}')
+    cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+
+    cursor.execute(
+        f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ({qn(key)})'
+    )
+    cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(key)})')
+    sequence = f'{table}_id_seq'
+    cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id')
+    cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    cursor.execute('SELECT setval(%s, %s, false)', [sequence, max_id + 1])
+    for name, kind, definition, _ in constraints:
+        if kind in ('u', 'f'):
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+    for _, sql in indexes:
+        cursor.execute(sql)
+
+    cursor.execute(
+        f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)',
+        [as_bound(boundary)],
+    )
+    for offset in range(PARTITIONS_AHEAD):
+        month = add_months(boundary, offset)
+        cursor.execute(
+            f'CREATE TABLE {qn(f"{table}_p{month:%Y_%m}")} PARTITION OF {qn(table)} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [as_bound(month), as_bound(add_months(month, 1))],
+        )
+    cursor.execute(f'CREATE TABLE {qn(f"{table}_default")} PARTITION OF {qn(table)} DEFAULT')
+
+
+def partition_orders(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    today = datetime.now(timezone.utc).date()
+    boundary = add_months(today.replace(day=1), 1)
+    with connection.cursor() as cursor:
+        for table, key in PARTITIONED_TABLES:
+            partition_table(cursor, connection, table, key, boundary)
+        cursor.execute(
+            'ALTER TABLE shop_orderitem ADD CONSTRAINT shop_orderitem_order_fk '
+            'FOREIGN KEY (order_id, order_created_at) REFERENCES shop_order (id, created_at) '
+            'DEFERRABLE INITIALLY DEFERRED'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0007_orderitem_order_created_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order_created_at',
+            field=models.DateTimeField(editable=False, verbose_name='Дата заказа'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=models.deletion.CASCADE,
+                related_name='items',
+                to='shop.order',
+                verbose_name='Заказ',
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name='orderitem',
+            unique_together={('order', 'product_info', 'order_created_at')},
+        ),
+        # Обратного преобразования нет: секционирование необратимо
+        migrations.RunPython(partition_orders),
+    ]
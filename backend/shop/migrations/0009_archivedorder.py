@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('shop', '0008_partition_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Номер заказа')),
+                ('status', models.CharField(choices=[('new', 'Новый'), ('processing', 'В обработке'), ('shipped', 'Отправлен'), ('delivered', 'Доставлен'), ('canceled', 'Отменен')], max_length=15, verbose_name='Статус заказа')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+                ('data', models.BinaryField(verbose_name='Данные заказа (JSON, zlib)')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to='users.client', verbose_name='Клиент')),
+            ],
+            options={
+                'verbose_name': 'Архивный заказ',
+                'verbose_name_plural': 'Архивные заказы',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['client', '-created_at'], name='archivedorder_client_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_email_search_indexes'),
+        ('shop', '0010_order_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Название')),
+                ('last_order_id', models.BigIntegerField(default=0, verbose_name='Последний учтенный заказ')),
+                ('last_order_created_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего учтенного заказа')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Состояние расчета продаж',
+                'verbose_name_plural': 'Состояние расчета продаж',
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('units', models.PositiveBigIntegerField(default=0, verbose_name='Продано единиц')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shop.product', verbose_name='Товар')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.supplier', verbose_name='Поставщик')),
+            ],
+            options={
+                'verbose_name': 'Продажи товара поставщика за день',
+                'verbose_name_plural': 'Продажи поставщиков по товарам',
+                'unique_together': {('supplier', 'day', 'product')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('units', models.PositiveBigIntegerField(default=0, verbose_name='Продано единиц')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.supplier', verbose_name='Поставщик')),
+            ],
+            options={
+                'verbose_name': 'Продажи поставщика за день',
+                'verbose_name_plural': 'Продажи поставщиков по дням',
+                'unique_together': {('supplier', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierCategorySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('units', models.PositiveBigIntegerField(default=0, verbose_name='Продано единиц')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.category', verbose_name='Категория')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.supplier', verbose_name='Поставщик')),
+            ],
+            options={
+                'verbose_name': 'Продажи поставщика в категории за день',
+                'verbose_name_plural': 'Продажи поставщиков по категориям',
+                'unique_together': {('supplier', 'day', 'category')},
+            },
+        ),
+    ]
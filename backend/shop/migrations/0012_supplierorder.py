@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Составной внешний ключ на секционированную таблицу заказов (как у позиций
+# в 0008_partition_orders); в других БД ограничения нет (db_constraint=False)
+ORDER_FK_SQL = (
+    'ALTER TABLE shop_supplierorder ADD CONSTRAINT shop_supplierorder_order_fk '
+    'FOREIGN KEY (order_id, order_created_at) REFERENCES shop_order (id, created_at) '
+    'DEFERRABLE INITIALLY DEFERRED'
+)
+
+
+def add_order_fk(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(ORDER_FK_SQL)
+
+
+def drop_order_fk(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE shop_supplierorder DROP CONSTRAINT IF EXISTS shop_supplierorder_order_fk'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_email_search_indexes'),
+        ('shop', '0011_supplier_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_created_at', models.DateTimeField(editable=False, verbose_name='Дата заказа')),
+                ('status', models.CharField(choices=[('new', 'Новый'), ('processing', 'В обработке'), ('shipped', 'Отправлен'), ('delivered', 'Доставлен'), ('canceled', 'Отменен')], default='new', max_length=15, verbose_name='Статус')),
+                ('notified_at', models.DateTimeField(blank=True, null=True, verbose_name='Поставщик уведомлен')),
+                ('order', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='supplier_orders', to='shop.order', verbose_name='Заказ')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplier_orders', to='users.supplier', verbose_name='Поставщик')),
+            ],
+            options={
+                'verbose_name': 'Заказ поставщику',
+                'verbose_name_plural': 'Заказы поставщикам',
+                'ordering': ('-order_created_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='supplier_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='shop.supplierorder', verbose_name='Заказ поставщику'),
+        ),
+        migrations.AddIndex(
+            model_name='supplierorder',
+            index=models.Index(fields=['supplier', '-order_created_at'], name='supplierorder_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplierorder',
+            index=models.Index(fields=['supplier', 'status', '-order_created_at'], name='supplierorder_status_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='supplierorder',
+            unique_together={('order', 'supplier')},
+        ),
+        migrations.RunPython(add_order_fk, drop_order_fk),
+    ]
@@ -0,0 +1,62 @@
+"""
+Разделение существующих заказов по поставщикам: для каждой пары
+(заказ, поставщик) создается SupplierOrder, позициям проставляется
+их часть заказа. Статус части - статус заказа.
+"""
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def split_existing_orders(apps, schema_editor):
+    Order = apps.get_model('shop', 'Order')
+    OrderItem = apps.get_model('shop', 'OrderItem')
+    SupplierOrder = apps.get_model('shop', 'SupplierOrder')
+    db_alias = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        orders = list(
+            Order.objects.using(db_alias).filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'created_at', 'status')[:BATCH_SIZE]
+        )
+        if not orders:
+            break
+        last_id = orders[-1][0]
+        orders = {order_id: (created_at, status) for order_id, created_at, status in orders}
+        dates = [created_at for created_at, _ in orders.values()]
+        items = OrderItem.objects.using(db_alias).filter(
+            order_id__in=orders,
+            order_created_at__gte=min(dates),
+            order_created_at__lte=max(dates),
+            supplier_order__isnull=True,
+        )
+
+        pairs = set(items.values_list('order_id', 'product_info__supplier_id'))
+        SupplierOrder.objects.using(db_alias).bulk_create([
+            SupplierOrder(
+                order_id=order_id,
+                order_created_at=orders[order_id][0],
+                supplier_id=supplier_id,
+                status=orders[order_id][1],
+            )
+            for order_id, supplier_id in sorted(pairs)
+        ])
+        items.update(supplier_order_id=Subquery(
+            SupplierOrder.objects.using(db_alias).filter(
+                order_id=OuterRef('order_id'),
+                supplier__product_infos__id=OuterRef('product_info_id'),
+            ).values('id')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0012_supplierorder'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_existing_orders, migrations.RunPython.noop),
+    ]
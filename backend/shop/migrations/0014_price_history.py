@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:43
+"""
+История цен и остатков предложений (PriceHistory).
+
+Колонки создаются в порядке bigint, timestamptz, bigint, integer,
+numeric - без выравнивания внутри строки. Для каждого существующего
+предложения записывается текущая цена (время - дата его изменения),
+строки добавляются в порядке времени. В PostgreSQL по `recorded_at`
+создается BRIN-индекс.
+"""
+from django.db import migrations, models
+import django.db.models.deletion
+
+SEED_BATCH_SIZE = 5000
+
+
+def seed_price_history(apps, schema_editor):
+    ProductInfo = apps.get_model('shop', 'ProductInfo')
+    PriceHistory = apps.get_model('shop', 'PriceHistory')
+    db_alias = schema_editor.connection.alias
+    offers = ProductInfo.objects.using(db_alias).order_by('updated_at', 'id').values_list(
+        'id', 'updated_at', 'quantity', 'price'
+    )
+    batch = []
+    for product_info_id, updated_at, quantity, price in offers.iterator(chunk_size=SEED_BATCH_SIZE):
+        batch.append(PriceHistory(
+            recorded_at=updated_at,
+            product_info_id=product_info_id,
+            quantity=quantity,
+            price=price,
+        ))
+        if len(batch) >= SEED_BATCH_SIZE:
+            PriceHistory.objects.using(db_alias).bulk_create(batch)
+            batch = []
+    PriceHistory.objects.using(db_alias).bulk_create(batch)
+
+
+def create_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS pricehistory_recorded_brin '
+        'ON shop_pricehistory USING brin (recorded_at)'
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS pricehistory_recorded_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0013_split_existing_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(verbose_name='Время изменения')),
+                ('product_info', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='shop.productinfo', verbose_name='Информация о товаре')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена')),
+            ],
+            options={
+                'verbose_name': 'Изменение цены',
+                'verbose_name_plural': 'История цен',
+            },
+        ),
+        migrations.RunPython(seed_price_history, migrations.RunPython.noop),
+        # Индексы - после заполнения: построить индекс быстрее, чем обновлять его
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['product_info', 'recorded_at'], name='pricehistory_offer_idx'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
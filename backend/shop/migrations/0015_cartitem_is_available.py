@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:45
+"""
+Признак доступности позиции корзины. Позиции поставщиков, которые уже
+не принимают заказы, помечаются недоступными.
+"""
+from django.db import migrations, models
+
+
+def flag_unavailable_items(apps, schema_editor):
+    CartItem = apps.get_model('shop', 'CartItem')
+    CartItem.objects.using(schema_editor.connection.alias).filter(
+        product_info__supplier__is_active=False
+    ).update(is_available=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0014_price_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='is_available',
+            field=models.BooleanField(default=True, verbose_name='Доступна для заказа'),
+        ),
+        migrations.RunPython(flag_unavailable_items, migrations.RunPython.noop),
+    ]
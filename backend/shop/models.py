@@ -1,4 +1,8 @@
+import json
+import zlib
+
 from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
 
 from users.models import Client, Contact, Supplier
 
@@ -16,10 +20,31 @@ class Category(models.Model):
         return self.name
 
 
+def normalize_product_name(name):
+    """
+    Ключ товара: название без учета регистра и лишних пробелов.
+    "Смартфон  Apple iPhone" и "смартфон apple iphone" - один товар.
+    """
+    return " ".join(str(name).split()).casefold()
+
+
 class Product(models.Model):
-    """Модель товара, общая для всех поставщиков."""
+    """
+    Модель товара, общая для всех поставщиков.
+
+    Товар однозначно определяется нормализованным названием (`name_key`),
+    по нему импорт прайс-листов находит товары одним запросом
+    INSERT ... ON CONFLICT.
+    """
 
     name = models.CharField(max_length=100, verbose_name="Название товара")
+    name_key = models.CharField(
+        max_length=255,
+        unique=True,
+        editable=False,
+        verbose_name="Ключ товара",
+        help_text="Нормализованное название, заполняется автоматически.",
+    )
     category = models.ForeignKey(
         Category,
         verbose_name="Категория",
@@ -35,6 +60,12 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.name_key = normalize_product_name(self.name)
+        if kwargs.get("update_fields") is not None and "name" in kwargs["update_fields"]:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "name_key"}
+        super().save(*args, **kwargs)
+
 
 class ProductInfo(models.Model):
     """
@@ -56,17 +87,62 @@ class ProductInfo(models.Model):
     )
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена")
     quantity = models.PositiveIntegerField(verbose_name="Количество")
+    # Дата последнего изменения предложения (для инкрементального экспорта)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
 
     class Meta:
         verbose_name = "Информация о товаре от поставщика"
         verbose_name_plural = "Информация о товарах от поставщиков"
         # Гарантируем, что для одного товара у одного поставщика есть только одна запись
         unique_together = ("supplier", "external_id")
+        indexes = [
+            # Выгрузка изменений: по всем поставщикам и по одному поставщику
+            models.Index(fields=("updated_at",), name="productinfo_updated_idx"),
+            models.Index(fields=("supplier", "updated_at"), name="productinfo_supplier_upd_idx"),
+        ]
 
     def __str__(self):
         return f"{self.product.name} от {self.supplier.name}"
 
 
+class PriceHistory(models.Model):
+    """
+    История цены и остатка предложения поставщика.
+
+    Строки только добавляются: импорт прайс-листа записывает цену и
+    остаток предложения при его создании и при каждом изменении цены
+    или количества, с одним временем `recorded_at` на весь импорт.
+    Поэтому строки лежат в таблице в порядке времени, и для выборок по
+    периоду миграция создает в PostgreSQL компактный BRIN-индекс по
+    `recorded_at` (pricehistory_recorded_brin). Ряд цен одного
+    предложения читается по индексу (product_info, recorded_at).
+    Порядок полей (8-байтовые id, recorded_at и product_info, затем
+    quantity и price) исключает выравнивание внутри строки.
+    """
+
+    recorded_at = models.DateTimeField(verbose_name="Время изменения")
+    product_info = models.ForeignKey(
+        ProductInfo,
+        verbose_name="Информация о товаре",
+        on_delete=models.CASCADE,
+        related_name="price_history",
+        # Отдельный индекс не нужен: поле - начало индекса pricehistory_offer_idx
+        db_index=False,
+    )
+    quantity = models.PositiveIntegerField(verbose_name="Количество")
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена")
+
+    class Meta:
+        verbose_name = "Изменение цены"
+        verbose_name_plural = "История цен"
+        indexes = [
+            models.Index(fields=("product_info", "recorded_at"), name="pricehistory_offer_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_info_id}: {self.price} ({self.recorded_at})"
+
+
 class Parameter(models.Model):
     """Название характеристики (например, "Цвет", "Размер")."""
 
@@ -96,18 +172,64 @@ class ProductParameter(models.Model):
         related_name="product_parameters",
     )
     value = models.CharField(max_length=100, verbose_name="Значение")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
 
     class Meta:
         verbose_name = "Параметр товара"
         verbose_name_plural = "Параметры товаров"
         unique_together = ("product_info", "parameter")
+        indexes = [
+            # Покрывающий индекс: выборка изменений для экспорта читает
+            # только product_info_id (index-only scan в PostgreSQL)
+            models.Index(
+                fields=("updated_at",),
+                include=("product_info",),
+                name="productparam_updated_cover_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.parameter.name}: {self.value}"
 
 
+class DeletedOffer(models.Model):
+    """
+    Удаленное предложение поставщика (запись для выгрузки изменений).
+
+    Строка добавляется при удалении ProductInfo (shop/signals.py), чтобы
+    потребители выгрузки изменений (`changed_since`) узнали об удалении.
+    Ссылки на поставщика, товар и категорию - простые числа, а не внешние
+    ключи: запись переживает удаление связанных объектов. Записи старше
+    EXPORT_DELETED_OFFERS_TTL дней удаляет задача cleanup_deleted_offers.
+    """
+
+    offer_id = models.BigIntegerField(verbose_name="ID предложения")
+    external_id = models.PositiveIntegerField(verbose_name="Внешний ID")
+    supplier_id = models.BigIntegerField(verbose_name="ID поставщика")
+    product_id = models.BigIntegerField(verbose_name="ID товара")
+    category_id = models.BigIntegerField(null=True, verbose_name="ID категории")
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата удаления")
+
+    class Meta:
+        verbose_name = "Удаленное предложение"
+        verbose_name_plural = "Удаленные предложения"
+        indexes = [
+            # Выгрузка удалений: по всем поставщикам и по одному поставщику
+            models.Index(fields=("deleted_at",), name="deletedoffer_deleted_idx"),
+            models.Index(fields=("supplier_id", "deleted_at"), name="deletedoffer_supplier_del_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.offer_id} ({self.deleted_at})"
+
+
 class Order(models.Model):
-    """Заказ, сделанный клиентом."""
+    """
+    Заказ, сделанный клиентом.
+
+    В PostgreSQL таблица секционирована по месяцам `created_at`
+    (shop/partitions.py), первичный ключ в БД - (id, created_at).
+    """
 
     class OrderStatus(models.TextChoices):
         NEW = "new", "Новый"
@@ -131,21 +253,118 @@ class Order(models.Model):
         default=OrderStatus.NEW,
         verbose_name="Статус заказа",
     )
+    # Когда администратор получил уведомление о заказе (письмом или в сводке)
+    admin_notified_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Администратор уведомлен"
+    )
 
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
         ordering = ("-created_at",)
+        indexes = [
+            # Заказы клиента, новые первыми (список заказов)
+            models.Index(fields=("client", "-created_at"), name="order_client_created_idx"),
+            # Все заказы по дате (админка: сортировка, фильтр по периоду, MIN/MAX)
+            models.Index(fields=("-created_at",), name="order_created_idx"),
+            # Частичный индекс: сводка выбирает только неотправленные заказы
+            models.Index(
+                fields=("created_at",),
+                condition=models.Q(admin_notified_at__isnull=True),
+                name="order_admin_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return f'Заказ №{self.id} от {self.created_at.strftime("%Y-%m-%d")}'
 
 
+class SupplierOrder(models.Model):
+    """
+    Часть заказа одного поставщика: позиции заказа с его товарами.
+
+    Создается при оформлении заказа для каждого поставщика из корзины.
+    Очередь заказов поставщика читается из этой таблицы по индексу
+    (supplier, -order_created_at), без перебора позиций заказов.
+    В PostgreSQL внешний ключ на заказ составной
+    (order_id, order_created_at) и создан миграцией, как у OrderItem.
+    """
+
+    order = models.ForeignKey(
+        Order,
+        verbose_name="Заказ",
+        on_delete=models.CASCADE,
+        related_name="supplier_orders",
+        db_constraint=False,
+    )
+    # Копия Order.created_at: сортировка очереди и составной внешний ключ
+    order_created_at = models.DateTimeField(editable=False, verbose_name="Дата заказа")
+    supplier = models.ForeignKey(
+        Supplier,
+        verbose_name="Поставщик",
+        on_delete=models.CASCADE,
+        related_name="supplier_orders",
+    )
+    status = models.CharField(
+        max_length=15,
+        choices=Order.OrderStatus.choices,
+        default=Order.OrderStatus.NEW,
+        verbose_name="Статус",
+    )
+    # Когда поставщику отправлено уведомление о заказе
+    notified_at = models.DateTimeField(null=True, blank=True, verbose_name="Поставщик уведомлен")
+
+    class Meta:
+        verbose_name = "Заказ поставщику"
+        verbose_name_plural = "Заказы поставщикам"
+        ordering = ("-order_created_at",)
+        unique_together = ("order", "supplier")
+        indexes = [
+            # Очередь заказов поставщика: все и с фильтром по статусу
+            models.Index(fields=("supplier", "-order_created_at"), name="supplierorder_queue_idx"),
+            models.Index(
+                fields=("supplier", "status", "-order_created_at"), name="supplierorder_status_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Заказ №{self.order_id} для поставщика №{self.supplier_id}"
+
+    def save(self, *args, **kwargs):
+        if self.order_created_at is None:
+            self.order_created_at = self.order.created_at
+        super().save(*args, **kwargs)
+
+
 class OrderItem(models.Model):
-    """Позиция в заказе."""
+    """
+    Позиция в заказе.
+
+    В PostgreSQL таблица позиций секционирована по месяцам вместе с
+    заказами (shop/partitions.py): ключ секционирования - дата заказа
+    `order_created_at`, внешний ключ на заказ составной
+    (order_id, order_created_at) и создан миграцией, поэтому у поля
+    `order` db_constraint=False.
+    """
 
     order = models.ForeignKey(
-        Order, verbose_name="Заказ", on_delete=models.CASCADE, related_name="items"
+        Order,
+        verbose_name="Заказ",
+        on_delete=models.CASCADE,
+        related_name="items",
+        db_constraint=False,
+    )
+    # Копия Order.created_at - ключ секционирования позиций
+    order_created_at = models.DateTimeField(editable=False, verbose_name="Дата заказа")
+    # Часть заказа поставщика этой позиции (пусто только у позиций,
+    # созданных до разделения заказов по поставщикам)
+    supplier_order = models.ForeignKey(
+        SupplierOrder,
+        verbose_name="Заказ поставщику",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="items",
     )
     product_info = models.ForeignKey(
         ProductInfo,
@@ -161,7 +380,51 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Позиция заказа"
         verbose_name_plural = "Позиции заказов"
-        unique_together = ("order", "product_info")
+        # Уникальные ограничения секционированной таблицы должны включать ключ секционирования
+        unique_together = ("order", "product_info", "order_created_at")
+
+    def save(self, *args, **kwargs):
+        if self.order_created_at is None:
+            self.order_created_at = self.order.created_at
+        super().save(*args, **kwargs)
+
+
+class ArchivedOrder(models.Model):
+    """
+    Закрытый (доставленный или отмененный) заказ, перенесенный в архив
+    (shop/archive.py). Заказ с позициями хранится в сжатом виде - как его
+    отдавал API в момент архивации.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="Номер заказа")
+    client = models.ForeignKey(
+        Client, verbose_name="Клиент", on_delete=models.CASCADE, related_name="archived_orders"
+    )
+    status = models.CharField(
+        max_length=15, choices=Order.OrderStatus.choices, verbose_name="Статус заказа"
+    )
+    created_at = models.DateTimeField(verbose_name="Дата создания")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата архивации")
+    data = models.BinaryField(verbose_name="Данные заказа (JSON, zlib)")
+
+    class Meta:
+        verbose_name = "Архивный заказ"
+        verbose_name_plural = "Архивные заказы"
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=("client", "-created_at"), name="archivedorder_client_idx"),
+        ]
+
+    def __str__(self):
+        return f'Архивный заказ №{self.id} от {self.created_at.strftime("%Y-%m-%d")}'
+
+    def get_data(self):
+        return json.loads(zlib.decompress(self.data))
+
+    def set_data(self, data):
+        # Кодировщик DRF: суммы и даты - как в ответах API
+        payload = json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+        self.data = zlib.compress(payload.encode("utf-8"), 9)
 
 
 class Cart(models.Model):
@@ -189,8 +452,88 @@ class CartItem(models.Model):
         ProductInfo, verbose_name="Информация о товаре", on_delete=models.CASCADE
     )
     quantity = models.PositiveIntegerField(default=1, verbose_name="Количество")
+    # Снимается у всех позиций поставщика одним UPDATE, когда поставщик
+    # перестает принимать заказы (shop/signals.py), и возвращается при включении
+    is_available = models.BooleanField(default=True, verbose_name="Доступна для заказа")
 
     class Meta:
         verbose_name = "Позиция в корзине"
         verbose_name_plural = "Позиции в корзине"
         unique_together = ("cart", "product_info")
+
+
+class SalesRollup(models.Model):
+    """
+    Предрасчитанные продажи поставщика за день (shop/analytics.py).
+    Обновляются периодической задачей по новым заказам, отчеты читают
+    только эти таблицы.
+    """
+
+    supplier = models.ForeignKey(
+        Supplier, verbose_name="Поставщик", on_delete=models.CASCADE, related_name="+"
+    )
+    day = models.DateField(verbose_name="День")
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Выручка"
+    )
+    units = models.PositiveBigIntegerField(default=0, verbose_name="Продано единиц")
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+
+    class Meta:
+        abstract = True
+
+
+class SupplierDailySales(SalesRollup):
+    """Продажи поставщика за день."""
+
+    class Meta:
+        verbose_name = "Продажи поставщика за день"
+        verbose_name_plural = "Продажи поставщиков по дням"
+        unique_together = ("supplier", "day")
+
+
+class SupplierProductSales(SalesRollup):
+    """Продажи товара поставщика за день."""
+
+    product = models.ForeignKey(
+        Product, verbose_name="Товар", on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        verbose_name = "Продажи товара поставщика за день"
+        verbose_name_plural = "Продажи поставщиков по товарам"
+        unique_together = ("supplier", "day", "product")
+
+
+class SupplierCategorySales(SalesRollup):
+    """Продажи поставщика в категории за день (category=None - товары без категории)."""
+
+    category = models.ForeignKey(
+        Category, verbose_name="Категория", on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+
+    class Meta:
+        verbose_name = "Продажи поставщика в категории за день"
+        verbose_name_plural = "Продажи поставщиков по категориям"
+        unique_together = ("supplier", "day", "category")
+
+
+class SalesRollupState(models.Model):
+    """
+    Отметка уровня (high-water mark) обновления продаж: заказы с номером
+    до `last_order_id` включительно уже учтены.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Название")
+    last_order_id = models.BigIntegerField(default=0, verbose_name="Последний учтенный заказ")
+    last_order_created_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Дата последнего учтенного заказа"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    class Meta:
+        verbose_name = "Состояние расчета продаж"
+        verbose_name_plural = "Состояние расчета продаж"
+
+    def __str__(self):
+        return f"{self.name}: заказ №{self.last_order_id}"
@@ -0,0 +1,221 @@
+"""
+Месячные секции заказов (только PostgreSQL).
+
+Таблицы shop_order и shop_orderitem секционированы по диапазону дат
+(миграция 0008_partition_orders): заказы - по `created_at`, позиции - по
+дате своего заказа `order_created_at`. Секции:
+
+- <таблица>_pYYYY_MM - один месяц (границы в UTC);
+- <таблица>_legacy - все данные, существовавшие до секционирования;
+- <таблица>_default - строки, для месяца которых секция еще не создана.
+
+Месячные секции создаются заранее (ORDER_PARTITIONS_AHEAD месяцев)
+задачей `create_order_partitions` или командой `manage.py order_partitions`.
+Если в секции по умолчанию уже есть строки нового месяца, они переносятся
+в созданную секцию. Старые секции, опустевшие после архивации
+(shop/archive.py), можно удалить той же командой.
+"""
+import re
+from datetime import date, datetime, timezone
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Позиции идут после заказов: внешний ключ позиций ссылается на заказы
+PARTITIONED_TABLES = (
+    ('shop_order', 'created_at'),
+    ('shop_orderitem', 'order_created_at'),
+)
+
+# Составные внешние ключи на заказ: (таблица, имя ограничения). Созданы
+# миграциями 0008 (позиции) и 0012 (заказы поставщикам)
+ORDER_FOREIGN_KEYS = (
+    ('shop_orderitem', 'shop_orderitem_order_fk'),
+    ('shop_supplierorder', 'shop_supplierorder_order_fk'),
+)
+ORDER_FK_SQL = (
+    'ALTER TABLE {table} ADD CONSTRAINT {name} '
+    'FOREIGN KEY (order_id, order_created_at) REFERENCES shop_order (id, created_at) '
+    'DEFERRABLE INITIALLY DEFERRED'
+)
+
+_BOUND_RE = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+def month_start(value):
+    """Первое число месяца для даты или datetime (в UTC)."""
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def month_bound(month):
+    """Граница секции: начало месяца в UTC."""
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def is_partitioned(connection, table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))',
+            [table],
+        )
+        return cursor.fetchone()[0]
+
+
+def _parse_bound(value):
+    if value in ('MINVALUE', 'MAXVALUE'):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def get_partitions(connection, table):
+    """
+    Секции таблицы: список (имя, начало, конец). Для MINVALUE/MAXVALUE
+    граница - None; у секции по умолчанию обе границы - None.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            ORDER BY c.relname
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound)
+        if match is None:
+            partitions.append((name, None, None))
+        else:
+            partitions.append((name, _parse_bound(match[1]), _parse_bound(match[2])))
+    return partitions
+
+
+def _is_covered(partitions, moment):
+    """Есть ли секция (кроме секции по умолчанию), в которую попадает момент."""
+    return any(
+        (lower is not None or upper is not None)
+        and (lower is None or lower <= moment)
+        and (upper is None or moment < upper)
+        for _, lower, upper in partitions
+    )
+
+
+def _default_has_rows(connection, table, key, month):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {qn(table + "_default")} '
+            f'WHERE {qn(key)} >= %s AND {qn(key)} < %s)',
+            [month_bound(month), month_bound(add_months(month, 1))],
+        )
+        return cursor.fetchone()[0]
+
+
+def create_month_partition(connection, table, key, month):
+    """
+    Создает секцию месяца. Строки этого месяца из секции по умолчанию
+    переносятся в новую секцию до ее подключения к таблице.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, month)
+    lower, upper = month_bound(month), month_bound(add_months(month, 1))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(table + "_default")} '
+            f'WHERE {qn(key)} >= %s AND {qn(key)} < %s RETURNING *) '
+            f'INSERT INTO {qn(name)} SELECT * FROM moved',
+            [lower, upper],
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)',
+            [lower, upper],
+        )
+    return name
+
+
+def ensure_order_partitions(months_ahead, using=DEFAULT_DB_ALIAS, today=None):
+    """
+    Создает недостающие месячные секции заказов и позиций с текущего
+    месяца на `months_ahead` месяцев вперед. Возвращает имена созданных секций.
+    """
+    connection = connections[using]
+    if not is_partitioned(connection, PARTITIONED_TABLES[0][0]):
+        return []
+    current = month_start(today or datetime.now(timezone.utc))
+    missing = []
+    for table, key in PARTITIONED_TABLES:
+        partitions = get_partitions(connection, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if not _is_covered(partitions, month_bound(month)):
+                missing.append((table, key, month))
+    if not missing:
+        return []
+
+    with transaction.atomic(using=using):
+        # Строки заказов нельзя перенести между секциями, пока на них
+        # ссылаются позиции и заказы поставщикам: на время переноса внешние
+        # ключи снимаются (обычно секции создаются заранее и секция по
+        # умолчанию пуста)
+        moving = any(_default_has_rows(connection, *args) for args in missing)
+        if moving:
+            with connection.cursor() as cursor:
+                for table, name in ORDER_FOREIGN_KEYS:
+                    cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+        created = [create_month_partition(connection, *args) for args in missing]
+        if moving:
+            with connection.cursor() as cursor:
+                for table, name in ORDER_FOREIGN_KEYS:
+                    cursor.execute(ORDER_FK_SQL.format(table=table, name=name))
+    return created
+
+
+def drop_empty_partitions(before_month, using=DEFAULT_DB_ALIAS):
+    """
+    Удаляет секции, целиком лежащие до `before_month`, если секции этого
+    периода пусты и у заказов, и у позиций (как правило, после архивации
+    старых заказов). Возвращает имена удаленных секций.
+    """
+    connection = connections[using]
+    if not is_partitioned(connection, PARTITIONED_TABLES[0][0]):
+        return []
+    qn = connection.ops.quote_name
+    limit = month_bound(before_month)
+    dropped = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # Секции одного периода у обеих таблиц имеют одинаковый суффикс (_p2025_01, _legacy)
+        candidates = {}
+        for table, _ in PARTITIONED_TABLES:
+            for name, _, upper in get_partitions(connection, table):
+                if upper is not None and upper <= limit:
+                    candidates.setdefault(name[len(table):], []).append((table, name))
+        for suffix, partitions in sorted(candidates.items()):
+            cursor.execute(
+                ' UNION ALL '.join(f'(SELECT 1 FROM {qn(name)} LIMIT 1)' for _, name in partitions)
+            )
+            if cursor.fetchone() is not None:
+                continue
+            # Позиции - раньше заказов: их внешний ключ ссылается на заказы
+            for table, name in reversed(partitions):
+                cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+                cursor.execute(f'DROP TABLE {qn(name)}')
+                dropped.append(name)
+    return dropped
@@ -0,0 +1,190 @@
+"""
+Справочники каталога: категории (Category) и параметры (Parameter).
+
+Таблицы небольшие и меняются редко, поэтому их содержимое кэшируется
+на двух уровнях:
+
+- в памяти процесса (веб-процесс, процесс воркера Celery) - названия
+  категорий и параметров читаются без обращения к БД и Redis;
+- в общем кэше (Redis) - снимок справочников, из которого процессы
+  загружают их без запроса к БД.
+
+Версия справочников хранится в общем кэше и меняется после фиксации
+транзакции, изменившей категории или параметры (сигналы в
+shop/signals.py, импорт прайс-листа). Снимок хранится под ключом своей
+версии, поэтому устаревший снимок после смены версии не читается.
+Процесс сверяет свою версию с общей не чаще раза в
+REFERENCE_CACHE_CHECK_INTERVAL секунд; свои изменения он видит сразу.
+Если нужного названия нет в памяти (запись создана другим процессом
+только что), справочники перечитываются из БД.
+
+Справочники загружаются заранее при старте процессов воркера Celery и
+gunicorn (`preload_reference_data`).
+"""
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category, Parameter
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_VERSION_KEY = 'reference:version'
+REFERENCE_DATA_KEY = 'reference:data:{version}'
+
+
+class ReferenceData:
+    """
+    Снимок справочников: {id: название} категорий и параметров и
+    {название: id} параметров (при одинаковых названиях - меньший id).
+    """
+
+    def __init__(self, categories, parameters):
+        self.categories = categories
+        self.parameters = parameters
+        self.parameter_ids = {}
+        for parameter_id, name in sorted(parameters.items()):
+            self.parameter_ids.setdefault(name, parameter_id)
+
+    @classmethod
+    def from_db(cls):
+        return cls(
+            dict(Category.objects.values_list('id', 'name')),
+            dict(Parameter.objects.values_list('id', 'name')),
+        )
+
+    def to_cache(self):
+        return {'categories': self.categories, 'parameters': self.parameters}
+
+    @classmethod
+    def from_cache(cls, data):
+        return cls(data['categories'], data['parameters'])
+
+
+# Справочники процесса: (версия, снимок, время последней сверки версии)
+_state = None
+
+
+def get_reference_version():
+    return cache.get_or_set(REFERENCE_VERSION_KEY, _new_version, timeout=None)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _load(version):
+    """Снимок версии `version` из общего кэша или, при промахе, из БД."""
+    key = REFERENCE_DATA_KEY.format(version=version)
+    data = cache.get(key)
+    if data is not None:
+        return ReferenceData.from_cache(data)
+    reference = ReferenceData.from_db()
+    if not transaction.get_connection().in_atomic_block:
+        cache.set(key, reference.to_cache(), settings.REFERENCE_CACHE_TTL)
+    return reference
+
+
+def get_reference_data(force_check=False):
+    """
+    Справочники процесса. Версия сверяется с общим кэшем не чаще раза в
+    REFERENCE_CACHE_CHECK_INTERVAL секунд (или сразу при `force_check`).
+
+    Внутри транзакции загруженные справочники не перечитываются, а
+    прочитанные из БД не сохраняются: транзакция может видеть свои еще
+    не зафиксированные записи. Поэтому импорт загружает справочники до
+    начала транзакции.
+    """
+    global _state
+    now = time.monotonic()
+    state = _state
+    in_transaction = transaction.get_connection().in_atomic_block
+    if state is not None and not force_check and (
+        in_transaction or now - state[2] < settings.REFERENCE_CACHE_CHECK_INTERVAL
+    ):
+        return state[1]
+    version = get_reference_version()
+    if state is not None and state[0] == version:
+        _state = (version, state[1], now)
+        return state[1]
+    reference = _load(version)
+    if not in_transaction:
+        _state = (version, reference, now)
+    return reference
+
+
+def _refresh_from_db():
+    """
+    Перечитывает справочники процесса из БД. Нужен, если запись уже
+    видна в БД, а версия справочников еще не сменилась.
+    """
+    global _state
+    reference = ReferenceData.from_db()
+    # Внутри транзакции прочитанные записи могут быть отменены откатом,
+    # такой снимок в памяти процесса не сохраняется
+    if not transaction.get_connection().in_atomic_block:
+        _state = (get_reference_version(), reference, time.monotonic())
+    return reference
+
+
+def category_name(category_id):
+    """Название категории по id (None, если категории нет)."""
+    name = get_reference_data().categories.get(category_id)
+    if name is None and category_id is not None:
+        name = _refresh_from_db().categories.get(category_id)
+    return name
+
+
+def parameter_name(parameter_id):
+    """Название параметра по id (None, если параметра нет)."""
+    name = get_reference_data().parameters.get(parameter_id)
+    if name is None and parameter_id is not None:
+        name = _refresh_from_db().parameters.get(parameter_id)
+    return name
+
+
+def get_reference_data_for(parameter_ids):
+    """
+    Справочники процесса, в которых есть все параметры `parameter_ids`
+    (при необходимости перечитываются из БД). Асинхронные представления
+    вызывают ее до сериализации, которая выполняется в цикле событий.
+    """
+    reference = get_reference_data()
+    if not reference.parameters.keys() >= set(parameter_ids):
+        reference = _refresh_from_db()
+    return reference
+
+
+def _set_new_version():
+    global _state
+    cache.set(REFERENCE_VERSION_KEY, _new_version(), timeout=None)
+    _state = None
+
+
+def bump_reference_version():
+    """
+    Меняет версию справочников после фиксации текущей транзакции
+    (один раз на транзакцию, как версия каталога в shop/catalog.py).
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _set_new_version()
+        return
+    if any(func is _set_new_version for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(_set_new_version)
+
+
+def preload_reference_data():
+    """
+    Загружает справочники в память процесса при его старте. Ошибка
+    загрузки не мешает запуску: справочники загрузятся при первом обращении.
+    """
+    try:
+        get_reference_data(force_check=True)
+    except Exception as e:
+        logger.warning('Не удалось загрузить справочники: %s', e)
@@ -0,0 +1,25 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+def format_event(event, data):
+    """Одно событие Server-Sent Events."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f'event: {event}\ndata: {payload}\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Рендерер для `Accept: text/event-stream`.
+
+    Сам поток событий представление отдает через StreamingHttpResponse;
+    рендерер нужен для согласования формата и для ответов с ошибками
+    (401, 403 и т.п.), которые отправляются одним событием `error`.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data).encode(self.charset)
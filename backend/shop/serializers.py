@@ -1,12 +1,19 @@
+from datetime import timedelta
+
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Count, Q, prefetch_related_objects
+from django.utils import timezone
 from users.models import Supplier
-from .models import Product, ProductInfo, ProductParameter, Parameter, Category
+from .exporters import EXPORT_WRITERS
+from .reference import parameter_name
+from .models import Product, ProductInfo, ProductParameter, Parameter, Category, DeletedOffer
 from .models import Cart, CartItem, ProductInfo
 
 from users.models import Contact
-from .models import Order, OrderItem
+from .models import Order, OrderItem, PriceHistory, SupplierOrder
 
 
 class SupplierStatusSerializer(serializers.ModelSerializer):
@@ -21,6 +28,12 @@ class SupplierStatusSerializer(serializers.ModelSerializer):
         read_only_fields = ('name',)
 
 
+class CategorySerializer(serializers.Serializer):
+    """Категория из справочника (shop/reference.py)."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
 class ParameterSerializer(serializers.ModelSerializer):
     """Сериализатор для названий характеристик."""
     class Meta:
@@ -29,13 +42,23 @@ class ParameterSerializer(serializers.ModelSerializer):
 
 
 class ProductParameterSerializer(serializers.ModelSerializer):
-    """Сериализатор для вывода характеристик товара."""
-    parameter = ParameterSerializer() # Вложенный сериализатор
+    """
+    Сериализатор для вывода характеристик товара. Название параметра
+    берется из справочника в памяти (shop/reference.py), без JOIN с Parameter.
+    """
+    parameter = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductParameter
         fields = ('parameter', 'value')
 
+    def get_parameter(self, obj):
+        # Асинхронные представления передают заранее загруженный справочник
+        reference = self.context.get('reference')
+        if reference is None:
+            return {'name': parameter_name(obj.parameter_id)}
+        return {'name': reference.parameters.get(obj.parameter_id)}
+
 
 class ProductInfoSerializer(serializers.ModelSerializer):
     """Сериализатор для информации о товаре от поставщика."""
@@ -60,6 +83,62 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'category', 'product_infos')
 
 
+class ProductExportParamsSerializer(serializers.Serializer):
+    """
+    Параметры экспорта каталога (передаются в query string).
+    """
+    supplier = serializers.IntegerField(required=False, min_value=1)
+    category = serializers.IntegerField(required=False, min_value=1)
+    changed_since = serializers.DateTimeField(required=False)
+    # Не `format`: этот query-параметр DRF использует для выбора рендерера
+    file_format = serializers.ChoiceField(choices=sorted(EXPORT_WRITERS), default='json')
+
+    def validate(self, data):
+        if EXPORT_WRITERS[data['file_format']].requires_supplier:
+            if 'supplier' not in data:
+                raise ValidationError(
+                    {'supplier': ['Для этого формата необходимо указать поставщика.']}
+                )
+            # Прайс-лист выгружается целиком: при загрузке неполного файла
+            # импорт удалил бы все предложения поставщика, которых в нем нет
+            errors = {
+                field: ['Этот формат выгружает полный прайс-лист поставщика, фильтр недоступен.']
+                for field in ('category', 'changed_since') if field in data
+            }
+            if errors:
+                raise ValidationError(errors)
+        return data
+
+    def task_kwargs(self):
+        """Аргументы для задачи экспорта (только JSON-совместимые типы)."""
+        data = self.validated_data
+        changed_since = data.get('changed_since')
+        return {
+            'supplier_id': data.get('supplier'),
+            'category_id': data.get('category'),
+            'changed_since': changed_since.isoformat() if changed_since else None,
+            'export_format': data['file_format'],
+        }
+
+
+class DeletedOffersParamsSerializer(serializers.Serializer):
+    """
+    Параметры списка удаленных предложений (query string): те же фильтры,
+    что у экспорта изменений, `changed_since` обязателен.
+    """
+    supplier = serializers.IntegerField(required=False, min_value=1)
+    category = serializers.IntegerField(required=False, min_value=1)
+    changed_since = serializers.DateTimeField()
+
+
+class DeletedOfferSerializer(serializers.ModelSerializer):
+    """Удаленное предложение: ID в каталоге и у поставщика, время удаления."""
+
+    class Meta:
+        model = DeletedOffer
+        fields = ('offer_id', 'external_id', 'supplier_id', 'product_id', 'category_id', 'deleted_at')
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     """
     Сериализатор для отображения позиций в корзине (для чтения).
@@ -78,7 +157,7 @@ class CartItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CartItem
-        fields = ('id', 'name', 'price', 'quantity', 'total_sum')
+        fields = ('id', 'name', 'price', 'quantity', 'is_available', 'total_sum')
 
     def get_total_sum(self, obj):
         """Вычисляет сумму (цена * количество)."""
@@ -99,8 +178,13 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ('id', 'items', 'total_sum')
 
     def get_total_sum(self, obj):
-        """Вычисляет общую сумму всех позиций в корзине."""
-        return sum(item.product_info.price * item.quantity for item in obj.items.all())
+        """
+        Вычисляет общую сумму позиций в корзине. Позиции поставщиков,
+        которые не принимают заказы (`is_available=False`), не учитываются.
+        """
+        return sum(
+            item.product_info.price * item.quantity for item in obj.items.all() if item.is_available
+        )
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -149,9 +233,21 @@ class OrderSerializer(serializers.ModelSerializer):
         cart, _ = Cart.objects.get_or_create(client=request.user.client_profile)
 
         # Теперь, когда мы уверены, что `cart` существует, мы можем проверить ее содержимое.
-        if not cart.items.exists():
+        # Пустая корзина и товары поставщиков, которые не принимают заказы, -
+        # одним запросом по текущему статусу поставщиков, без проверки каждой позиции.
+        items = cart.items.aggregate(
+            total=Count('id'),
+            unavailable=Count('id', filter=Q(product_info__supplier__is_active=False)),
+        )
+        if not items['total']:
             raise serializers.ValidationError(
                 {'non_field_errors': ['Нельзя оформить заказ с пустой корзиной.']})
+        if items['unavailable']:
+            raise serializers.ValidationError(
+                {'non_field_errors': [
+                    'В корзине есть товары поставщиков, которые временно не принимают '
+                    'заказы. Удалите их из корзины.'
+                ]})
         
         contact_id = data.get('contact_id')
         request = self.context['request']
@@ -175,7 +271,11 @@ class OrderSerializer(serializers.ModelSerializer):
         Создаем заказ, переносим товары из корзины и запускаем задачи.
         """
 
-        from .tasks import send_order_confirmation_email, send_new_order_notification_to_admin
+        from .tasks import (
+            notify_suppliers,
+            send_new_order_notification_to_admin,
+            send_order_confirmation_email,
+        )
         
         request = self.context['request']
         user = request.user
@@ -188,21 +288,48 @@ class OrderSerializer(serializers.ModelSerializer):
                 client=user.client_profile,
                 contact=contact
             )
-
-            for item in cart.items.all():
-                OrderItem.objects.create(
+            cart_items = list(cart.items.select_related('product_info'))
+
+            # Заказ делится по поставщикам: по части заказа на каждого
+            # поставщика, все части - одним запросом
+            supplier_orders = SupplierOrder.objects.bulk_create([
+                SupplierOrder(order=order, order_created_at=order.created_at, supplier_id=supplier_id)
+                for supplier_id in sorted({item.product_info.supplier_id for item in cart_items})
+            ])
+            by_supplier = {
+                supplier_order.supplier_id: supplier_order for supplier_order in supplier_orders
+            }
+
+            # Позиции создаются одним запросом, товары корзины читаются вместе с ценами
+            OrderItem.objects.bulk_create([
+                OrderItem(
                     order=order,
+                    order_created_at=order.created_at,
+                    supplier_order=by_supplier[item.product_info.supplier_id],
                     product_info=item.product_info,
                     quantity=item.quantity,
                     price_per_item=item.product_info.price
                 )
+                for item in cart_items
+            ])
             
             cart.items.all().delete()
 
-            send_order_confirmation_email.delay(order.id, user.email)
-            send_new_order_notification_to_admin.delay(order.id)
-            
-            return order
+            # Все задачи ставятся после фиксации транзакции: воркер не начнет
+            # задачу раньше, чем заказ появится в БД, а при откате оформления
+            # письма не уходят
+            order_id, email = order.id, user.email
+            transaction.on_commit(lambda: send_order_confirmation_email.delay(order_id, email))
+            # В режиме сводки администратор получит заказ в периодическом письме
+            if settings.ADMIN_ORDER_NOTIFICATIONS == 'realtime':
+                transaction.on_commit(lambda: send_new_order_notification_to_admin.delay(order_id))
+            # Поставщики уведомляются параллельно
+            supplier_order_ids = [supplier_order.id for supplier_order in supplier_orders]
+            transaction.on_commit(lambda: notify_suppliers(supplier_order_ids))
+
+        # Для ответа: позиции с названиями товаров без запроса на каждую позицию
+        prefetch_related_objects([order], 'items__product_info__product')
+        return order
 
 
 
@@ -269,8 +396,8 @@ class CartItemWriteSerializer(serializers.ModelSerializer):
         product_info_id = data.get('product_info_id')
         
         try:
-            # Пытаемся найти объект ProductInfo по ID
-            product_info = ProductInfo.objects.get(id=product_info_id)
+            # Пытаемся найти объект ProductInfo по ID (вместе с поставщиком)
+            product_info = ProductInfo.objects.select_related('supplier').get(id=product_info_id)
         except ProductInfo.DoesNotExist:
             # Если не найден, генерируем кастомную ошибку
             raise ValidationError({'product_info': ['Товар с указанным ID не найден.']})
@@ -286,3 +413,108 @@ class CartItemWriteSerializer(serializers.ModelSerializer):
         
         return data
 
+
+class ArchivedOrderSerializer(serializers.BaseSerializer):
+    """
+    Архивный заказ (shop/archive.py) в том же виде, что и OrderSerializer:
+    данные сохранены при архивации, к ним добавлен признак `archived`.
+    """
+
+    def to_representation(self, instance):
+        return {**instance.get_data(), 'archived': True}
+
+
+class PeriodParamsSerializer(serializers.Serializer):
+    """
+    Период отчета в query string: `date_from` и `date_to` (обе даты
+    включаются). Без дат - последние `default_days` дней, включая сегодня;
+    период не длиннее `max_days` дней. Значения берутся из настроек,
+    имена которых заданы в подклассе.
+    """
+    default_days_setting = None
+    max_days_setting = None
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        default_days = getattr(settings, self.default_days_setting)
+        max_days = getattr(settings, self.max_days_setting)
+        date_to = data.setdefault('date_to', timezone.localdate())
+        date_from = data.setdefault('date_from', date_to - timedelta(days=default_days - 1))
+        if date_from > date_to:
+            raise ValidationError({'date_from': ['Начало периода позже его конца.']})
+        if (date_to - date_from).days >= max_days:
+            raise ValidationError(
+                {'date_from': [f'Период не может быть длиннее {max_days} дней.']}
+            )
+        return data
+
+
+class SupplierSalesParamsSerializer(PeriodParamsSerializer):
+    """
+    Параметры отчета о продажах поставщика (query string). Без дат -
+    последние SALES_REPORT_DEFAULT_DAYS дней, включая сегодня.
+    """
+    default_days_setting = 'SALES_REPORT_DEFAULT_DAYS'
+    max_days_setting = 'SALES_REPORT_MAX_DAYS'
+
+    group_by = serializers.ChoiceField(choices=('day', 'product', 'category'), default='day')
+
+
+class SalesFiguresSerializer(serializers.Serializer):
+    """Показатели продаж: выручка, проданные единицы и число заказов."""
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField()
+
+
+class SupplierDailySalesSerializer(SalesFiguresSerializer):
+    """Строка отчета о продажах по дням."""
+    day = serializers.DateField()
+
+
+class SupplierProductSalesSerializer(SalesFiguresSerializer):
+    """Строка отчета о продажах по товарам."""
+    product_id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
+class SupplierCategorySalesSerializer(SalesFiguresSerializer):
+    """Строка отчета о продажах по категориям (category_id=None - без категории)."""
+    category_id = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField(allow_null=True)
+
+
+class SupplierOrderSerializer(serializers.ModelSerializer):
+    """
+    Часть заказа поставщика: его позиции заказа и их сумма.
+    """
+    order_id = serializers.IntegerField(read_only=True)
+    created_at = serializers.DateTimeField(source='order_created_at', read_only=True)
+    items = OrderItemSerializer(many=True, read_only=True)
+    total_sum = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SupplierOrder
+        fields = ('id', 'order_id', 'created_at', 'status', 'items', 'total_sum')
+
+    def get_total_sum(self, obj):
+        return sum(item.quantity * item.price_per_item for item in obj.items.all())
+
+
+class PriceHistoryParamsSerializer(PeriodParamsSerializer):
+    """
+    Период истории цен предложения (query string). Без дат - последние
+    PRICE_HISTORY_DEFAULT_DAYS дней, включая сегодня.
+    """
+    default_days_setting = 'PRICE_HISTORY_DEFAULT_DAYS'
+    max_days_setting = 'PRICE_HISTORY_MAX_DAYS'
+
+
+class PriceHistorySerializer(serializers.ModelSerializer):
+    """Точка ряда цен: цена и остаток предложения с момента `recorded_at`."""
+
+    class Meta:
+        model = PriceHistory
+        fields = ('recorded_at', 'price', 'quantity')
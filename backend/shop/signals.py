@@ -1,6 +1,16 @@
-from django.db.models.signals import pre_save, post_save
+from celery import states
+from celery.signals import task_postrun, worker_process_init
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, pre_delete, pre_save, post_save
 from django.dispatch import receiver
-from .models import Order
+from users.models import Supplier
+from .catalog import bump_catalog_version
+from .exporters import touch_offers
+from .reference import bump_reference_version, preload_reference_data
+from .models import (
+    CartItem, Category, DeletedOffer, Order, Parameter, Product, ProductInfo, ProductParameter,
+)
+from .task_events import publish_task_finished
 from .tasks import send_status_change_email
 
 
@@ -33,4 +43,197 @@ def order_status_changed(sender, instance, created, **kwargs):
                 instance.id,
                 instance.client.user.email,
                 instance.status
-            )
\ No newline at end of file
+            )
+
+@receiver(pre_save, sender=Supplier)
+def cache_old_supplier_activity(sender, instance, update_fields=None, **kwargs):
+    """
+    Перед сохранением поставщика запоминаем, принимал ли он заказы.
+    """
+    instance._old_is_active = None
+    if instance.pk and (update_fields is None or 'is_active' in update_fields):
+        instance._old_is_active = (
+            Supplier.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Supplier)
+def supplier_activity_changed(sender, instance, created, **kwargs):
+    """
+    Поставщик включил или выключил прием заказов (SupplierStatusView,
+    админка): позиции корзин с его товарами помечаются одним UPDATE.
+    Версию каталога меняет catalog_changed.
+    """
+    old_is_active = getattr(instance, '_old_is_active', None)
+    if created or old_is_active is None or old_is_active == instance.is_active:
+        return
+    CartItem.objects.filter(product_info__supplier_id=instance.pk).exclude(
+        is_available=instance.is_active
+    ).update(is_available=instance.is_active)
+
+
+# Поля, изменение которых меняет выгрузку предложений, и сами предложения
+EXPORT_FIELDS = {
+    Product: ('name', 'category_id'),
+    Category: ('name',),
+    Parameter: ('name',),
+}
+OFFERS_LOOKUP = {
+    Product: 'product',
+    Category: 'product__category',
+    Parameter: 'parameters__parameter',
+}
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Parameter)
+def cache_old_export_fields(sender, instance, **kwargs):
+    """
+    Перед сохранением товара, категории или параметра запоминаем поля,
+    которые выгружаются в составе предложений (названия, категория товара).
+    """
+    instance._old_export_fields = None
+    if instance.pk:
+        instance._old_export_fields = (
+            sender.objects.filter(pk=instance.pk).values(*EXPORT_FIELDS[sender]).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Parameter)
+def export_fields_changed(sender, instance, created, **kwargs):
+    """
+    Переименование товара, категории или параметра и перенос товара в
+    другую категорию меняют выгрузку предложений без записи в их строки:
+    предложения отмечаются измененными для выгрузки изменений.
+    """
+    old = getattr(instance, '_old_export_fields', None)
+    if created or old is None:
+        return
+    if any(old[field] != getattr(instance, field) for field in EXPORT_FIELDS[sender]):
+        touch_offers(ProductInfo.objects.filter(**{OFFERS_LOOKUP[sender]: instance}))
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    """У товаров удаленной категории она сбрасывается без сигналов post_save."""
+    touch_offers(ProductInfo.objects.filter(product__category=instance))
+
+
+def _first_signal(origin, flag):
+    """
+    Удаление QuerySet или каскадное удаление отправляет сигнал на каждый
+    объект; обработчик выполняет запрос для всех объектов сразу при
+    первом сигнале и отмечает это флагом на инициаторе удаления (`origin`).
+    """
+    if getattr(origin, flag, False):
+        return False
+    setattr(origin, flag, True)
+    return True
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _origin_filter(lookup, origin):
+    if isinstance(origin, QuerySet):
+        return {f'{lookup}__in': origin}
+    return {lookup: origin.pk}
+
+
+@receiver(pre_delete, sender=ProductParameter)
+def product_parameter_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Удаленный параметр сам в выгрузку изменений не попадает, поэтому
+    его предложение отмечается измененным. Параметры, удаленные одним
+    запросом (импорт) или вместе с параметром-справочником, обновляют
+    свои предложения одним UPDATE. При удалении самого предложения
+    (и товара, поставщика) его учитывает record_deleted_offers.
+    """
+    model = _origin_model(origin)
+    if model is ProductParameter and isinstance(origin, QuerySet):
+        if _first_signal(origin, '_offers_touched'):
+            touch_offers(ProductInfo.objects.filter(id__in=origin.values('product_info_id')))
+    elif model is Parameter:
+        if _first_signal(origin, '_offers_touched'):
+            touch_offers(ProductInfo.objects.filter(**_origin_filter('parameters__parameter', origin)))
+    elif origin is None or model is ProductParameter:
+        touch_offers(ProductInfo.objects.filter(pk=instance.product_info_id))
+
+
+# Удаление каких объектов удаляет предложения (каскадом) и как их найти
+DELETED_OFFERS_LOOKUP = {
+    ProductInfo: 'pk',
+    Product: 'product',
+    Supplier: 'supplier',
+}
+
+
+@receiver(pre_delete, sender=ProductInfo)
+def record_deleted_offers(sender, instance, origin=None, **kwargs):
+    """
+    Удаленные предложения записываются в DeletedOffer для выгрузки
+    изменений. Предложения одного удаления (импорт удаляет пропавшие из
+    прайс-листа одним запросом, удаление товара или поставщика - каскадом)
+    записываются одним INSERT при первом сигнале.
+    """
+    lookup = DELETED_OFFERS_LOOKUP.get(_origin_model(origin))
+    if lookup is None:
+        offers = ProductInfo.objects.filter(pk=instance.pk)
+    elif _first_signal(origin, '_deleted_offers_recorded'):
+        offers = ProductInfo.objects.filter(**_origin_filter(lookup, origin))
+    else:
+        return
+    DeletedOffer.objects.bulk_create([
+        DeletedOffer(
+            offer_id=offer['id'],
+            external_id=offer['external_id'],
+            supplier_id=offer['supplier_id'],
+            product_id=offer['product_id'],
+            category_id=offer['product__category_id'],
+        )
+        for offer in offers.values('id', 'external_id', 'supplier_id', 'product_id', 'product__category_id')
+    ])
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductInfo)
+@receiver([post_save, post_delete], sender=ProductParameter)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Parameter)
+@receiver([post_save, post_delete], sender=Supplier)
+def catalog_changed(sender, **kwargs):
+    """
+    Любое изменение каталога меняет его версию, чтобы устаревшие
+    результаты экспорта больше не переиспользовались.
+    """
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Parameter)
+def reference_changed(sender, **kwargs):
+    """
+    Изменение категорий или параметров меняет версию справочников:
+    процессы перечитают их из общего кэша (shop/reference.py).
+    """
+    bump_reference_version()
+
+
+@worker_process_init.connect
+def preload_reference(**kwargs):
+    """Справочники загружаются в память процесса воркера при его старте."""
+    preload_reference_data()
+
+
+@task_postrun.connect
+def notify_task_finished(task_id=None, state=None, **kwargs):
+    """
+    Сообщает клиентам, ожидающим результат на эндпоинте статуса задачи,
+    что задача завершилась (успешно или с ошибкой).
+    """
+    if state in states.READY_STATES:
+        publish_task_finished(task_id, state)
@@ -0,0 +1,121 @@
+"""
+Уведомления о завершении задач Celery через Redis pub/sub.
+
+После завершения задачи (успех или ошибка) воркер публикует ее состояние
+в канал `task-status:<task_id>`. Эндпоинт статуса задачи подписывается на
+канал и отвечает клиенту сразу после уведомления, вместо того чтобы
+клиент опрашивал его в цикле.
+
+Для тестов и локальной разработки без Redis можно указать
+TASK_EVENTS_REDIS_URL=fakeredis:// - тогда используется fakeredis
+(общий сервер в памяти процесса, пакет из requirements-dev.txt).
+"""
+import asyncio
+import logging
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'task-status:'
+FAKE_REDIS_URL = 'fakeredis://'
+
+_sync_client = None
+_fake_server = None
+
+
+def channel_name(task_id):
+    return f'{CHANNEL_PREFIX}{task_id}'
+
+
+def _get_fake_server():
+    global _fake_server
+    if _fake_server is None:
+        import fakeredis
+
+        _fake_server = fakeredis.FakeServer()
+    return _fake_server
+
+
+def get_sync_client():
+    """Клиент Redis для публикации (один на процесс)."""
+    global _sync_client
+    if _sync_client is None:
+        url = settings.TASK_EVENTS_REDIS_URL
+        if url == FAKE_REDIS_URL:
+            import fakeredis
+
+            _sync_client = fakeredis.FakeRedis(server=_get_fake_server())
+        else:
+            _sync_client = redis.Redis.from_url(url)
+    return _sync_client
+
+
+def get_async_client():
+    """
+    Новый асинхронный клиент Redis. Соединения asyncio привязаны к циклу
+    событий, поэтому клиент создается на каждую подписку.
+    """
+    url = settings.TASK_EVENTS_REDIS_URL
+    if url == FAKE_REDIS_URL:
+        from fakeredis import aioredis
+
+        return aioredis.FakeRedis(server=_get_fake_server())
+    return redis.asyncio.Redis.from_url(url)
+
+
+def publish_task_finished(task_id, state):
+    """
+    Публикует состояние завершенной задачи. Ошибка Redis не должна
+    ломать задачу: клиенты в худшем случае узнают о результате по таймауту.
+    """
+    try:
+        get_sync_client().publish(channel_name(task_id), state)
+    except redis.RedisError as e:
+        logger.warning('Не удалось опубликовать завершение задачи %s: %s', task_id, e)
+
+
+class TaskSubscription:
+    """
+    Подписка на уведомление о завершении задачи:
+
+        async with TaskSubscription(task_id) as subscription:
+            ...  # проверить состояние задачи уже после подписки
+            finished = await subscription.wait(timeout)
+
+    Состояние задачи нужно проверять после входа в контекст: иначе
+    уведомление о задаче, завершившейся до подписки, будет потеряно.
+    """
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.client = None
+        self.pubsub = None
+
+    async def __aenter__(self):
+        self.client = get_async_client()
+        self.pubsub = self.client.pubsub()
+        await self.pubsub.subscribe(channel_name(self.task_id))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+    async def wait(self, timeout):
+        """
+        Ждет уведомления не дольше `timeout` секунд.
+        Возвращает True, если уведомление получено.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Служебные сообщения подписки get_message() возвращает как None
+        while (remaining := deadline - loop.time()) > 0:
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=remaining
+            )
+            if message is not None:
+                return True
+        return False
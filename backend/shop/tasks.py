@@ -1,122 +1,423 @@
-import yaml
-from celery import shared_task
+import io
+import logging
+from decimal import Decimal
+from itertools import islice
+
+from celery import group, shared_task
+from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import Prefetch
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
 from users.models import User
-from .models import Category, Product, ProductInfo, Parameter, ProductParameter, Order
-from django.core.mail import send_mail
+from .models import (
+    Category, Product, ProductInfo, Parameter, ProductParameter, Order, OrderItem,
+    PriceHistory, SupplierOrder, normalize_product_name,
+)
+from .catalog import bump_catalog_version
+from .exporters import touch_offers
+from .importers import PriceListFormatError, read_pricelist
+from .reference import bump_reference_version, get_reference_data
 from django.conf import settings
+from notifications.services import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_products(goods):
+    """
+    Находит или создает товары для позиций прайс-листа.
+
+    Товары определяются ключом `name_key` (нормализованное название).
+    На каждую порцию из IMPORT_BATCH_SIZE товаров выполняется один SELECT
+    и, если есть новые товары или товары сменили категорию, один
+    INSERT ... ON CONFLICT (name_key) DO UPDATE. Неизмененные товары
+    не перезаписываются; предложения товаров, сменивших категорию,
+    отмечаются измененными для выгрузки изменений (одним UPDATE).
+
+    Args:
+        goods (list): позиции прайс-листа (словари с `name` и `category`).
+
+    Returns:
+        dict: {name_key: id товара}.
+    """
+    # Для одинаковых названий действует последняя позиция файла
+    wanted = {
+        normalize_product_name(item['name']): (item['name'], item['category'])
+        for item in goods
+    }
+    keys = list(wanted)
+    product_ids = {}
+    changed = False
+    for start in range(0, len(keys), settings.IMPORT_BATCH_SIZE):
+        batch = keys[start:start + settings.IMPORT_BATCH_SIZE]
+        existing = {
+            name_key: (product_id, category_id)
+            for product_id, name_key, category_id in Product.objects.filter(
+                name_key__in=batch
+            ).values_list('id', 'name_key', 'category_id')
+        }
+        upserts = []
+        for name_key in batch:
+            name, category_id = wanted[name_key]
+            if name_key in existing:
+                product_ids[name_key], current_category_id = existing[name_key]
+                if current_category_id == category_id:
+                    continue
+            upserts.append(Product(name=name, name_key=name_key, category_id=category_id))
+        if not upserts:
+            continue
 
+        # Новые товары и смена категории - одним запросом. ON CONFLICT
+        # также защищает от гонки с параллельным импортом другого поставщика.
+        Product.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=['name_key'],
+            update_fields=['category'],
+        )
+        changed = True
+        # Категория выгружается в предложениях всех поставщиков товара
+        moved = [existing[product.name_key][0] for product in upserts if product.name_key in existing]
+        if moved:
+            touch_offers(ProductInfo.objects.filter(product_id__in=moved))
+        new_keys = [product.name_key for product in upserts if product.name_key not in existing]
+        if new_keys:
+            product_ids.update(
+                Product.objects.filter(name_key__in=new_keys).values_list('name_key', 'id')
+            )
+    if changed:
+        # bulk_create не отправляет сигналы post_save
+        bump_catalog_version()
+    return product_ids
 
 
+def sync_categories(categories, category_ids):
+    """
+    Создает и переименовывает категории прайс-листа.
+
+    Текущие названия берутся из справочника в памяти (shop/reference.py),
+    в БД проверяются только категории, которых в нем нет. Новые категории
+    создаются одним INSERT, переименованные обновляются одним UPDATE
+    (и еще одним - предложения их товаров, для выгрузки изменений).
+
+    Args:
+        categories (dict): {id: название} из раздела `categories` файла.
+        category_ids (set): категории товаров файла (недостающие
+            создаются без названия).
+    """
+    known = get_reference_data().categories
+    current = {
+        category_id: known[category_id]
+        for category_id in {*categories, *category_ids} if category_id in known
+    }
+    unknown = {*categories, *category_ids} - current.keys()
+    if unknown:
+        current.update(Category.objects.filter(id__in=unknown).values_list('id', 'name'))
+
+    new = [
+        Category(id=category_id, name=categories.get(category_id, ''))
+        for category_id in sorted({*categories, *category_ids} - current.keys())
+    ]
+    renamed = [
+        Category(id=category_id, name=name)
+        for category_id, name in categories.items()
+        if category_id in current and current[category_id] != name
+    ]
+    if not new and not renamed:
+        return
+    Category.objects.bulk_create(new, ignore_conflicts=True)
+    Category.objects.bulk_update(renamed, ['name'])
+    if renamed:
+        # Название категории выгружается в предложениях ее товаров
+        touch_offers(ProductInfo.objects.filter(
+            product__category_id__in=[category.id for category in renamed]
+        ))
+    # bulk_create и bulk_update не отправляют сигналы post_save
+    bump_reference_version()
+    bump_catalog_version()
+
+
+def resolve_parameters(names):
+    """
+    Находит или создает параметры по названиям.
+
+    Названия ищутся в справочнике в памяти; отсутствующие в нем
+    проверяются в БД одним запросом, оставшиеся создаются одним INSERT.
+
+    Args:
+        names (set): названия параметров прайс-листа.
+
+    Returns:
+        dict: {название: id параметра}.
+    """
+    known = get_reference_data().parameter_ids
+    parameter_ids = {name: known[name] for name in names if name in known}
+    missing = set(names) - parameter_ids.keys()
+    if not missing:
+        return parameter_ids
+
+    # Параметры, созданные другим процессом после загрузки справочника
+    # (при одинаковых названиях - меньший id, как в справочнике)
+    for parameter_id, name in Parameter.objects.filter(name__in=missing).order_by('-id').values_list('id', 'name'):
+        parameter_ids[name] = parameter_id
+    new = [Parameter(name=name) for name in sorted(missing - parameter_ids.keys())]
+    if new:
+        Parameter.objects.bulk_create(new)
+        parameter_ids.update((parameter.name, parameter.id) for parameter in new)
+        bump_reference_version()
+        bump_catalog_version()
+    return parameter_ids
+
+
+def sync_offers(supplier, goods, product_ids, parameter_ids):
+    """
+    Создает и обновляет предложения поставщика и их параметры.
+
+    На каждую порцию из IMPORT_BATCH_SIZE позиций существующие предложения
+    и их параметры загружаются двумя запросами (по внешнему ID). Новые
+    предложения создаются одним INSERT, измененные обновляются одним
+    UPDATE, параметры измененных предложений заменяются одним DELETE и
+    одним INSERT. Неизмененные предложения не перезаписываются, чтобы
+    `updated_at` отражал дату последнего изменения (на нем основан
+    инкрементальный экспорт). Новые цены и остатки попадают в историю
+    (одно время на весь импорт).
+
+    Args:
+        supplier (Supplier): поставщик.
+        goods (list): позиции прайс-листа.
+        product_ids (dict): {name_key: id товара} (см. resolve_products).
+        parameter_ids (dict): {название: id параметра} (см. resolve_parameters).
+    """
+    recorded_at = timezone.now()
+    # Для одинаковых внешних ID действует последняя позиция файла
+    items = list({item['id']: item for item in goods}.values())
+    changed = False
+    for start in range(0, len(items), settings.IMPORT_BATCH_SIZE):
+        batch = items[start:start + settings.IMPORT_BATCH_SIZE]
+        offers = {
+            offer.external_id: offer
+            for offer in ProductInfo.objects.filter(
+                supplier=supplier, external_id__in=[item['id'] for item in batch]
+            )
+        }
+        # Параметры сравниваются по id: {id параметра: значение}
+        offer_params = {}
+        for product_info_id, parameter_id, value in ProductParameter.objects.filter(
+            product_info__in=[offer.id for offer in offers.values()]
+        ).values_list('product_info_id', 'parameter_id', 'value'):
+            offer_params.setdefault(product_info_id, {})[parameter_id] = value
+
+        new_offers = []
+        updated_offers = []
+        price_history = []
+        # Предложения, параметры которых заменяются: (предложение, параметры)
+        new_params = []
+        for item_data in batch:
+            product_id = product_ids[normalize_product_name(item_data['name'])]
+            params = {
+                parameter_ids[str(name)]: str(value)
+                for name, value in item_data.get('parameters', {}).items()
+            }
+            price = Decimal(str(item_data['price']))
+            quantity = item_data['quantity']
+
+            offer = offers.get(item_data['id'])
+            if offer is None:
+                offer = ProductInfo(
+                    supplier=supplier,
+                    external_id=item_data['id'],
+                    product_id=product_id,
+                    price=price,
+                    quantity=quantity,
+                )
+                new_offers.append(offer)
+                old_params = {}
+            else:
+                old_params = offer_params.get(offer.id, {})
+                if (
+                    offer.product_id != product_id
+                    or offer.price != price
+                    or offer.quantity != quantity
+                    or old_params != params
+                ):
+                    # bulk_update не заполняет auto_now
+                    offer.updated_at = recorded_at
+                    updated_offers.append(offer)
+            if offer.pk is None or offer.price != price or offer.quantity != quantity:
+                price_history.append(PriceHistory(
+                    recorded_at=recorded_at,
+                    product_info=offer,
+                    quantity=quantity,
+                    price=price,
+                ))
+            offer.product_id = product_id
+            offer.price = price
+            offer.quantity = quantity
+            if old_params != params:
+                new_params.append((offer, params))
+
+        if not new_offers and not updated_offers:
+            continue
+        # id новых предложений нужны для истории и параметров (RETURNING)
+        ProductInfo.objects.bulk_create(new_offers)
+        ProductInfo.objects.bulk_update(updated_offers, ['product', 'price', 'quantity', 'updated_at'])
+        ProductParameter.objects.filter(
+            product_info__in=[offer.id for offer, _ in new_params if offer.id in offer_params]
+        ).delete()
+        ProductParameter.objects.bulk_create([
+            ProductParameter(product_info=offer, parameter_id=parameter_id, value=value)
+            for offer, params in new_params
+            for parameter_id, value in params.items()
+        ], batch_size=settings.IMPORT_BATCH_SIZE)
+        PriceHistory.objects.bulk_create(price_history)
+        changed = True
+    if changed:
+        # bulk_create и bulk_update не отправляют сигналы post_save
+        bump_catalog_version()
 
 
 @shared_task(name="shop.tasks.process_pricelist_upload")
 def process_pricelist_upload(data, user_id):
     """
-    Асинхронная задача для обработки загруженного прайс-листа в формате YAML.
+    Асинхронная задача для обработки прайс-листа в формате YAML,
+    переданного строкой.
 
     Args:
         data (str): Содержимое YAML-файла в виде строки.
         user_id (int): ID пользователя (поставщика), загрузившего файл.
     """
+    try:
+        content = read_pricelist(io.BytesIO(data.encode('utf-8')), 'yaml')
+    except PriceListFormatError as e:
+        # Ошибка при парсинге YAML
+        logger.warning('Ошибка парсинга YAML для пользователя %s: %s', user_id, e)
+        return "Ошибка: неверный формат YAML файла."
+    return import_pricelist(content, user_id)
+
+
+@shared_task
+def process_pricelist_file(name, user_id, file_format):
+    """
+    Асинхронная задача для обработки прайс-листа, загруженного через API.
+
+    Файл читается из файлового хранилища читателем своего формата
+    (shop/importers.py): табличные форматы - потоком, по мере импорта.
+    После импорта файл удаляется - в том числе при ошибке. Ошибки разбора
+    (кодировка, CSV, JSON, значения колонок) читатели приводят к
+    PriceListFormatError; импорт при этом отменяется целиком.
+
+    Args:
+        name (str): Имя файла в файловом хранилище (default_storage).
+        user_id (int): ID пользователя (поставщика), загрузившего файл.
+        file_format (str): Формат файла (yaml, csv, ndjson, arrow, parquet).
+    """
+    try:
+        with default_storage.open(name, 'rb') as fileobj:
+            return import_pricelist(read_pricelist(fileobj, file_format), user_id)
+    except PriceListFormatError as e:
+        logger.warning('Ошибка чтения прайс-листа (%s) для пользователя %s: %s', file_format, user_id, e)
+        return f"Ошибка: неверный формат файла {file_format}."
+    except Exception:
+        logger.exception('Не удалось прочитать прайс-лист %s для пользователя %s', name, user_id)
+        return "Ошибка: не удалось прочитать файл."
+    finally:
+        default_storage.delete(name)
+
+
+def iter_batches(items, size):
+    """Порции по `size` элементов из итерируемого объекта (список или поток)."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_pricelist(content, user_id):
+    """
+    Импорт прайс-листа поставщика: категории, товары, предложения, их
+    параметры и история цен в одной транзакции.
+
+    Позиции (`goods` - список или итератор потокового читателя) обрабатываются
+    порциями по IMPORT_BATCH_SIZE, в памяти одновременно только одна порция
+    и внешние ID уже обработанных предложений. Ошибка формата файла
+    (PriceListFormatError) отменяет импорт и передается вызывающему коду.
+
+    Args:
+        content (dict): Содержимое прайс-листа (shop, categories, goods).
+        user_id (int): ID пользователя (поставщика), загрузившего файл.
+    """
     try:
         # Получаем пользователя и его профиль поставщика
         user = User.objects.get(id=user_id)
         supplier = user.supplier_profile
 
-        # Загружаем данные из YAML. Используем safe_load для безопасности.
-        content = yaml.safe_load(data)
-        
+        # Справочники категорий и параметров - до транзакции (shop/reference.py)
+        get_reference_data(force_check=True)
+
         # Используем одну большую транзакцию. Если что-то пойдет не так,
         # все изменения в базе данных будут отменены.
         with transaction.atomic():
-            
-            # 1. Обновляем или создаем категории из файла
-            for category_data in content.get('categories', []):
-                Category.objects.update_or_create(
-                    id=category_data['id'],
-                    defaults={'name': category_data['name']}
+
+            # 1. Создаем и переименовываем категории из раздела `categories`
+            # (запись - только при изменении, чтобы не менять версию
+            # каталога без необходимости)
+            sync_categories(
+                {category_data['id']: category_data['name'] for category_data in content.get('categories', [])},
+                set(),
+            )
+
+            # 2. Обрабатываем позиции порциями по мере чтения файла
+            external_ids = set()
+            for goods in iter_batches(content.get('goods', []), settings.IMPORT_BATCH_SIZE):
+                # 2.1. Категории товаров порции (названия - из табличных форматов)
+                sync_categories(
+                    {item['category']: item['category_name'] for item in goods if item.get('category_name')},
+                    {item['category'] for item in goods},
                 )
-            
-            # 2. Удаляем товары, которых нет в новом прайс-листе
-            new_external_ids = {item['id'] for item in content.get('goods', [])}
 
-            # Находим и удаляем те ProductInfo этого поставщика, 
-            # чьи external_id отсутствуют в новом файле.
+                # 2.2. Находим или создаем основные (абстрактные) товары и
+                # параметры (названия параметров - из справочника в памяти)
+                product_ids = resolve_products(goods)
+                parameter_ids = resolve_parameters({
+                    str(name) for item in goods for name in item.get('parameters', {})
+                })
+
+                # 2.3. Обновляем или создаем предложения и их параметры
+                # (с историей цен и остатков)
+                sync_offers(supplier, goods, product_ids, parameter_ids)
+                external_ids.update(item['id'] for item in goods)
+
+            # 3. Удаляем предложения этого поставщика, чьих external_id
+            # нет в новом прайс-листе
             ProductInfo.objects.filter(
                 supplier=supplier
             ).exclude(
-                external_id__in=new_external_ids
+                external_id__in=external_ids
             ).delete()
 
-            # 3. Обновляем или создаем товары и их параметры
-            for item_data in content.get('goods', []):
-                # Находим или создаем категорию для товара
-                category, _ = Category.objects.get_or_create(
-                    id=item_data['category']
-                )
-
-                # Находим или создаем основной (абстрактный) товар
-                product, _ = Product.objects.update_or_create(
-                    name=item_data['name'],
-                    defaults={'category': category}
-                )
-
-                # Находим или создаем конкретное предложение от поставщика.
-                product_info_obj, _ = ProductInfo.objects.update_or_create(
-                    supplier=supplier,
-                    external_id=item_data['id'],
-                    defaults={
-                        'product': product,
-                        'price': item_data['price'],
-                        'quantity': item_data['quantity'],                                             
-                        'external_id': item_data['id']
-                    }
-                )
-
-                # 4. Обновляем параметры товара
-                # Сначала удаляем все старые параметры для данного товара
-                product_info_obj.parameters.all().delete()
-                # Затем создаем новые параметры из файла
-                for param_name, param_value in item_data.get('parameters', {}).items():
-                    parameter, _ = Parameter.objects.get_or_create(
-                        name=param_name
-                    )
-                    
-                    ProductParameter.objects.create(
-                        product_info=product_info_obj,
-                        parameter=parameter,
-                        value=param_value
-                    )
-            
-            # 5. Обновляем название магазина (поставщика) из файла
+            # 4. Обновляем название магазина (поставщика) из файла
             supplier_name = content.get('shop')
-            if supplier_name:
+            if supplier_name and supplier_name != supplier.name:
                 supplier.name = supplier_name
                 supplier.save()
 
         # Возвращаем успешный результат
         return f"Прайс-лист для '{supplier.name}' успешно обработан."
-    
+
     except ObjectDoesNotExist:
         # Эта ошибка может возникнуть, если user_id некорректен
-        print(f"Ошибка: пользователь с ID {user_id} не найден.")
-        return f"Ошибка: не удалось найти пользователя."
-    
-    except yaml.YAMLError as e:
-        # Ошибка при парсинге YAML
-        print(f"Ошибка парсинга YAML для пользователя {user_id}: {e}")
-        return f"Ошибка: неверный формат YAML файла."
-    
+        logger.warning('Импорт прайс-листа: пользователь с ID %s не найден.', user_id)
+        return "Ошибка: не удалось найти пользователя."
+
+    except PriceListFormatError:
+        # Ошибка в строке файла, прочитанной во время импорта
+        raise
+
     except Exception as e:
         # Ловим все остальные ошибки (например, ошибки базы данных)
         # и возвращаем общее сообщение. Детали пишем в лог.
-        print(f"Непредвиденная ошибка при обработке прайс-листа для {user_id}: {e}")
-        return f"Ошибка: не удалось обработать файл."
-    
-
-
+        logger.exception('Непредвиденная ошибка при обработке прайс-листа для %s: %s', user_id, e)
+        return "Ошибка: не удалось обработать файл."
 
 
 @shared_task
@@ -132,54 +433,159 @@ def send_order_confirmation_email(order_id, user_email):
             f'Ваш заказ №{order.id} от {order.created_at.strftime("%d.%m.%Y %H:%M")} успешно принят в обработку.\n'
             f'Вы можете отслеживать его статус в личном кабинете.'
         )
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,  # От кого
-            [user_email],             # Кому
-            fail_silently=False,
-        )
-        return f"Письмо о заказе №{order_id} успешно отправлено клиенту {user_email}."
+        # Письмо ставится в очередь и уходит пачкой через общее SMTP-соединение
+        enqueue_email(subject, message, [user_email])
+        return f"Письмо о заказе №{order_id} поставлено в очередь для клиента {user_email}."
     except Order.DoesNotExist:
         return f"Ошибка: Заказ №{order_id} не найден."
     except Exception as e:
+        logger.exception('Ошибка при отправке письма для заказа №%s', order_id)
         return f"Ошибка при отправке письма для заказа №{order_id}: {e}"
 
 
+def load_orders_for_notification(order_ids):
+    """
+    Загружает заказы вместе с клиентом, контактом и позициями.
+
+    Позиции со связанными товарами подгружаются одним запросом с
+    select_related для всех заказов сразу, поэтому число запросов
+    не зависит ни от количества заказов, ни от количества позиций.
+    """
+    items = OrderItem.objects.select_related('product_info__product')
+    return list(
+        Order.objects.filter(id__in=order_ids)
+        .select_related('client__user', 'contact')
+        .prefetch_related(Prefetch('items', queryset=items))
+        .order_by('created_at')
+    )
+
+
+def format_order_for_admin(order):
+    """Текстовое описание заказа для писем администратору."""
+    items_details = "\n".join(
+        [f'- {item.product_info.product.name}: {item.quantity} шт. по {item.price_per_item} руб.'
+         for item in order.items.all()]
+    )
+    total_sum = sum(item.quantity * item.price_per_item for item in order.items.all())
+    return (
+        f'Заказ №{order.id} от {order.created_at.strftime("%d.%m.%Y %H:%M")}\n'
+        f'Клиент: {order.client.user.first_name} {order.client.user.last_name} ({order.client.user.email})\n'
+        f'Контакт для доставки: {order.contact}\n'
+        f'Состав заказа:\n{items_details}\n'
+        f'Сумма: {total_sum} руб.\n'
+    )
+
+
 @shared_task
 def send_new_order_notification_to_admin(order_id):
     """
     Асинхронная задача для отправки уведомления о новом заказе администратору.
+
+    Используется в режиме ADMIN_ORDER_NOTIFICATIONS = 'realtime'.
     """
     try:
-        order = Order.objects.get(id=order_id)
+        orders = load_orders_for_notification([order_id])
+        if not orders:
+            raise Order.DoesNotExist
+        order = orders[0]
         subject = f'Новый заказ №{order.id}'
-        
-        # Собираем информацию о заказе для письма
+        message = f'Поступил новый заказ.\n\n{format_order_for_admin(order)}'
+
+        enqueue_email(subject, message, [settings.ADMIN_EMAIL])  # Кому (берем из настроек)
+        Order.objects.filter(id=order.id).update(admin_notified_at=timezone.now())
+        return f"Уведомление о заказе №{order_id} поставлено в очередь для администратора."
+    except Order.DoesNotExist:
+        return f"Ошибка: Заказ №{order_id} для уведомления не найден."
+    except Exception as e:
+        logger.exception('Ошибка при отправке уведомления администратору для заказа №%s', order_id)
+        return f"Ошибка при отправке уведомления администратору для заказа №{order_id}: {e}"
+
+
+@shared_task
+def send_new_order_notification_to_supplier(supplier_order_id):
+    """
+    Асинхронная задача для отправки поставщику уведомления о его части
+    нового заказа (SupplierOrder).
+    """
+    try:
+        items = OrderItem.objects.select_related('product_info__product')
+        supplier_order = (
+            SupplierOrder.objects.select_related('supplier__user', 'order__contact')
+            .prefetch_related(Prefetch('items', queryset=items))
+            .get(id=supplier_order_id)
+        )
+        order = supplier_order.order
         items_details = "\n".join(
-            [f'- {item.product_info.product.name}: {item.quantity} шт. по {item.price_per_item} руб.' 
-             for item in order.items.all()]
+            [f'- {item.product_info.product.name}: {item.quantity} шт. по {item.price_per_item} руб.'
+             for item in supplier_order.items.all()]
         )
-        
+        total_sum = sum(item.quantity * item.price_per_item for item in supplier_order.items.all())
+        subject = f'Новый заказ №{order.id}'
         message = (
-            f'Поступил новый заказ №{order.id}.\n\n'
-            f'Клиент: {order.client.user.first_name} {order.client.user.last_name} ({order.client.user.email})\n'
-            f'Контакт для доставки: {order.contact}\n\n'
+            f'Поступил заказ №{order.id} от {order.created_at.strftime("%d.%m.%Y %H:%M")} '
+            f'на ваши товары.\n\n'
+            f'Контакт для доставки: {order.contact}\n'
             f'Состав заказа:\n{items_details}\n'
+            f'Сумма: {total_sum} руб.\n'
         )
-        
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,       # От кого
-            [settings.ADMIN_EMAIL],         # Кому (берем из настроек)
-            fail_silently=False,
-        )
-        return f"Уведомление о заказе №{order_id} успешно отправлено администратору."
-    except Order.DoesNotExist:
-        return f"Ошибка: Заказ №{order_id} для уведомления не найден."
+        enqueue_email(subject, message, [supplier_order.supplier.user.email])
+        SupplierOrder.objects.filter(id=supplier_order.id).update(notified_at=timezone.now())
+        return f"Уведомление о заказе №{order.id} поставлено в очередь для поставщика {supplier_order.supplier_id}."
+    except SupplierOrder.DoesNotExist:
+        return f"Ошибка: Заказ поставщику №{supplier_order_id} не найден."
     except Exception as e:
-        return f"Ошибка при отправке уведомления администратору для заказа №{order_id}: {e}"    
+        logger.exception('Ошибка при отправке уведомления поставщику для заказа №%s', supplier_order_id)
+        return f"Ошибка при отправке уведомления поставщику для заказа №{supplier_order_id}: {e}"
+
+
+def notify_suppliers(supplier_order_ids):
+    """
+    Отправляет уведомления всем поставщикам заказа параллельно:
+    группа Celery, по задаче на каждого поставщика.
+    """
+    if not supplier_order_ids:
+        return None
+    return group(
+        send_new_order_notification_to_supplier.s(supplier_order_id)
+        for supplier_order_id in supplier_order_ids
+    ).apply_async()
+
+
+@shared_task
+def send_new_orders_digest_to_admin():
+    """
+    Периодическая задача: одна сводка администратору по всем новым заказам,
+    о которых он еще не был уведомлен.
+
+    Используется в режиме ADMIN_ORDER_NOTIFICATIONS = 'digest'
+    и запускается через Celery beat.
+    """
+    try:
+        with transaction.atomic():
+            # Блокируем выбранные заказы, чтобы параллельный запуск сводки
+            # не включил их повторно.
+            order_ids = list(
+                Order.objects.select_for_update(skip_locked=True)
+                .filter(admin_notified_at__isnull=True)
+                .values_list('id', flat=True)
+            )
+            if not order_ids:
+                return "Новых заказов для сводки нет."
+
+            orders = load_orders_for_notification(order_ids)
+            subject = f'Новые заказы: {len(orders)} шт.'
+            message = (
+                f'Поступили новые заказы ({len(orders)} шт.) с '
+                f'{orders[0].created_at.strftime("%d.%m.%Y %H:%M")} по '
+                f'{orders[-1].created_at.strftime("%d.%m.%Y %H:%M")}.\n\n'
+                + '\n'.join(format_order_for_admin(order) for order in orders)
+            )
+            enqueue_email(subject, message, [settings.ADMIN_EMAIL])
+            Order.objects.filter(id__in=order_ids).update(admin_notified_at=timezone.now())
+        return f"Сводка по {len(order_ids)} заказам поставлена в очередь для администратора."
+    except Exception as e:
+        logger.exception('Ошибка при формировании сводки заказов для администратора')
+        return f"Ошибка при формировании сводки заказов для администратора: {e}"
 
 
 @shared_task
@@ -199,13 +605,44 @@ def send_status_change_email(order_id, user_email, new_status):
             f'Статус вашего заказа №{order_id} был изменен на: "{status_display}".\n\n'
             f'Спасибо, что выбрали нас!'
         )
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            [user_email],
-            fail_silently=False,
-        )
-        return f"Письмо о смене статуса заказа №{order_id} успешно отправлено клиенту {user_email}."
+        enqueue_email(subject, message, [user_email])
+        return f"Письмо о смене статуса заказа №{order_id} поставлено в очередь для клиента {user_email}."
     except Exception as e:
-        return f"Ошибка при отправке письма о смене статуса для заказа №{order_id}: {e}"
\ No newline at end of file
+        logger.exception('Ошибка при отправке письма о смене статуса для заказа №%s', order_id)
+        return f"Ошибка при отправке письма о смене статуса для заказа №{order_id}: {e}"
+
+
+@shared_task
+def create_order_partitions():
+    """
+    Периодическая задача: создает месячные секции заказов на
+    ORDER_PARTITIONS_AHEAD месяцев вперед (только PostgreSQL).
+    """
+    from .partitions import ensure_order_partitions
+
+    created = ensure_order_partitions(settings.ORDER_PARTITIONS_AHEAD)
+    return f"Создано секций заказов: {len(created)}."
+
+
+@shared_task
+def archive_closed_orders():
+    """
+    Периодическая задача: переносит закрытые заказы старше
+    ORDER_ARCHIVE_AFTER_MONTHS месяцев в архив (shop/archive.py).
+    """
+    from .archive import archive_closed_orders as archive
+
+    archived = archive(limit=settings.ORDER_ARCHIVE_TASK_LIMIT)
+    return f"В архив перенесено заказов: {archived}."
+
+
+@shared_task
+def update_sales_rollups():
+    """
+    Периодическая задача: учитывает новые заказы в таблицах продаж
+    поставщиков (shop/analytics.py).
+    """
+    from .analytics import update_sales_rollups as update
+
+    processed = update(limit=settings.SALES_ROLLUP_TASK_LIMIT)
+    return f"Учтено заказов в продажах: {processed}."
@@ -0,0 +1,101 @@
+"""
+Теги шаблонов админки магазина.
+
+`indexed_date_hierarchy` - замена стандартного `date_hierarchy` для больших
+таблиц. Стандартный тег строит список лет, месяцев и дней запросом
+`SELECT DISTINCT date_trunc(...)`, который читает все строки выбранного
+периода. Здесь границы периода берутся из MIN/MAX по индексу поля даты,
+а список лет, месяцев или дней строится между ними без чтения таблицы.
+В списке могут оказаться периоды без заказов; фильтр по выбранному
+периоду - диапазон `>= ... AND < ...`, поэтому читаются только нужные секции.
+"""
+from datetime import date
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from shop.partitions import add_months
+
+register = template.Library()
+
+
+def _periods(first, last, kind):
+    """Начала периодов `kind` (year, month, day) с first по last включительно."""
+    if kind == 'year':
+        return [date(year, 1, 1) for year in range(first.year, last.year + 1)]
+    if kind == 'month':
+        periods, month = [], date(first.year, first.month, 1)
+        while month <= last:
+            periods.append(month)
+            month = add_months(month, 1)
+        return periods
+    return [
+        date.fromordinal(day) for day in range(first.toordinal(), last.toordinal() + 1)
+    ]
+
+
+class IndexedDatesQuerySet:
+    """
+    Обертка QuerySet для тега date_hierarchy: `dates()`/`datetimes()`
+    строятся по MIN/MAX поля вместо SELECT DISTINCT.
+    """
+
+    def __init__(self, queryset):
+        self._queryset = queryset
+        self._ranges = {}
+
+    def __getattr__(self, name):
+        return getattr(self._queryset, name)
+
+    def _range(self, field_name):
+        # MIN и MAX по индексу поля: по одной строке с каждого края секций
+        if field_name not in self._ranges:
+            self._ranges[field_name] = self._queryset.aggregate(
+                first=Min(field_name), last=Max(field_name)
+            )
+        return self._ranges[field_name]
+
+    def datetimes(self, field_name, kind, **kwargs):
+        date_range = self._range(field_name)
+        if date_range['first'] is None:
+            return []
+        first, last = (
+            timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+            for value in (date_range['first'], date_range['last'])
+        )
+        return _periods(first, last, kind)
+
+    def dates(self, field_name, kind, **kwargs):
+        date_range = self._range(field_name)
+        if date_range['first'] is None:
+            return []
+        return _periods(date_range['first'], date_range['last'], kind)
+
+
+class IndexedDatesChangeList:
+    """ChangeList, у которого `queryset` заменен на IndexedDatesQuerySet."""
+
+    def __init__(self, cl):
+        self._cl = cl
+        self.queryset = IndexedDatesQuerySet(cl.queryset)
+
+    def __getattr__(self, name):
+        return getattr(self._cl, name)
+
+
+def indexed_date_hierarchy(cl):
+    return date_hierarchy(IndexedDatesChangeList(cl))
+
+
+@register.tag(name='indexed_date_hierarchy')
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=indexed_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
@@ -0,0 +1,91 @@
+"""
+Общие данные для тестов приложения shop: пользователи, предложения
+поставщиков и API-клиенты с JWT.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from rest_framework.test import APIClient, APITestCase
+
+from users.models import Client, Contact, Supplier, User
+from users.serializers import CustomTokenObtainPairSerializer
+
+from ..models import Cart, Category, Parameter, Product, ProductInfo, ProductParameter
+
+API_PREFIX = '/api/v1/'
+
+
+def create_supplier(email, name='Поставщик', is_active=True):
+    user = User.objects.create_user(email, 'password', user_type=User.UserType.SUPPLIER)
+    Supplier.objects.create(user=user, name=name, is_active=is_active)
+    return user
+
+
+def create_client(email):
+    """Клиент с корзиной и одним контактом."""
+    user = User.objects.create_user(email, 'password', user_type=User.UserType.CLIENT)
+    client = Client.objects.create(user=user)
+    Cart.objects.create(client=client)
+    Contact.objects.create(
+        client=client, first_name='Иван', last_name='Иванов', email=email,
+        phone_number='+70000000000', address='Москва, Тверская, 1', city='Москва',
+        street='Тверская', house='1',
+    )
+    return user
+
+
+def create_offer(supplier_user, external_id, name, category, price='100.00', quantity=10, parameters=None):
+    product, _ = Product.objects.get_or_create(name=name, defaults={'category': category})
+    offer = ProductInfo.objects.create(
+        product=product,
+        supplier=supplier_user.supplier_profile,
+        external_id=external_id,
+        price=Decimal(price),
+        quantity=quantity,
+    )
+    for parameter_name, value in (parameters or {}).items():
+        parameter, _ = Parameter.objects.get_or_create(name=parameter_name)
+        ProductParameter.objects.create(product_info=offer, parameter=parameter, value=value)
+    return offer
+
+
+def api_client(user=None):
+    """API-клиент анонимного пользователя или `user` (с access-токеном)."""
+    client = APIClient()
+    if user is not None:
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def auth_headers(user):
+    """Заголовки с access-токеном для AsyncClient (выпускать вне корутины)."""
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    return {'Authorization': f'Bearer {token}'}
+
+
+class ShopAPITestCase(APITestCase):
+    """
+    Каталог из нескольких товаров двух поставщиков с параметрами и
+    клиент с контактом. Кэш очищается перед каждым тестом: данные
+    аутентификации, справочники и версия каталога не переходят из теста в тест.
+    """
+    products = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Смартфоны')
+        cls.supplier_user = create_supplier('supplier@example.com', name='Связной')
+        cls.other_supplier_user = create_supplier('other@example.com', name='Евросеть')
+        cls.offers = []
+        for number in range(1, cls.products + 1):
+            for supplier_user in (cls.supplier_user, cls.other_supplier_user):
+                cls.offers.append(create_offer(
+                    supplier_user, number, f'Смартфон {number}', cls.category,
+                    parameters={'Цвет': 'черный', 'Память': f'{number * 64} ГБ'},
+                ))
+        cls.client_user = create_client('client@example.com')
+        cls.contact = cls.client_user.client_profile.contacts.get()
+
+    def setUp(self):
+        cache.clear()
@@ -0,0 +1,112 @@
+"""
+Асинхронные представления (shop/async_views.py): аутентификация, права,
+пагинация и 404 - через тестовый клиент WSGI и через ASGI (AsyncClient).
+"""
+from django.conf import settings
+
+from ..models import Category, Order
+from .base import API_PREFIX, ShopAPITestCase, api_client, auth_headers, create_client, create_offer
+
+
+class AsyncDispatchTests(ShopAPITestCase):
+
+    def test_authentication_required(self):
+        response = api_client().get(f'{API_PREFIX}orders/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalid_token(self):
+        client = api_client()
+        client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = client.get(f'{API_PREFIX}orders/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_permission_denied(self):
+        # Заказы клиента недоступны поставщику, статус задач - клиенту
+        response = api_client(self.supplier_user).get(f'{API_PREFIX}orders/')
+        self.assertEqual(response.status_code, 403)
+        response = api_client(self.client_user).get(f'{API_PREFIX}tasks/unknown/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_method_not_allowed(self):
+        response = api_client(self.client_user).post(f'{API_PREFIX}orders/', {}, format='json')
+        self.assertEqual(response.status_code, 405)
+
+    def test_not_found(self):
+        client = api_client(self.client_user)
+        for path in ('products/999999999/', 'products/abc/', 'orders/999999999/'):
+            with self.subTest(path=path):
+                self.assertEqual(client.get(f'{API_PREFIX}{path}').status_code, 404)
+
+    def test_other_client_order_not_found(self):
+        other = create_client('other-client@example.com')
+        order = Order.objects.create(client=other.client_profile, contact=other.client_profile.contacts.get())
+        response = api_client(self.client_user).get(f'{API_PREFIX}orders/{order.id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncPaginationTests(ShopAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        category = Category.objects.create(name='Аксессуары')
+        for number in range(settings.REST_FRAMEWORK['PAGE_SIZE']):
+            create_offer(cls.supplier_user, 100 + number, f'Чехол {number}', category)
+        cls.total = cls.products + settings.REST_FRAMEWORK['PAGE_SIZE']
+
+    def test_pages(self):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        first = api_client().get(f'{API_PREFIX}products/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['count'], self.total)
+        self.assertEqual(len(first.data['results']), page_size)
+        self.assertIsNone(first.data['previous'])
+        self.assertIn('page=2', first.data['next'])
+
+        second = api_client().get(f'{API_PREFIX}products/', {'page': 2})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.data['results']), self.total - page_size)
+        self.assertIsNone(second.data['next'])
+
+    def test_invalid_page(self):
+        for page in ('99', 'abc'):
+            with self.subTest(page=page):
+                response = api_client().get(f'{API_PREFIX}products/', {'page': page})
+                self.assertEqual(response.status_code, 404)
+
+
+class ASGITests(ShopAPITestCase):
+    """Те же представления через обработчик ASGI, как при запуске в uvicorn."""
+
+    def setUp(self):
+        super().setUp()
+        # Токены выпускаются до теста: в корутине синхронный ORM недоступен
+        self.client_headers = auth_headers(self.client_user)
+        self.supplier_headers = auth_headers(self.supplier_user)
+
+    async def test_products(self):
+        response = await self.async_client.get(f'{API_PREFIX}products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], self.products)
+
+        product_id = response.json()['results'][0]['id']
+        response = await self.async_client.get(f'{API_PREFIX}products/{product_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['product_infos']), 2)
+
+    async def test_orders(self):
+        response = await self.async_client.get(f'{API_PREFIX}orders/')
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get(f'{API_PREFIX}orders/', headers=self.client_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 0)
+
+        response = await self.async_client.get(
+            f'{API_PREFIX}orders/999999999/', headers=self.client_headers
+        )
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get(f'{API_PREFIX}orders/', headers=self.supplier_headers)
+        self.assertEqual(response.status_code, 403)
+
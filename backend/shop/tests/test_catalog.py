@@ -0,0 +1,49 @@
+from ..models import CartItem, Product
+from .base import API_PREFIX, ShopAPITestCase, api_client, create_offer, create_supplier
+
+
+class SupplierStatusCatalogTests(ShopAPITestCase):
+    """Каталог и корзины после изменения статуса поставщика."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.own_supplier_user = create_supplier('own@example.com', name='Эксклюзив')
+        cls.own_offer = create_offer(cls.own_supplier_user, 1, 'Планшет', cls.category)
+        cls.product_without_offers = Product.objects.create(name='Ноутбук', category=cls.category)
+
+    def set_active(self, supplier_user, is_active):
+        response = api_client(supplier_user).patch(
+            f'{API_PREFIX}supplier/status/', {'is_active': is_active}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def product_names(self):
+        response = api_client().get(f'{API_PREFIX}products/')
+        self.assertEqual(response.status_code, 200)
+        return {product['name'] for product in response.data['results']}
+
+    def test_products_without_active_offers_hidden(self):
+        names = self.product_names()
+        self.assertIn('Планшет', names)
+        self.assertNotIn('Ноутбук', names)
+
+        self.set_active(self.own_supplier_user, False)
+        self.assertNotIn('Планшет', self.product_names())
+        product_url = f'{API_PREFIX}products/{self.own_offer.product_id}/'
+        self.assertEqual(api_client().get(product_url).status_code, 404)
+
+        self.set_active(self.own_supplier_user, True)
+        self.assertIn('Планшет', self.product_names())
+        self.assertEqual(api_client().get(product_url).status_code, 200)
+
+    def test_inactive_offers_hidden(self):
+        cart = self.client_user.client_profile.cart
+        item = CartItem.objects.create(cart=cart, product_info=self.offers[1], quantity=1)
+        self.set_active(self.other_supplier_user, False)
+
+        # Товар остается в каталоге с предложением активного поставщика
+        product = api_client().get(f'{API_PREFIX}products/{self.offers[0].product_id}/').data
+        self.assertEqual([offer['id'] for offer in product['product_infos']], [self.offers[0].id])
+        item.refresh_from_db()
+        self.assertFalse(item.is_available)
@@ -0,0 +1,127 @@
+"""
+Чтение из реплик (config/db_routing.py).
+
+Реплика в тестах - алиас `replica` из config/settings_test.py: та же БД
+через отдельное соединение. Данные TestCase не зафиксированы, и реплика
+их не видит, поэтому по пустому ответу API видно, что чтение шло с реплики.
+"""
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.test import override_settings
+
+from config import db_routing
+from config.db_routing import ReplicaRouter, get_read_database, read_replica
+
+from ..models import CartItem, Order, Product
+from .base import API_PREFIX, ShopAPITestCase, api_client, create_client
+
+REPLICA = 'replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_MAX_LAG=5, REPLICA_LAG_CHECK_INTERVAL=60)
+class ReplicaTestCase(ShopAPITestCase):
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        super().setUp()
+        # Результаты проверки отставания хранятся в памяти процесса
+        db_routing._replica_health.clear()
+        self.addCleanup(db_routing._replica_health.clear)
+
+
+class ReplicaRouterTests(ReplicaTestCase):
+
+    def test_without_replicas(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(get_read_database(AnonymousUser()), DEFAULT_DB_ALIAS)
+            with read_replica() as alias:
+                self.assertEqual(alias, DEFAULT_DB_ALIAS)
+                self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_read_replica(self):
+        self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+        with read_replica() as alias:
+            self.assertEqual(alias, REPLICA)
+            self.assertEqual(Product.objects.all().db, REPLICA)
+            self.assertFalse(Product.objects.exists())
+            # Запись - всегда в основную БД
+            product = Product.objects.create(name='Чехол', category=self.category)
+            self.assertEqual(product._state.db, DEFAULT_DB_ALIAS)
+            # Связанные объекты - из той же БД, что и сам объект
+            self.assertEqual(self.offers[0].product.category.name, self.category.name)
+        self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_allow_migrate(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate(REPLICA, 'shop'))
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'shop'))
+
+    def test_lag_check(self):
+        # Реплика в тестах - та же БД: отставание 0
+        self.assertEqual(db_routing.get_replica_lag(REPLICA), 0)
+        self.assertEqual(get_read_database(AnonymousUser()), REPLICA)
+
+    def test_lagging_replica(self):
+        with mock.patch.object(db_routing, 'get_replica_lag', return_value=6.0) as get_lag:
+            with self.assertLogs('config.db_routing', 'WARNING'):
+                self.assertEqual(get_read_database(AnonymousUser()), DEFAULT_DB_ALIAS)
+            with read_replica() as alias:
+                self.assertEqual(alias, DEFAULT_DB_ALIAS)
+                self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+        # Результат проверки переиспользуется REPLICA_LAG_CHECK_INTERVAL секунд
+        get_lag.assert_called_once_with(REPLICA)
+
+        with override_settings(REPLICA_LAG_CHECK_INTERVAL=0):
+            with mock.patch.object(db_routing, 'get_replica_lag', return_value=1.0):
+                self.assertEqual(get_read_database(AnonymousUser()), REPLICA)
+
+    @override_settings(REPLICA_LAG_CHECK_INTERVAL=0)
+    def test_unavailable_replica(self):
+        with mock.patch.object(db_routing, 'get_replica_lag', side_effect=DatabaseError('connection refused')):
+            with self.assertLogs('config.db_routing', 'WARNING'):
+                self.assertEqual(get_read_database(AnonymousUser()), DEFAULT_DB_ALIAS)
+
+    def test_lagging_replica_api(self):
+        self.assertEqual(api_client().get(f'{API_PREFIX}products/').data['count'], 0)
+        with mock.patch.object(db_routing, 'get_replica_lag', return_value=6.0):
+            db_routing._replica_health.clear()
+            with self.assertLogs('config.db_routing', 'WARNING'):
+                response = api_client().get(f'{API_PREFIX}products/', {'search': 'Смартфон'})
+        self.assertEqual(response.data['count'], self.products)
+
+
+class ReadYourWritesTests(ReplicaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = api_client(self.client_user)
+        CartItem.objects.create(cart=self.client_user.client_profile.cart, product_info=self.offers[0], quantity=1)
+        Order.objects.create(client=self.client_user.client_profile, contact=self.contact)
+
+    def orders_count(self, client):
+        response = client.get(f'{API_PREFIX}orders/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def test_reads_from_replica(self):
+        self.assertEqual(self.orders_count(self.client), 0)
+
+    def test_sticky_after_write(self):
+        response = self.client.post(f'{API_PREFIX}order/', {'contact_id': self.contact.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        # Свой новый заказ клиент видит сразу: чтения - из основной БД
+        self.assertEqual(self.orders_count(self.client), 2)
+
+        other = create_client('other-client@example.com')
+        self.assertEqual(self.orders_count(api_client(other)), 0)
+
+        # По истечении REPLICA_STICKY_SECONDS - снова реплика
+        db_routing.cache.delete(db_routing.sticky_cache_key(self.client_user.pk))
+        self.assertEqual(self.orders_count(self.client), 0)
+
+    def test_failed_write_not_sticky(self):
+        response = self.client.post(f'{API_PREFIX}order/', {'contact_id': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.orders_count(self.client), 0)
@@ -0,0 +1,215 @@
+import io
+from datetime import timedelta
+
+import yaml
+from django.utils import timezone
+
+from ..api_tasks import cleanup_deleted_offers
+from ..exporters import get_offers_queryset, write_export
+from ..importers import read_pricelist
+from ..models import Category, DeletedOffer, Parameter, Product, ProductInfo, ProductParameter
+from ..serializers import ProductExportParamsSerializer
+from ..tasks import import_pricelist, process_pricelist_upload
+from .base import API_PREFIX, ShopAPITestCase, api_client, create_supplier
+
+
+def export(export_format, supplier_user):
+    fileobj = io.BytesIO()
+    offers = get_offers_queryset(supplier_id=supplier_user.supplier_profile.id)
+    write_export(fileobj, export_format, offers, chunk_size=3)
+    return fileobj.getvalue()
+
+
+class PriceListRoundTripTests(ShopAPITestCase):
+    """Выгруженный прайс-лист поставщика загружается обратно без изменений в каталоге."""
+
+    def offers_state(self, supplier_user):
+        return sorted(
+            ProductInfo.objects.filter(supplier__user=supplier_user)
+            .values_list('id', 'external_id', 'product_id', 'price', 'quantity')
+        )
+
+    def test_yaml_round_trip(self):
+        before = self.offers_state(self.supplier_user)
+        data = export('yaml', self.supplier_user).decode('utf-8')
+        self.assertEqual(len(yaml.safe_load(data)['goods']), self.products)
+
+        result = process_pricelist_upload(data, self.supplier_user.id)
+        self.assertFalse(result.startswith('Ошибка'), result)
+        self.assertEqual(self.offers_state(self.supplier_user), before)
+
+    def test_yaml_export_without_offers(self):
+        supplier_user = create_supplier('empty@example.com', name='Пустой')
+        data = export('yaml', supplier_user).decode('utf-8')
+        self.assertEqual(yaml.safe_load(data), {'shop': '', 'categories': [], 'goods': []})
+
+        result = process_pricelist_upload(data, supplier_user.id)
+        self.assertFalse(result.startswith('Ошибка'), result)
+
+    def test_tabular_round_trip(self):
+        before = self.offers_state(self.supplier_user)
+        for export_format in ('csv', 'ndjson'):
+            with self.subTest(export_format=export_format):
+                content = read_pricelist(io.BytesIO(export(export_format, self.supplier_user)), export_format)
+                # Позиции табличных форматов - итератор; для проверок читаем их целиком
+                content['goods'] = list(content['goods'])
+                # `id` - внешний ID предложения, а не его id в каталоге
+                self.assertEqual(
+                    sorted(item['id'] for item in content['goods']),
+                    sorted(external_id for _, external_id, *_ in before),
+                )
+                self.assertEqual(
+                    {(item['category'], item['category_name']) for item in content['goods']},
+                    {(self.category.id, self.category.name)},
+                )
+
+                result = import_pricelist(content, self.supplier_user.id)
+                self.assertFalse(result.startswith('Ошибка'), result)
+                self.assertEqual(self.offers_state(self.supplier_user), before)
+
+
+class ExportParamsTests(ShopAPITestCase):
+
+    def test_yaml_requires_supplier(self):
+        params = ProductExportParamsSerializer(data={'file_format': 'yaml'})
+        self.assertFalse(params.is_valid())
+        self.assertIn('supplier', params.errors)
+
+    def test_yaml_rejects_partial_export(self):
+        supplier_id = self.supplier_user.supplier_profile.id
+        for field, value in (('category', self.category.id), ('changed_since', '2025-01-01T00:00:00Z')):
+            with self.subTest(field=field):
+                params = ProductExportParamsSerializer(
+                    data={'file_format': 'yaml', 'supplier': supplier_id, field: value}
+                )
+                self.assertFalse(params.is_valid())
+                self.assertIn(field, params.errors)
+
+    def test_filters_allowed_for_other_formats(self):
+        params = ProductExportParamsSerializer(
+            data={'file_format': 'csv', 'category': self.category.id, 'changed_since': '2025-01-01T00:00:00Z'}
+        )
+        self.assertTrue(params.is_valid(), params.errors)
+
+
+class ChangedSinceTests(ShopAPITestCase):
+    """Выгрузка изменений: все изменения предложений и удаленные предложения."""
+
+    def setUp(self):
+        super().setUp()
+        self.since = timezone.now()
+
+    def changed(self):
+        return set(
+            get_offers_queryset(changed_since=self.since.isoformat()).values_list('id', flat=True)
+        )
+
+    def offer_ids(self, **lookup):
+        return set(ProductInfo.objects.filter(**lookup).values_list('id', flat=True))
+
+    def test_unchanged(self):
+        self.assertEqual(self.changed(), set())
+
+    def test_product_changes(self):
+        product = self.offers[0].product
+        product.name = 'Смартфон 1 (2024)'
+        product.save()
+        self.assertEqual(self.changed(), self.offer_ids(product=product))
+
+        other = self.offers[2].product
+        other.category = Category.objects.create(name='Телефоны')
+        other.save()
+        self.assertEqual(self.changed(), self.offer_ids(product__in=[product, other]))
+
+    def test_reference_renames(self):
+        parameter = Parameter.objects.get(name='Память')
+        parameter.name = 'Объем памяти'
+        parameter.save()
+        self.assertEqual(self.changed(), self.offer_ids())
+
+    def test_category_rename_by_import(self):
+        category = Category.objects.create(name='Наушники')
+        other = Category.objects.create(name='Планшеты')
+        content = {
+            'shop': 'Связной',
+            'categories': [{'id': category.id, 'name': 'Наушники'}],
+            'goods': [
+                {'id': 1, 'category': category.id, 'name': 'Наушники 1', 'price': 10, 'quantity': 1},
+                {'id': 2, 'category': other.id, 'name': 'Планшет 1', 'price': 10, 'quantity': 1},
+            ],
+        }
+        user = create_supplier('import@example.com', name='Импорт')
+        import_pricelist(content, user.id)
+        self.since = timezone.now()
+
+        content['categories'] = [{'id': category.id, 'name': 'Беспроводные наушники'}]
+        # Товар другого поставщика переносится в категорию из нового прайс-листа
+        content['goods'].append({
+            'id': 3, 'category': category.id, 'name': 'Смартфон 1', 'price': 10, 'quantity': 1,
+        })
+        import_pricelist(content, user.id)
+        self.assertEqual(
+            self.changed(),
+            self.offer_ids(product__name__in=['Наушники 1', 'Смартфон 1']),
+        )
+
+    def test_deleted_parameters(self):
+        ProductParameter.objects.filter(product_info=self.offers[0], parameter__name='Цвет').get().delete()
+        self.assertEqual(self.changed(), {self.offers[0].id})
+
+        # Параметры, удаленные одним запросом, - один UPDATE предложений
+        with self.assertNumQueries(3):
+            ProductParameter.objects.filter(product_info__in=self.offers[1:3]).delete()
+        self.assertEqual(self.changed(), {offer.id for offer in self.offers[:3]})
+
+        Parameter.objects.get(name='Память').delete()
+        self.assertEqual(self.changed(), self.offer_ids())
+
+    def test_deleted_offers(self):
+        # После удаления у объекта нет id
+        offer_ids = [offer.id for offer in self.offers]
+        self.offers[0].delete()
+        # Предложения, пропавшие из прайс-листа, и каскадное удаление с товаром
+        import_pricelist({'goods': []}, self.other_supplier_user.id)
+        self.offers[2].product.delete()
+
+        self.assertEqual(
+            set(DeletedOffer.objects.values_list('offer_id', flat=True)),
+            {offer_ids[0], offer_ids[2], *offer_ids[1::2]},
+        )
+        self.assertEqual(
+            DeletedOffer.objects.filter(offer_id=offer_ids[0]).values_list(
+                'external_id', 'supplier_id', 'category_id'
+            ).get(),
+            (1, self.supplier_user.supplier_profile.id, self.category.id),
+        )
+        self.assertEqual(self.changed(), set())
+
+    def test_deleted_offers_api(self):
+        offer_ids = [offer.id for offer in self.offers[:2]]
+        self.offers[0].delete()
+        self.offers[1].delete()
+        client = api_client(self.supplier_user)
+        url = f'{API_PREFIX}products/export/deleted/'
+
+        response = client.get(url, {'changed_since': self.since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['offer_id'] for row in response.data['results']], offer_ids)
+        response = client.get(url, {
+            'changed_since': self.since.isoformat(), 'supplier': self.supplier_user.supplier_profile.id,
+        })
+        self.assertEqual([row['offer_id'] for row in response.data['results']], offer_ids[:1])
+        response = client.get(url, {'changed_since': timezone.now().isoformat()})
+        self.assertEqual(response.data['count'], 0)
+
+        self.assertEqual(client.get(url).status_code, 400)
+        response = api_client(self.client_user).get(url, {'changed_since': self.since.isoformat()})
+        self.assertEqual(response.status_code, 403)
+
+    def test_cleanup(self):
+        offer_ids = [offer.id for offer in self.offers[:2]]
+        self.offers[0].delete()
+        self.offers[1].delete()
+        DeletedOffer.objects.filter(offer_id=offer_ids[0]).update(deleted_at=self.since - timedelta(days=31))
+        cleanup_deleted_offers()
+        self.assertEqual(list(DeletedOffer.objects.values_list('offer_id', flat=True)), offer_ids[1:])
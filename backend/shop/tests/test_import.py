@@ -0,0 +1,158 @@
+import csv
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..importers import PriceListFormatError, read_pricelist
+from ..models import DeletedOffer, Parameter, PriceHistory, ProductInfo
+from ..tasks import import_pricelist, process_pricelist_file
+from .base import ShopAPITestCase, create_supplier
+
+CSV_HEADER = 'id,category,category_name,name,price,quantity,parameters\n'
+
+
+class PriceListFileTests(ShopAPITestCase):
+    """Загрузка прайс-листа файлом (process_pricelist_file)."""
+
+    def process(self, data, file_format):
+        name = default_storage.save(f'pricelists/test.{file_format}', ContentFile(data))
+        result = process_pricelist_file(name, self.supplier_user.id, file_format)
+        # Файл удаляется и при ошибке чтения
+        self.assertFalse(default_storage.exists(name))
+        return result
+
+    def test_format_errors(self):
+        field_limit = csv.field_size_limit()
+        cases = {
+            'csv: не UTF-8': (CSV_HEADER + '1,1,,Чехол,10,1,\n').encode('cp1251'),
+            'csv: слишком длинное поле': (CSV_HEADER + f'1,1,,"{"x" * (field_limit + 1)}",10,1,\n').encode(),
+            'csv: неверная цена': (CSV_HEADER + '1,1,,Чехол,abc,1,\n').encode(),
+            'csv: неверные параметры': (CSV_HEADER + '1,1,,Чехол,10,1,{\n').encode(),
+            'ndjson: не UTF-8': '{"id": 1, "name": "Чехол"}\n'.encode('cp1251'),
+            'ndjson: неверный JSON': b'{"id": 1,\n',
+            'ndjson: не объект': b'[1, 2]\n',
+        }
+        before = ProductInfo.objects.count()
+        for case, data in cases.items():
+            file_format = case.partition(':')[0]
+            with self.subTest(case=case):
+                with self.assertRaises(PriceListFormatError):
+                    # Табличные форматы читаются потоком: ошибка - при чтении позиций
+                    list(read_pricelist(io.BytesIO(data), file_format)['goods'])
+                with self.assertLogs('shop.tasks', 'WARNING'):
+                    result = self.process(data, file_format)
+                self.assertEqual(result, f'Ошибка: неверный формат файла {file_format}.')
+        self.assertEqual(ProductInfo.objects.count(), before)
+
+    def test_csv_import(self):
+        data = CSV_HEADER + f'900,{self.category.id},,Чехол,10.50,3,"{{""Цвет"": ""черный""}}"\n'
+        result = self.process(data.encode('utf-8-sig'), 'csv')
+        self.assertFalse(result.startswith('Ошибка'), result)
+        offer = ProductInfo.objects.get(supplier__user=self.supplier_user, external_id=900)
+        self.assertEqual((offer.product.name, offer.quantity), ('Чехол', 3))
+
+    @override_settings(IMPORT_BATCH_SIZE=2)
+    def test_error_in_later_batch(self):
+        # Первые порции уже записаны, но ошибка отменяет импорт целиком
+        rows = ''.join(f'{number},{self.category.id},,Чехол {number},10,1,\n' for number in range(900, 905))
+        data = CSV_HEADER + rows + f'905,{self.category.id},,Чехол,abc,1,\n'
+        before = set(ProductInfo.objects.values_list('id', flat=True))
+        with self.assertLogs('shop.tasks', 'WARNING'):
+            result = self.process(data.encode(), 'csv')
+        self.assertEqual(result, 'Ошибка: неверный формат файла csv.')
+        self.assertEqual(set(ProductInfo.objects.values_list('id', flat=True)), before)
+
+
+class ImportPriceListTests(ShopAPITestCase):
+    """Импорт предложений порциями (import_pricelist)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Параметры уже есть: число запросов не зависит от порядка тестов
+        Parameter.objects.create(name='Разъем')
+
+    def pricelist(self, count, price=100):
+        return {
+            'shop': 'Импорт',
+            'categories': [{'id': self.category.id, 'name': self.category.name}],
+            'goods': [
+                {
+                    'id': number,
+                    'category': self.category.id,
+                    'name': f'Наушники {number}',
+                    'price': price + number,
+                    'quantity': 5,
+                    'parameters': {'Цвет': 'белый', 'Разъем': f'Тип {number % 2}'},
+                }
+                for number in range(1, count + 1)
+            ],
+        }
+
+    def import_queries(self, user, content):
+        with CaptureQueriesContext(connection) as queries:
+            result = import_pricelist(content, user.id)
+        self.assertFalse(result.startswith('Ошибка'), result)
+        return len(queries)
+
+    @override_settings(IMPORT_BATCH_SIZE=100)
+    def test_queries_do_not_depend_on_goods(self):
+        counts = {}
+        for count in (5, 40):
+            user = create_supplier(f'import-{count}@example.com', name=f'Импорт {count}')
+            created = self.import_queries(user, self.pricelist(count))
+            updated = self.import_queries(user, self.pricelist(count, price=200))
+            unchanged = self.import_queries(user, self.pricelist(count, price=200))
+            self.assertEqual(ProductInfo.objects.filter(supplier__user=user).count(), count)
+            # Пропавшие из файла предложения удаляются вместе с записями DeletedOffer
+            removed = self.import_queries(user, self.pricelist(0))
+            self.assertEqual(DeletedOffer.objects.filter(supplier_id=user.supplier_profile.id).count(), count)
+            counts[count] = (created, updated, unchanged, removed)
+        self.assertEqual(counts[5], counts[40])
+
+    @override_settings(IMPORT_BATCH_SIZE=3)
+    def test_changes(self):
+        user = create_supplier('import@example.com', name='Импорт')
+        content = self.pricelist(7)
+        import_pricelist(content, user.id)
+        offers = {offer.external_id: offer for offer in ProductInfo.objects.filter(supplier__user=user)}
+        self.assertEqual(PriceHistory.objects.filter(product_info__supplier__user=user).count(), 7)
+
+        content['goods'][0]['price'] = 1
+        content['goods'][1]['parameters'] = {'Цвет': 'черный'}
+        content['goods'][2]['name'] = 'Наушники 2'
+        import_pricelist(content, user.id)
+
+        current = {offer.external_id: offer for offer in ProductInfo.objects.filter(supplier__user=user)}
+        # Изменились цена, параметры и товар; остальные предложения не перезаписаны
+        changed = {
+            external_id for external_id, offer in current.items()
+            if offer.updated_at != offers[external_id].updated_at
+        }
+        self.assertEqual(changed, {1, 2, 3})
+        self.assertEqual(current[1].price, 1)
+        self.assertEqual(current[3].product_id, current[2].product_id)
+        self.assertEqual(
+            list(current[2].parameters.values_list('parameter__name', 'value')), [('Цвет', 'черный')]
+        )
+        self.assertEqual(current[4].parameters.count(), 2)
+        # В историю попала только новая цена
+        self.assertEqual(PriceHistory.objects.filter(product_info__supplier__user=user).count(), 8)
+
+    @override_settings(IMPORT_BATCH_SIZE=3)
+    def test_stale_offers_from_iterator(self):
+        user = create_supplier('import@example.com', name='Импорт')
+        import_pricelist(self.pricelist(7), user.id)
+        content = self.pricelist(7)
+        # Позиции - итератор, как у потоковых читателей; пропавшие из файла
+        # предложения удаляются по ID из всех порций
+        content['goods'] = iter(content['goods'][1:6])
+        import_pricelist(content, user.id)
+        self.assertEqual(
+            sorted(ProductInfo.objects.filter(supplier__user=user).values_list('external_id', flat=True)),
+            [2, 3, 4, 5, 6],
+        )
@@ -0,0 +1,36 @@
+from notifications.models import OutgoingEmail
+
+from ..models import CartItem, Order
+from .base import API_PREFIX, ShopAPITestCase, api_client
+
+
+class CheckoutNotificationTests(ShopAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cart = self.client_user.client_profile.cart
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_info=offer, quantity=1) for offer in self.offers[:2]
+        ])
+
+    def test_notifications_are_sent_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = api_client(self.client_user).post(
+                f'{API_PREFIX}order/', {'contact_id': self.contact.id}, format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        # До фиксации транзакции ни одна задача не запущена
+        self.assertFalse(OutgoingEmail.objects.exists())
+        # Клиент, администратор и группа уведомлений поставщиков
+        self.assertEqual(len(callbacks), 3)
+
+        for callback in callbacks:
+            callback()
+        recipients = sorted(email.to[0] for email in OutgoingEmail.objects.all())
+        self.assertEqual(
+            recipients,
+            sorted(['client@example.com', 'default-admin@example.com', 'supplier@example.com', 'other@example.com']),
+        )
+        order = Order.objects.get(id=response.data['id'])
+        self.assertIsNotNone(order.admin_notified_at)
+        self.assertFalse(order.supplier_orders.filter(notified_at__isnull=True).exists())
@@ -0,0 +1,115 @@
+"""
+Бюджеты запросов к БД (QUERY_BUDGETS) для основных эндпоинтов.
+
+В настройках тестов включен QUERY_BUDGET_STRICT: при превышении бюджета
+QueryCountMiddleware выбрасывает QueryBudgetExceeded, и тест падает.
+Данных в каждом списке несколько, поэтому N+1 выходит за бюджет.
+"""
+from django.test import override_settings
+
+from config.middleware import QueryBudgetExceeded
+
+from ..models import CartItem, Order
+from .base import API_PREFIX, ShopAPITestCase, api_client
+
+
+class CatalogQueryBudgetTests(ShopAPITestCase):
+
+    def test_products_list(self):
+        response = api_client().get(f'{API_PREFIX}products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], self.products)
+
+    def test_products_list_with_search(self):
+        response = api_client().get(f'{API_PREFIX}products/', {'search': 'Смартфон', 'category': self.category.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], self.products)
+
+    def test_products_retrieve(self):
+        product = self.offers[0].product
+        response = api_client().get(f'{API_PREFIX}products/{product.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['product_infos']), 2)
+
+    def test_budget_overrun_raises(self):
+        with override_settings(QUERY_BUDGETS={'ProductViewSet.list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                api_client().get(f'{API_PREFIX}products/')
+
+
+class CartQueryBudgetTests(ShopAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = api_client(self.client_user)
+        self.cart = self.client_user.client_profile.cart
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product_info=offer, quantity=1) for offer in self.offers[:4]
+        ])
+
+    def test_cart_list(self):
+        response = self.client.get(f'{API_PREFIX}cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), 4)
+
+    def test_cart_create(self):
+        response = self.client.post(
+            f'{API_PREFIX}cart/', {'product_info': self.offers[-1].id, 'quantity': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.cart.items.count(), 5)
+
+    def test_cart_partial_update(self):
+        item = self.cart.items.first()
+        response = self.client.patch(
+            f'{API_PREFIX}cart/{item.id}/', {'product_info': item.product_info_id, 'quantity': 3}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 3)
+
+    def test_cart_destroy(self):
+        item = self.cart.items.first()
+        response = self.client.delete(f'{API_PREFIX}cart/{item.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.cart.items.count(), 3)
+
+
+class OrderQueryBudgetTests(ShopAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = api_client(self.client_user)
+        self.cart = self.client_user.client_profile.cart
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product_info=offer, quantity=2) for offer in self.offers[:4]
+        ])
+
+    def checkout(self):
+        response = self.client.post(f'{API_PREFIX}order/', {'contact_id': self.contact.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def test_checkout(self):
+        response = self.checkout()
+        self.assertEqual(len(response.data['items']), 4)
+        self.assertFalse(self.cart.items.exists())
+        # Позиции двух поставщиков - две части заказа
+        order = Order.objects.get(id=response.data['id'])
+        self.assertEqual(order.supplier_orders.count(), 2)
+
+    def test_orders_list(self):
+        self.checkout()
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product_info=offer, quantity=1) for offer in self.offers[4:8]
+        ])
+        self.checkout()
+        response = self.client.get(f'{API_PREFIX}orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_orders_retrieve(self):
+        order_id = self.checkout().data['id']
+        response = self.client.get(f'{API_PREFIX}orders/{order_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), 4)
@@ -0,0 +1,117 @@
+"""
+Ожидание результата задачи на /api/v1/tasks/<task_id>/: long-poll
+(`?wait=`) и Server-Sent Events, уведомления через Redis pub/sub
+(fakeredis в config/settings_test.py) и работа без Redis.
+"""
+import asyncio
+import json
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+
+from ..tasks import send_order_confirmation_email
+from .base import API_PREFIX, ShopAPITestCase, auth_headers
+
+# Недоступный Redis: соединение сразу отклоняется
+REDIS_DOWN_URL = 'redis://127.0.0.1:1/0'
+
+
+def parse_events(content):
+    """События SSE: [(event, data)]; комментарии keep-alive - (None, None)."""
+    events = []
+    for block in content.decode('utf-8').split('\n\n'):
+        if not block:
+            continue
+        if block.startswith(':'):
+            events.append((None, None))
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class TaskStatusTests(ShopAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.headers = auth_headers(self.supplier_user)
+        self.task_id = str(uuid.uuid4())
+        self.url = f'{API_PREFIX}tasks/{self.task_id}/'
+
+    def run_task(self):
+        # Задача без заказа завершается сразу; в eager-режиме результат
+        # сохраняется, а task_postrun публикует уведомление
+        send_order_confirmation_email.apply(args=(0, 'client@example.com'), task_id=self.task_id)
+
+    async def run_task_later(self, delay=0.3):
+        await asyncio.sleep(delay)
+        await sync_to_async(self.run_task)()
+
+    async def get(self, data=None, accept='application/json'):
+        return await self.async_client.get(self.url, data, headers={**self.headers, 'Accept': accept})
+
+    async def stream(self):
+        response = await self.get(accept='text/event-stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return parse_events(b''.join([chunk async for chunk in response.streaming_content]))
+
+    async def test_long_poll_returns_on_completion(self):
+        started = time.monotonic()
+        response, _ = await asyncio.gather(self.get({'wait': 10}), self.run_task_later())
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'SUCCESS')
+        self.assertTrue(response.json()['result'].startswith('Ошибка'))
+
+    async def test_long_poll_finished_task(self):
+        await sync_to_async(self.run_task)()
+        response = await self.get({'wait': 10})
+        self.assertEqual(response.json()['status'], 'SUCCESS')
+
+    @override_settings(TASK_STATUS_MAX_WAIT=0.5)
+    async def test_long_poll_timeout(self):
+        response = await self.get({'wait': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'PENDING')
+
+    def test_invalid_wait(self):
+        response = self.client.get(self.url, {'wait': 'abc'}, HTTP_AUTHORIZATION=self.headers['Authorization'])
+        self.assertEqual(response.status_code, 400)
+
+    async def test_stream_ends_on_completion(self):
+        started = time.monotonic()
+        events, _ = await asyncio.gather(self.stream(), self.run_task_later())
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([event for event, _ in events], ['status', 'status'])
+        self.assertEqual(events[0][1]['status'], 'PENDING')
+        self.assertEqual(events[-1][1]['status'], 'SUCCESS')
+
+    async def test_stream_finished_task(self):
+        await sync_to_async(self.run_task)()
+        events = await self.stream()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][1]['status'], 'SUCCESS')
+
+    @override_settings(TASK_STATUS_STREAM_TIMEOUT=1, TASK_STATUS_HEARTBEAT=0.3)
+    async def test_stream_timeout(self):
+        events = await self.stream()
+        # Начальное состояние, keep-alive и последнее состояние по таймауту
+        self.assertEqual(events[0][0], 'status')
+        self.assertIn((None, None), events)
+        self.assertEqual(events[-1][1]['status'], 'PENDING')
+
+    @override_settings(TASK_EVENTS_REDIS_URL=REDIS_DOWN_URL)
+    async def test_redis_unavailable(self):
+        # Без Redis ожидание не выполняется: сразу текущее состояние
+        started = time.monotonic()
+        response = await self.get({'wait': 10})
+        self.assertEqual(response.json()['status'], 'PENDING')
+        events = await self.stream()
+        self.assertEqual([(event, data['status']) for event, data in events], [('status', 'PENDING')])
+        self.assertLess(time.monotonic() - started, 5)
+
+        await sync_to_async(self.run_task)()
+        response = await self.get({'wait': 10})
+        self.assertEqual(response.json()['status'], 'SUCCESS')
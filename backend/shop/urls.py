@@ -2,14 +2,19 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     SupplierStatusView,
+    SupplierSalesView,
+    PriceHistoryView,
     PriceListUploadView,
     ProductViewSet,
+    CategoryListView,
     CartViewSet,
     ContactViewSet, 
     OrderCreateView,
     ProductExportView,
+    DeletedOfferListView,
     TaskStatusView,
-    OrderViewSet
+    OrderViewSet,
+    SupplierOrderViewSet,
     )
 
 app_name = 'shop'
@@ -21,16 +26,25 @@ router.register(r'products', ProductViewSet, basename='products')
 router.register(r'cart', CartViewSet, basename='cart')
 router.register(r'contacts', ContactViewSet, basename='contacts') 
 router.register(r'orders', OrderViewSet, basename='orders')
+router.register(r'supplier/orders', SupplierOrderViewSet, basename='supplier-orders')
 
 urlpatterns = [
     # URL для управления статусом поставщика
     path('supplier/status/', SupplierStatusView.as_view(), name='supplier-status'),
     # URL для загрузки прайс-листа
     path('supplier/pricelist/', PriceListUploadView.as_view(), name='supplier-pricelist-upload'),
+    # URL для отчета о продажах поставщика
+    path('supplier/sales/', SupplierSalesView.as_view(), name='supplier-sales'),
+    # URL для списка категорий
+    path('categories/', CategoryListView.as_view(), name='category-list'),
+    # URL для истории цен предложения поставщика
+    path('offers/<int:pk>/price-history/', PriceHistoryView.as_view(), name='price-history'),
     # URL для создания заказа
     path('order/', OrderCreateView.as_view(), name='order-create'),
     # URL для запуска экспорта
     path('products/export/', ProductExportView.as_view(), name='product-export'),
+    # URL для списка удаленных предложений (дополняет экспорт изменений)
+    path('products/export/deleted/', DeletedOfferListView.as_view(), name='product-export-deleted'),
     # URL для проверки статуса и получения результата задачи
     path('tasks/<str:task_id>/', TaskStatusView.as_view(), name='task-status'),
 
@@ -1,27 +1,62 @@
+import asyncio
+import uuid
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from celery import states
 from celery.result import AsyncResult
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef, Prefetch, prefetch_related_objects
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from redis.exceptions import RedisError
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView
+from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveUpdateAPIView
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.viewsets import ModelViewSet
 
+from config.db_routing import ReplicaReadMixin
 from users.models import Supplier
+from .async_views import AsyncAPIView, AsyncReadOnlyModelViewSet
 from .filters import ProductFilter
-from .models import Cart, CartItem, Contact, Order, Product
+from .exporters import get_deleted_offers_queryset
+from .importers import IMPORT_READERS, detect_format
+from .models import (
+    ArchivedOrder, Cart, CartItem, Contact, Order, PriceHistory, Product, ProductInfo, SupplierOrder,
+)
 from .permissions import IsAdminOrSupplier, IsClient, IsSupplier
+from .reference import get_reference_data, get_reference_data_for
+from .renderers import EventStreamRenderer, format_event
 from .serializers import (
+    ArchivedOrderSerializer,
     CartItemWriteSerializer,
     CartSerializer,
+    CategorySerializer,
     ContactSerializer,
+    DeletedOfferSerializer,
+    DeletedOffersParamsSerializer,
     OrderSerializer,
+    PriceHistoryParamsSerializer,
+    PriceHistorySerializer,
+    ProductExportParamsSerializer,
     ProductSerializer,
+    SalesFiguresSerializer,
+    SupplierCategorySalesSerializer,
+    SupplierDailySalesSerializer,
+    SupplierOrderSerializer,
+    SupplierProductSalesSerializer,
+    SupplierSalesParamsSerializer,
     SupplierStatusSerializer,
 )
+from .task_events import TaskSubscription
 
 
 
@@ -32,6 +67,10 @@ class SupplierStatusView(RetrieveUpdateAPIView):
     Позволяет поставщику управлять своей готовностью принимать заказы.
     - GET: получить текущий статус.
     - PATCH/PUT: изменить статус.
+
+    Пока поставщик не принимает заказы, его предложения не показываются
+    в каталоге, а позиции корзин с его товарами помечены недоступными
+    (shop/signals.py) и не могут быть оформлены.
     """
     serializer_class = SupplierStatusSerializer
     permission_classes = [IsSupplier]
@@ -48,14 +87,20 @@ class PriceListUploadView(APIView):
     """
     Загрузка прайс-листа поставщика.
     
-    Принимает POST-запрос с файлом в формате YAML.
-    Ключ для файла в form-data должен быть `file`.
+    Принимает POST-запрос с файлом в формате YAML, CSV, NDJSON, Arrow IPC
+    или Parquet (последние два - если установлен pyarrow), см. shop/importers.py.
+    Ключ для файла в form-data должен быть `file`. Формат определяется по
+    расширению файла или типу содержимого; его можно указать явно полем
+    `file_format`.
+
+    Файл сохраняется в файловое хранилище, задача импорта читает его
+    оттуда потоком, поэтому содержимое файла не передается через брокер.
     """
     permission_classes = [IsSupplier]
     parser_classes = [MultiPartParser]
 
     def post(self, request, *args, **kwargs):
-        from .tasks import process_pricelist_upload
+        from .tasks import process_pricelist_file
 
         file_obj = request.FILES.get('file')
         if not file_obj:
@@ -64,24 +109,139 @@ class PriceListUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        data = file_obj.read().decode('utf-8')
+        file_format = request.data.get('file_format') or detect_format(file_obj.name, file_obj.content_type)
+        if file_format not in IMPORT_READERS:
+            return Response(
+                {'error': f'Неподдерживаемый формат файла. Допустимые форматы: {", ".join(IMPORT_READERS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        process_pricelist_upload.delay(data, request.user.id)
+        name = default_storage.save(
+            f'{settings.PRICELIST_STORAGE_DIR}/{uuid.uuid4().hex}.{file_format}', file_obj
+        )
+        process_pricelist_file.delay(name, request.user.id, file_format)
 
         return Response(
-            {'message': 'Ваш прайс-лист был принят в обработку.'},
+            {'message': 'Ваш прайс-лист был принят в обработку.', 'format': file_format},
             status=status.HTTP_202_ACCEPTED,
         )
 
-class ProductViewSet(ReadOnlyModelViewSet):
+class SupplierSalesView(ReplicaReadMixin, APIView):
+    """
+    Отчет о продажах текущего поставщика.
+
+    Query-параметры:
+    - `group_by`: day (по умолчанию), product или category.
+    - `date_from`, `date_to`: период (YYYY-MM-DD, обе даты включаются),
+      по умолчанию - последние 30 дней.
+
+    Ответ: итоги за период (`totals`), строки отчета (`results`: выручка,
+    проданные единицы и число заказов) и `up_to` - время последнего
+    учтенного заказа. Данные берутся из предрасчитанных таблиц продаж
+    (shop/analytics.py) и обновляются раз в несколько минут.
+    """
+    permission_classes = [IsSupplier]
+    row_serializers = {
+        'day': SupplierDailySalesSerializer,
+        'product': SupplierProductSalesSerializer,
+        'category': SupplierCategorySalesSerializer,
+    }
+
+    def get(self, request, *args, **kwargs):
+        from .analytics import sales_report
+
+        params = SupplierSalesParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        supplier = getattr(request.user, 'supplier_profile', None)
+        report = sales_report(
+            supplier.id if supplier else None,
+            data['group_by'],
+            data['date_from'],
+            data['date_to'],
+            using=self.read_db,
+        )
+        return Response({
+            'group_by': data['group_by'],
+            'date_from': data['date_from'],
+            'date_to': data['date_to'],
+            'up_to': report['up_to'],
+            'totals': SalesFiguresSerializer(report['totals']).data,
+            'results': self.row_serializers[data['group_by']](report['results'], many=True).data,
+        })
+
+
+class PriceHistoryView(ReplicaReadMixin, APIView):
+    """
+    Ряд цен и остатков предложения поставщика (ProductInfo) за период.
+
+    Query-параметры: `date_from`, `date_to` (YYYY-MM-DD, обе даты
+    включаются), по умолчанию - последние PRICE_HISTORY_DEFAULT_DAYS дней.
+
+    Ответ: `results` - изменения цены и остатка за период в порядке
+    времени, `initial` - цена и остаток, действовавшие на начало периода
+    (последнее изменение до него, null, если его нет). Оба запроса
+    читают индекс (product_info, recorded_at) истории цен.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk, *args, **kwargs):
+        params = PriceHistoryParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        if not ProductInfo.objects.using(self.read_db).filter(id=pk).exists():
+            raise Http404
+        start = timezone.make_aware(datetime.combine(data['date_from'], time.min))
+        end = timezone.make_aware(datetime.combine(data['date_to'] + timedelta(days=1), time.min))
+        history = PriceHistory.objects.using(self.read_db).filter(product_info_id=pk)
+        initial = history.filter(recorded_at__lt=start).order_by('-recorded_at').first()
+        points = history.filter(recorded_at__gte=start, recorded_at__lt=end).order_by('recorded_at')
+        return Response({
+            'product_info': pk,
+            'date_from': data['date_from'],
+            'date_to': data['date_to'],
+            'initial': PriceHistorySerializer(initial).data if initial else None,
+            'results': PriceHistorySerializer(points, many=True).data,
+        })
+
+
+class CategoryListView(APIView):
+    """
+    Список категорий товаров (по id).
+
+    Отдается из справочника в памяти процесса (shop/reference.py) без
+    запросов к БД. Доступен всем пользователям.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        categories = [
+            {'id': category_id, 'name': name}
+            for category_id, name in sorted(get_reference_data().categories.items())
+        ]
+        return Response(CategorySerializer(categories, many=True).data)
+
+
+class ProductViewSet(ReplicaReadMixin, AsyncReadOnlyModelViewSet):
     """
     Просмотр каталога товаров.
     
     Предоставляет доступ к списку товаров с фильтрацией и поиском.
     Доступно всем пользователям, включая неавторизованных.
+    Обработчики асинхронные (асинхронный ORM), см. shop/async_views.py.
+    Чтение из реплики БД, если она настроена (config/db_routing.py).
+    Товары без предложений поставщиков, принимающих заказы, не показываются.
     """
-    queryset = Product.objects.all().prefetch_related(
-        'product_infos__supplier', 'product_infos__parameters__parameter'
+    # Предложения только поставщиков, которые принимают заказы
+    queryset = Product.objects.order_by('id').prefetch_related(
+        Prefetch(
+            'product_infos',
+            queryset=ProductInfo.objects.filter(supplier__is_active=True).select_related('supplier'),
+        ),
+        # Названия параметров - из справочника в памяти (ProductParameterSerializer)
+        'product_infos__parameters',
     )
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
@@ -89,6 +249,37 @@ class ProductViewSet(ReadOnlyModelViewSet):
     filterset_class = ProductFilter
     search_fields = ['name']
 
+    def get_queryset(self):
+        active_offers = ProductInfo.objects.filter(product=OuterRef('pk'), supplier__is_active=True)
+        return super().get_queryset().filter(Exists(active_offers)).using(self.read_db)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'reference': getattr(self, 'reference', None)}
+
+    async def aload_reference(self, products):
+        """
+        Справочник с названиями параметров загруженных товаров - до
+        сериализации, которая выполняется в цикле событий.
+        """
+        parameter_ids = {
+            product_parameter.parameter_id
+            for product in products
+            for product_info in product.product_infos.all()
+            for product_parameter in product_info.parameters.all()
+        }
+        self.reference = await sync_to_async(get_reference_data_for)(parameter_ids)
+
+    async def apaginate_queryset(self, queryset):
+        page = await super().apaginate_queryset(queryset)
+        if page is not None:
+            await self.aload_reference(page)
+        return page
+
+    async def aget_object(self):
+        product = await super().aget_object()
+        await self.aload_reference([product])
+        return product
+
 
 class CartViewSet(ModelViewSet):
     """
@@ -135,6 +326,7 @@ class CartViewSet(ModelViewSet):
         cart, _ = Cart.objects.get_or_create(
             client=self.request.user.client_profile
         )
+        prefetch_related_objects([cart], 'items__product_info__product')
         serializer = self.get_serializer(cart)
         return Response(serializer.data)
     
@@ -172,7 +364,18 @@ class ContactViewSet(ModelViewSet):
 
 class ProductExportView(APIView):
     """
-    Запускает асинхронную задачу по экспорту товаров в JSON.
+    Запускает асинхронную задачу по экспорту товаров.
+
+    Необязательные query-параметры:
+    - `file_format`: json (по умолчанию), ndjson, csv или yaml
+      (полный прайс-лист в формате загрузки, требует `supplier`).
+    - `supplier`: ID поставщика, выгрузить только его предложения.
+    - `category`: ID категории (кроме yaml).
+    - `changed_since`: дата и время в ISO 8601, выгрузить только
+      предложения, измененные с этого момента (кроме yaml).
+
+    Если такой же экспорт уже выполняется или готов, а каталог с тех пор
+    не менялся, возвращается ID существующей задачи (`reused: true`).
     """
     # Допустим, экспорт доступен только администраторам или поставщикам.
 
@@ -182,73 +385,264 @@ class ProductExportView(APIView):
         """
         Запускает задачу и возвращает ее ID.
         """
-        from .api_tasks import export_products_to_json
+        from .api_tasks import start_export
 
-        task = export_products_to_json.delay()
+        params = ProductExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        # Одинаковые запросы при неизменном каталоге получают одну и ту же задачу
+        task_id, reused = start_export(**params.task_kwargs())
         return Response(
-            {'task_id': task.id},
+            {'task_id': task_id, 'reused': reused},
             status=status.HTTP_202_ACCEPTED
         )
 
 
-class TaskStatusView(APIView):
+class DeletedOfferListView(ReplicaReadMixin, ListAPIView):
+    """
+    Предложения, удаленные начиная с `changed_since` (постранично).
+
+    Дополняет экспорт изменений (`changed_since` в ProductExportView):
+    экспорт выгружает новые и измененные предложения, этот список -
+    удаленные. Query-параметры: `changed_since` (обязателен), `supplier`,
+    `category`. Удаления хранятся EXPORT_DELETED_OFFERS_TTL дней: если
+    прошлая синхронизация была раньше, нужен полный экспорт.
+    """
+    serializer_class = DeletedOfferSerializer
+    permission_classes = [IsAdminOrSupplier]
+    filter_backends = []
+
+    def get_queryset(self):
+        params = DeletedOffersParamsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return get_deleted_offers_queryset(
+            data['changed_since'], data.get('supplier'), data.get('category')
+        ).using(self.read_db).order_by('deleted_at', 'id')
+
+
+class TaskStatusView(AsyncAPIView):
     """
     Проверяет статус асинхронной задачи и возвращает результат.
+
+    Режимы ожидания результата без частого опроса:
+    - `?wait=<секунды>` (long-poll): если задача не завершена, ответ
+      задерживается до ее завершения, но не дольше TASK_STATUS_MAX_WAIT.
+    - `Accept: text/event-stream` (Server-Sent Events): события `status`
+      при подключении и при завершении задачи, между ними - комментарии
+      keep-alive. Для файлов результата событие содержит описание файла,
+      сам файл скачивается обычным GET. Требует запуска через ASGI.
+
+    О завершении задачи воркер сообщает через Redis pub/sub (shop/task_events.py).
     """
     permission_classes = [IsAdminOrSupplier]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
 
-    def get(self, request, task_id, *args, **kwargs):
+    async def get(self, request, task_id, *args, **kwargs):
         """
         Возвращает статус задачи и ее результат (если готов).
+
+        Если результатом задачи является файл (экспорт каталога),
+        он отдается потоком из файлового хранилища.
         """
-        # Получаем объект задачи по ее ID
-        task_result = AsyncResult(task_id)
-        
+        if request.accepted_renderer.format == EventStreamRenderer.format:
+            response = StreamingHttpResponse(
+                self._event_stream(task_id), content_type=EventStreamRenderer.media_type
+            )
+            response['Cache-Control'] = 'no-cache'
+            # Отключаем буферизацию ответа в nginx
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        wait = self._get_wait(request)
+        if wait:
+            state, result = await self._wait_for_result(task_id, wait)
+        else:
+            state, result = await self._aread_result(task_id)
+
         response_data = {
             'task_id': task_id,
-            'status': task_result.status,
+            'status': state,
             'result': None
         }
 
-        if task_result.successful():
-            # Если задача успешно выполнена, возвращаем результат как JSON-файл
-            json_data = task_result.get()
-            # Создаем HTTP-ответ с JSON-данными и нужными заголовками
-            response = HttpResponse(
-                json_data, 
-                content_type='application/json; charset=utf-8'
-            )
-            response['Content-Disposition'] = 'attachment; filename="products.json"'
-            return response
-        elif task_result.failed():
+        if state == states.SUCCESS:
+            if isinstance(result, dict) and 'file' in result:
+                return await self._file_response(result, response_data)
+            response_data['result'] = result
+            if isinstance(result, dict) and 'error' in result:
+                return JsonResponse(response_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return JsonResponse(response_data, status=status.HTTP_200_OK)
+        elif state == states.FAILURE:
             # Если задача провалилась, возвращаем информацию об ошибке
-            response_data['result'] = str(task_result.info) # .info содержит traceback
+            response_data['result'] = str(result)
             return JsonResponse(response_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         else:
             # Если задача еще выполняется, просто возвращаем ее статус
             return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _get_wait(request):
+        """Время ожидания из параметра `wait`, не больше TASK_STATUS_MAX_WAIT."""
+        wait = request.query_params.get('wait')
+        if not wait:
+            return 0
+        try:
+            wait = float(wait)
+        except ValueError:
+            raise ValidationError({'wait': ['Укажите время ожидания в секундах.']})
+        return min(max(wait, 0), settings.TASK_STATUS_MAX_WAIT)
+
+    async def _aread_result(self, task_id):
+        # Бэкенд результатов Celery синхронный: состояние задачи читается
+        # в пуле потоков, не блокируя цикл событий.
+        return await sync_to_async(self._read_result, thread_sensitive=False)(
+            AsyncResult(task_id)
+        )
+
+    async def _wait_for_result(self, task_id, wait):
+        """Ждет завершения задачи не дольше `wait` секунд (long-poll)."""
+        try:
+            async with TaskSubscription(task_id) as subscription:
+                # Проверяем состояние после подписки, чтобы не пропустить
+                # уведомление о задаче, завершившейся только что
+                state, result = await self._aread_result(task_id)
+                if state in states.READY_STATES:
+                    return state, result
+                await subscription.wait(wait)
+        except RedisError:
+            # Без Redis просто возвращаем текущее состояние
+            pass
+        return await self._aread_result(task_id)
+
+    async def _event_stream(self, task_id):
+        """
+        Поток Server-Sent Events: текущее состояние задачи, затем
+        keep-alive до завершения задачи или TASK_STATUS_STREAM_TIMEOUT.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.TASK_STATUS_STREAM_TIMEOUT
+        try:
+            async with TaskSubscription(task_id) as subscription:
+                state, result = await self._aread_result(task_id)
+                if state not in states.READY_STATES:
+                    yield format_event('status', {'task_id': task_id, 'status': state, 'result': None})
+                while state not in states.READY_STATES and (remaining := deadline - loop.time()) > 0:
+                    notified = await subscription.wait(min(settings.TASK_STATUS_HEARTBEAT, remaining))
+                    # Состояние перечитывается и без уведомления: оно могло
+                    # потеряться, например, при перезапуске Redis
+                    state, result = await self._aread_result(task_id)
+                    if not notified and state not in states.READY_STATES:
+                        yield ': keep-alive\n\n'
+        except RedisError:
+            state, result = await self._aread_result(task_id)
+
+        if state == states.FAILURE:
+            result = str(result)
+        elif isinstance(result, dict) and 'file' in result:
+            # Путь в хранилище клиенту не нужен: файл отдается обычным GET
+            result = {key: value for key, value in result.items() if key != 'file'}
+        yield format_event('status', {'task_id': task_id, 'status': state, 'result': result})
+
+    @staticmethod
+    def _read_result(task_result):
+        """
+        Состояние задачи и ее результат (для завершенных задач)
+        за одно обращение к бэкенду результатов.
+        """
+        state = task_result.state
+        result = task_result.result if state in states.READY_STATES else None
+        return state, result
+
+    @staticmethod
+    async def _file_response(result, response_data):
+        """
+        Отдает файл результата потоком, не загружая его целиком в память.
+        """
+        try:
+            file = await sync_to_async(default_storage.open, thread_sensitive=False)(
+                result['file'], 'rb'
+            )
+        except FileNotFoundError:
+            # Файл уже удален задачей очистки старых экспортов
+            response_data['result'] = 'Файл результата больше не доступен, запустите экспорт заново.'
+            return JsonResponse(response_data, status=status.HTTP_410_GONE)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=result.get('filename', 'products.json'),
+            content_type=result.get('content_type', 'application/octet-stream'),
+        )
         
 
-class OrderViewSet(ReadOnlyModelViewSet):
+class OrderViewSet(ReplicaReadMixin, AsyncReadOnlyModelViewSet):
     """
     ViewSet для просмотра заказов клиента.
     
     Позволяет клиенту просматривать список своих заказов и детали
-    каждого конкретного заказа.
+    каждого конкретного заказа. Обработчики асинхронные, чтение из реплики
+    БД (кроме нескольких секунд после изменений самого клиента).
     - GET /api/v1/orders/ - список заказов.
-    - GET /api/v1/orders/{id}/ - детали заказа.
+    - GET /api/v1/orders/?archived=true - список архивных заказов (shop/archive.py).
+    - GET /api/v1/orders/{id}/ - детали заказа, в том числе архивного.
     """
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsClient] # Только для клиентов
 
+    def is_archive_list(self):
+        return self.action == 'list' and self.request.query_params.get('archived') in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.is_archive_list():
+            return ArchivedOrderSerializer
+        return OrderSerializer
+
     def get_queryset(self):
         """
         Возвращает только заказы текущего пользователя.
         Используем prefetch_related для оптимизации запросов к позициям заказа.
         """
-        return Order.objects.filter(
+        if self.is_archive_list():
+            return ArchivedOrder.objects.using(self.read_db).filter(client__user=self.request.user)
+        return Order.objects.using(self.read_db).filter(
             client__user=self.request.user
         ).prefetch_related(
             'items',
             'items__product_info__product'
         )
+
+    async def retrieve(self, request, *args, **kwargs):
+        try:
+            return await super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Закрытые заказы могли быть перенесены в архив
+            archived_order = None
+            if str(kwargs['pk']).isdigit():
+                archived_order = await ArchivedOrder.objects.using(self.read_db).filter(
+                    client__user=request.user, id=kwargs['pk']
+                ).afirst()
+            if archived_order is None:
+                raise
+            return Response(ArchivedOrderSerializer(archived_order).data)
+
+
+class SupplierOrderViewSet(ReplicaReadMixin, AsyncReadOnlyModelViewSet):
+    """
+    Очередь заказов текущего поставщика: его части заказов клиентов,
+    новые первыми.
+    - GET /api/v1/supplier/orders/ - список (с пагинацией), фильтр `?status=new`.
+    - GET /api/v1/supplier/orders/{id}/ - позиции заказа поставщика.
+    """
+    serializer_class = SupplierOrderSerializer
+    permission_classes = [IsSupplier]
+
+    def get_queryset(self):
+        supplier = getattr(self.request.user, 'supplier_profile', None)
+        # Индекс (supplier, [status,] -order_created_at): без соединения с позициями
+        queryset = SupplierOrder.objects.using(self.read_db).filter(
+            supplier_id=supplier.id if supplier else None
+        )
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset.prefetch_related('items__product_info__product')
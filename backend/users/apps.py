@@ -5,4 +5,11 @@ class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
 
-    verbose_name = 'Управление пользователями'
\ No newline at end of file
+    verbose_name = 'Управление пользователями'
+
+    def ready(self):
+        """
+        Подключаем сигналы сброса кэша аутентификации и расширение
+        схемы OpenAPI для JWT-аутентификации.
+        """
+        from . import schema, signals
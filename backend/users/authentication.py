@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Client, Supplier, User
+
+# Поля пользователя, которые хранятся в кэше. Остальные поля (в том числе
+# password) у собранного из кэша пользователя отложенные: они загрузятся
+# из БД при первом обращении, а save() не перезапишет их пустыми значениями.
+PRINCIPAL_FIELDS = (
+    'id', 'email', 'first_name', 'last_name', 'user_type',
+    'is_active', 'is_staff', 'is_superuser',
+)
+# Данные, которые передаются в JWT как claims
+PRINCIPAL_CLAIMS = ('user_type', 'client_id', 'supplier_id')
+
+
+def principal_cache_key(user_id):
+    return f'auth:principal:{user_id}'
+
+
+def get_principal_data(user_id):
+    """
+    Возвращает данные пользователя и ID его профилей из кэша.
+
+    При промахе данные загружаются одним запросом (профили через LEFT JOIN)
+    и кэшируются на AUTH_PRINCIPAL_CACHE_TTL секунд. Возвращает None,
+    если пользователь не найден.
+    """
+    key = principal_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = (
+            User.objects.filter(pk=user_id)
+            .values(
+                *PRINCIPAL_FIELDS,
+                client_id=F('client_profile__id'),
+                supplier_id=F('supplier_profile__id'),
+            )
+            .first()
+        )
+        if data is None:
+            return None
+        cache.set(key, data, settings.AUTH_PRINCIPAL_CACHE_TTL)
+    return data
+
+
+def invalidate_principal(user_id):
+    """Удаляет данные пользователя из кэша (деактивация, смена типа и т.п.)."""
+    cache.delete(principal_cache_key(user_id))
+
+
+def build_user(data):
+    """
+    Собирает экземпляр User без запроса к БД.
+
+    Профили клиента и поставщика кладутся в кэш связей экземпляра, поэтому
+    `user.client_profile` и `user.supplier_profile` тоже не делают запросов.
+    """
+    db = router.db_for_read(User)
+    # from_db() ожидает значения в порядке полей модели
+    field_names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in PRINCIPAL_FIELDS
+    ]
+    user = User.from_db(db, field_names, [data[name] for name in field_names])
+    profiles = (
+        ('client_profile', Client, data.get('client_id')),
+        ('supplier_profile', Supplier, data.get('supplier_id')),
+    )
+    for accessor, model, profile_id in profiles:
+        profile = None
+        if profile_id is not None:
+            # Остальные поля профиля (например, name у поставщика) отложенные
+            profile = model.from_db(db, ('id', 'user_id'), (profile_id, user.id))
+            profile._state.fields_cache['user'] = user
+        user._state.fields_cache[accessor] = profile
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без запроса пользователя из БД на каждый запрос.
+
+    Пользователь собирается из данных в кэше с коротким временем жизни
+    (кэш сбрасывается сигналами при изменении пользователя или его
+    профилей) и сверяется с claims токена: типом пользователя и ID профилей.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Для проверки отзыва нужен хэш пароля, его в кэше нет
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        data = get_principal_data(user_id)
+        if data is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not data['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # Токены, выданные до смены типа или профилей пользователя,
+        # считаются устаревшими: нужно получить новую пару токенов.
+        # Профиль, созданный уже после выдачи токена, устаревшим не считается.
+        for claim in PRINCIPAL_CLAIMS:
+            value = validated_token.get(claim)
+            if value is not None and value != data[claim]:
+                raise AuthenticationFailed(
+                    'Данные пользователя изменились, получите новый токен.',
+                    code='token_stale',
+                )
+
+        return build_user(data)
@@ -0,0 +1,52 @@
+"""
+Индексы для поиска клиента по email в админке (только PostgreSQL).
+
+Django выполняет `email__istartswith` и `email__icontains` как
+`UPPER(email::text) LIKE UPPER(%s)`, поэтому оба индекса построены по
+этому выражению:
+
+- user_email_prefix_idx (B-tree, text_pattern_ops) - поиск по началу email;
+- user_email_trgm_idx (GIN, pg_trgm) - поиск по части email. Создается,
+  только если расширение pg_trgm доступно на сервере БД.
+"""
+from django.db import migrations
+
+PREFIX_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS user_email_prefix_idx '
+    'ON users_user ((UPPER(email::text)) text_pattern_ops)'
+)
+TRGM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS user_email_trgm_idx '
+    'ON users_user USING gin ((UPPER(email::text)) gin_trgm_ops)'
+)
+
+
+def create_email_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(PREFIX_INDEX_SQL)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+        trgm_available = cursor.fetchone()[0]
+    if trgm_available:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(TRGM_INDEX_SQL)
+
+
+def drop_email_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS user_email_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS user_email_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_search_indexes, drop_email_search_indexes),
+    ]
@@ -0,0 +1,9 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Описание JWT-аутентификации в схеме OpenAPI для CachedJWTAuthentication
+    (расширение drf-spectacular не распространяется на подклассы).
+    """
+    target_class = 'users.authentication.CachedJWTAuthentication'
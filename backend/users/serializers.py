@@ -1,6 +1,7 @@
 # backend\users\serializers.py
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import Client, Supplier, User
 
@@ -87,3 +88,20 @@ class CustomUserSerializer(UserSerializer):
         model = User
         # Добавляем user_type, чтобы пользователь видел свой тип
         fields = ("id", "email", "first_name", "last_name", "user_type")
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Сериализатор получения JWT.
+    Добавляет в токены тип пользователя и ID его профилей, чтобы права
+    доступа и представления не запрашивали их из БД.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["user_type"] = user.user_type
+        # Claims refresh-токена копируются в выдаваемые по нему access-токены
+        token["client_id"] = getattr(getattr(user, "client_profile", None), "id", None)
+        token["supplier_id"] = getattr(getattr(user, "supplier_profile", None), "id", None)
+        return token
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_principal
+from .models import Client, Supplier, User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    При изменении пользователя (деактивация, смена типа и т.п.)
+    сбрасываем его данные в кэше аутентификации.
+    """
+    invalidate_principal(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Supplier)
+def profile_changed(sender, instance, **kwargs):
+    """Создание или удаление профиля меняет ID профилей пользователя."""
+    invalidate_principal(instance.user_id)
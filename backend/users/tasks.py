@@ -1,11 +1,16 @@
+import logging
+
 from celery import shared_task
 from templated_mail.mail import BaseEmailMessage
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from notifications.services import enqueue_email
 
 # Получаем модель User
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 @shared_task
 def send_djoser_email(template_name, user_id, domain, site_name, uid, token, to_email, subject):
     """
@@ -27,12 +32,22 @@ def send_djoser_email(template_name, user_id, domain, site_name, uid, token, to_
         
         context["url"] = settings.DJOSER['ACTIVATION_URL'].format(**context)
         
-        # Отправляем письмо
+        # Рендерим шаблон и ставим письмо в очередь на отправку
         email = BaseEmailMessage(template_name=template_name, context=context)
-        email.send(to=to_email)
-        
-        return f"Письмо '{subject}' успешно отправлено на {to_email[0]}."
+        email.render()
+        # Если в шаблоне нет текстовой версии, render() подставляет HTML в body
+        text_body = '' if email.body == email.html else email.body
+        enqueue_email(
+            email.subject or subject,
+            text_body,
+            to_email,
+            html_body=email.html or '',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+        )
+
+        return f"Письмо '{subject}' поставлено в очередь для {to_email[0]}."
     except User.DoesNotExist:
         return f"Ошибка: пользователь с ID {user_id} не найден."
     except Exception as e:
+        logger.exception("Ошибка при отправке письма '%s' на %s", subject, to_email[0])
         return f"Ошибка при отправке письма '{subject}' на {to_email[0]}: {e}"
\ No newline at end of file